@@ -12,8 +12,26 @@ from api.exceptions.notfound import NotFoundException
 
 from .exceptions.badrequest import BadRequestException
 from .exceptions.validation import ValidationException
+from .exceptions.unavailable import ServiceUnavailableException
+from .exceptions.deadline import DeadlineExceededException
 
-from .neo4j import init_driver
+from .neo4j import init_driver, init_async_driver, get_driver_config
+from .transactions import FOLLOWERS, ROUTING_MODES, close_request_sessions
+from .bookmarks import BOOKMARK_HEADER, issue_bookmarks
+from .pagination import CURSOR_HEADER, issue_cursor
+from .workloads import get_workload_settings
+from .hedging import Hedging
+from .favorite_cache import FavoriteCache
+from .movie_cache import MovieCache
+from .user_versions import UserVersions
+from .http_cache import ETagRegistry, check_not_modified, add_cache_headers
+from .response_cache import ResponseCache, serve_cached_response, store_response, cache_cli
+from .genre_summaries import GenreSummaryCache, refresh_genre_summaries, start_genre_refresh, genres_cli
+from .batch import Batch
+from .deadlines import get_route_deadlines, start_deadline
+from .guards import GuardMetrics, guard_request
+from .migrations import run_migrations, schema_cli
+from .plans import warm_query_plans, plans_cli
 
 from .routes.auth import auth_routes
 from .routes.account import account_routes
@@ -21,8 +39,64 @@ from .routes.movies import movie_routes
 from .routes.genres import genre_routes
 from .routes.people import people_routes
 from .routes.status import status_routes
+from .routes.batch import batch_routes
+from .routes.aio import auth as async_auth, account as async_account, \
+    movies as async_movies, genres as async_genres, people as async_people
 
-def create_app(test_config=None):
+"""
+Get the tasks to run once the driver has connected and before the worker
+reports ready.  Migrations run first so that queries are planned against
+the indexes they create.
+"""
+def get_startup_tasks(config):
+    tasks = []
+
+    if config.get('NEO4J_MIGRATE'):
+        tasks.append(run_migrations)
+
+    if config.get('NEO4J_REFRESH_GENRES'):
+        tasks.append(refresh_genre_summaries)
+
+    if config.get('NEO4J_WARM_PLANS'):
+        tasks.append(warm_query_plans)
+
+    return tasks
+
+
+"""
+Create the Neo4j drivers for the app.  This is called by `create_app`, or
+by each worker after the fork when the app was created with `connect=False`,
+so that no driver or socket is shared between forked processes.
+"""
+def init_neo4j(app):
+    with app.app_context():
+        init_driver(
+            app.config.get('NEO4J_URI'),
+            app.config.get('NEO4J_USERNAME'),
+            app.config.get('NEO4J_PASSWORD'),
+            min_connections=app.config.get('NEO4J_MIN_CONNECTIONS'),
+            background=app.config.get('NEO4J_BACKGROUND_WARMUP'),
+            workloads=get_workload_settings(app.config),
+            startup=get_startup_tasks(app.config),
+            **get_driver_config(app.config)
+        )
+
+        # Serve the API from the async DAOs and routes
+        if app.config.get('NEO4J_ASYNC'):
+            init_async_driver(
+                app.config.get('NEO4J_URI'),
+                app.config.get('NEO4J_USERNAME'),
+                app.config.get('NEO4J_PASSWORD'),
+                background=app.config.get('NEO4J_BACKGROUND_WARMUP'),
+                **get_driver_config(app.config)
+            )
+
+        # Keep the genre summaries up to date while the worker runs
+        if app.config.get('GENRE_REFRESH_INTERVAL'):
+            start_genre_refresh(app, app.config.get('GENRE_REFRESH_INTERVAL'))
+
+
+def create_app(test_config=None, connect=True):
     # Create and configure app
     static_folder = os.path.join(os.path.dirname(__file__), '..', 'public')
     app = Flask(__name__, static_url_path='/', static_folder=static_folder)
@@ -32,6 +106,45 @@ def create_app(test_config=None):
         NEO4J_USERNAME=os.getenv('NEO4J_USERNAME'),
         NEO4J_PASSWORD=os.getenv('NEO4J_PASSWORD'),
         NEO4J_DATABASE=os.getenv('NEO4J_DATABASE'),
+        NEO4J_MAX_CONNECTION_POOL_SIZE=int(os.getenv('NEO4J_MAX_CONNECTION_POOL_SIZE', 100)),
+        NEO4J_CONNECTION_ACQUISITION_TIMEOUT=float(os.getenv('NEO4J_CONNECTION_ACQUISITION_TIMEOUT', 60)),
+        NEO4J_MAX_CONNECTION_LIFETIME=float(os.getenv('NEO4J_MAX_CONNECTION_LIFETIME', 3600)),
+        NEO4J_LIVENESS_CHECK_TIMEOUT=float(os.getenv('NEO4J_LIVENESS_CHECK_TIMEOUT')) if os.getenv('NEO4J_LIVENESS_CHECK_TIMEOUT') else None,
+        NEO4J_FETCH_SIZE=int(os.getenv('NEO4J_FETCH_SIZE', 1000)),
+        NEO4J_MIN_CONNECTIONS=int(os.getenv('NEO4J_MIN_CONNECTIONS', 0)),
+        NEO4J_BACKGROUND_WARMUP=os.getenv('NEO4J_BACKGROUND_WARMUP', 'true').lower() == 'true',
+        NEO4J_ASYNC=os.getenv('NEO4J_ASYNC', 'false').lower() == 'true',
+        NEO4J_MIGRATE=os.getenv('NEO4J_MIGRATE', 'false').lower() == 'true',
+        NEO4J_WARM_PLANS=os.getenv('NEO4J_WARM_PLANS', 'false').lower() == 'true',
+        NEO4J_REFRESH_GENRES=os.getenv('NEO4J_REFRESH_GENRES', 'false').lower() == 'true',
+        NEO4J_READ_ROUTING=os.getenv('NEO4J_READ_ROUTING', FOLLOWERS),
+        NEO4J_HEDGING=os.getenv('NEO4J_HEDGING', 'false').lower() == 'true',
+        NEO4J_HEDGE_PERCENTILE=float(os.getenv('NEO4J_HEDGE_PERCENTILE', 95)),
+        NEO4J_HEDGE_DELAY=float(os.getenv('NEO4J_HEDGE_DELAY', 0.05)),
+        NEO4J_HEDGE_MIN_SAMPLES=int(os.getenv('NEO4J_HEDGE_MIN_SAMPLES', 100)),
+        BOOKMARK_COOKIE_MAX_AGE=int(os.getenv('BOOKMARK_COOKIE_MAX_AGE', 60)),
+        FAVORITE_CACHE_SIZE=int(os.getenv('FAVORITE_CACHE_SIZE', 10000)),
+        FAVORITE_CACHE_TTL=float(os.getenv('FAVORITE_CACHE_TTL', 30)),
+        GENRE_CACHE_TTL=float(os.getenv('GENRE_CACHE_TTL', 60)),
+        GENRE_REFRESH_INTERVAL=float(os.getenv('GENRE_REFRESH_INTERVAL', 0)),
+        MOVIE_CACHE_SIZE=int(os.getenv('MOVIE_CACHE_SIZE', 1000)),
+        MOVIE_CACHE_TTL=float(os.getenv('MOVIE_CACHE_TTL', 300)),
+        CATALOG_MAX_AGE=int(os.getenv('CATALOG_MAX_AGE', 60)),
+        CATALOG_STALE_WHILE_REVALIDATE=int(os.getenv('CATALOG_STALE_WHILE_REVALIDATE', 300)),
+        CATALOG_ETAG_TTL=float(os.getenv('CATALOG_ETAG_TTL', 60)),
+        RESPONSE_CACHE_SIZE=int(os.getenv('RESPONSE_CACHE_SIZE', 1000)),
+        RESPONSE_CACHE_TTL=float(os.getenv('RESPONSE_CACHE_TTL', 30)),
+        RESPONSE_CACHE_PURGE_INTERVAL=float(os.getenv('RESPONSE_CACHE_PURGE_INTERVAL', 1)),
+        USER_VERSION_CACHE_SIZE=int(os.getenv('USER_VERSION_CACHE_SIZE', 10000)),
+        USER_VERSION_TTL=float(os.getenv('USER_VERSION_TTL', 5)),
+        ROUTE_DEADLINE=float(os.getenv('ROUTE_DEADLINE', 10)),
+        ROUTE_DEADLINES=get_route_deadlines(),
+        MAX_LIMIT=int(os.getenv('MAX_LIMIT', 100)),
+        MAX_SKIP=int(os.getenv('MAX_SKIP', 10000)),
+        MAX_BATCH_SIZE=int(os.getenv('MAX_BATCH_SIZE', 50)),
+        BATCH_MAX_REQUESTS=int(os.getenv('BATCH_MAX_REQUESTS', 10)),
+        BATCH_THREADS=int(os.getenv('BATCH_THREADS', 4)),
+        QUERY_COST_LIMIT=float(os.getenv('QUERY_COST_LIMIT')) if os.getenv('QUERY_COST_LIMIT') else None,
         JWT_SECRET_KEY=os.getenv('JWT_SECRET'),
         JWT_AUTH_HEADER_PREFIX="Bearer",
         JWT_VERIFY_CLAIMS="signature",
@@ -42,33 +155,120 @@ def create_app(test_config=None):
     if test_config is not None:
         app.config.update(test_config)
 
+    if app.config.get('NEO4J_READ_ROUTING') not in ROUTING_MODES:
+        raise ValueError("NEO4J_READ_ROUTING must be one of {0}".format(", ".join(ROUTING_MODES)))
+
+    app.hedging = Hedging(
+        enabled=app.config.get('NEO4J_HEDGING'),
+        percentile=app.config.get('NEO4J_HEDGE_PERCENTILE'),
+        delay=app.config.get('NEO4J_HEDGE_DELAY'),
+        min_samples=app.config.get('NEO4J_HEDGE_MIN_SAMPLES'),
+    )
+
+    app.favorite_cache = FavoriteCache(
+        max_users=app.config.get('FAVORITE_CACHE_SIZE'),
+        ttl=app.config.get('FAVORITE_CACHE_TTL'),
+    )
+
+    app.movie_cache = MovieCache(
+        max_entries=app.config.get('MOVIE_CACHE_SIZE'),
+        ttl=app.config.get('MOVIE_CACHE_TTL'),
+    )
+
+    app.genre_cache = GenreSummaryCache(ttl=app.config.get('GENRE_CACHE_TTL'))
+
+    app.etags = ETagRegistry(ttl=app.config.get('CATALOG_ETAG_TTL'))
+
+    app.response_cache = ResponseCache(
+        max_entries=app.config.get('RESPONSE_CACHE_SIZE'),
+        ttl=app.config.get('RESPONSE_CACHE_TTL'),
+        purge_interval=app.config.get('RESPONSE_CACHE_PURGE_INTERVAL'),
+    )
+
+    app.user_versions = UserVersions(
+        max_users=app.config.get('USER_VERSION_CACHE_SIZE'),
+        ttl=app.config.get('USER_VERSION_TTL'),
+    )
+
+    app.batch = Batch(
+        max_requests=app.config.get('BATCH_MAX_REQUESTS'),
+        threads=app.config.get('BATCH_THREADS'),
+    )
+
+    app.guard_metrics = GuardMetrics()
+    app.guard_estimates = {}
+
     # ensure the instance folder exists
     try:
         os.makedirs(app.instance_path)
     except OSError:
         pass
 
-    with app.app_context():
-        init_driver(
-            app.config.get('NEO4J_URI'),
-            app.config.get('NEO4J_USERNAME'),
-            app.config.get('NEO4J_PASSWORD'),
-        )
+    if connect:
+        init_neo4j(app)
+
+    # `flask schema migrate` and `flask schema status`
+    app.cli.add_command(schema_cli)
+
+    # `flask plans check`
+    app.cli.add_command(plans_cli)
+
+    # `flask genres refresh`
+    app.cli.add_command(genres_cli)
+
+    # `flask cache purge`
+    app.cli.add_command(cache_cli)
 
     # JWT
     jwt = JWTManager(app)
 
     CORS(app, 
-        resources={r"/*": {"origins": ["http://localhost:3000", "http://127.0.0.1:3000"]}}
+        resources={r"/*": {"origins": ["http://localhost:3000", "http://127.0.0.1:3000"]}},
+        expose_headers=[BOOKMARK_HEADER, CURSOR_HEADER, "ETag"]
     )
+
+    # Give each request a time budget that its transactions must finish within
+    app.before_request(start_deadline)
+
+    # Bound and validate pagination and sort parameters before any route runs
+    app.before_request(guard_request)
+
+    # Answer revalidations of catalog responses without running the route
+    app.before_request(check_not_modified)
+
+    # Serve repeated anonymous list requests from the response cache
+    app.before_request(serve_cached_response)
+
+    # Hand bookmarks from write transactions back to the client
+    app.after_request(issue_bookmarks)
+
+    # Hand out the cursor for the next page of a list
+    app.after_request(issue_cursor)
+
+    # Let browsers and shared caches reuse anonymous catalog responses
+    app.after_request(add_cache_headers)
+
+    # Cache anonymous list responses for the requests that follow
+    app.after_request(store_response)
+
+    # Close the Neo4j session opened during the request
+    app.teardown_appcontext(close_request_sessions)
     
     # Register Routes
-    app.register_blueprint(auth_routes)
-    app.register_blueprint(account_routes)
-    app.register_blueprint(genre_routes)
-    app.register_blueprint(movie_routes)
-    app.register_blueprint(people_routes)
+    if app.config.get('NEO4J_ASYNC'):
+        app.register_blueprint(async_auth.auth_routes)
+        app.register_blueprint(async_account.account_routes)
+        app.register_blueprint(async_genres.genre_routes)
+        app.register_blueprint(async_movies.movie_routes)
+        app.register_blueprint(async_people.people_routes)
+    else:
+        app.register_blueprint(auth_routes)
+        app.register_blueprint(account_routes)
+        app.register_blueprint(genre_routes)
+        app.register_blueprint(movie_routes)
+        app.register_blueprint(people_routes)
     app.register_blueprint(status_routes)
+    app.register_blueprint(batch_routes)
 
     # Serve all other routes as static
     @app.route('/', methods=['GET'])
@@ -91,6 +291,14 @@ def create_app(test_config=None):
     def handle_not_found_exception(err):
         return {"message": str(err)}, 404
 
+    @app.errorhandler(ServiceUnavailableException)
+    def handle_service_unavailable_exception(err):
+        return {"message": str(err)}, 503
+
+    @app.errorhandler(DeadlineExceededException)
+    def handle_deadline_exceeded_exception(err):
+        return {"message": str(err)}, 504
+
 
 
     return app
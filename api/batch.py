@@ -0,0 +1,139 @@
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_to_bytes
+
+from api.exceptions.badrequest import BadRequestException
+
+"""
+Run several GET requests to the API in one round trip.
+
+A movie page needs the movie, its ratings and similar movies, each a
+separate request, which adds up over a slow mobile link.  `POST /api/batch`
+takes a list of relative GET requests and dispatches each one straight to
+the WSGI app, so it goes through the same blueprints, hooks and error
+handlers as a request over HTTP, but without the HTTP overhead.  The
+requests are independent reads, so they run concurrently on a bounded
+thread pool, and each one is answered with its own status and body.
+
+Sub-requests carry the headers of the batch request, so they are
+authenticated as the same user and see the same bookmarks.
+"""
+
+# Response headers that are not passed back for each sub-request, as they
+# describe the sub-request itself or are set on the batch response
+SKIPPED_HEADERS = ("Content-Length", "Content-Type", "Vary", "Access-Control-Allow-Origin",
+    "Access-Control-Expose-Headers", "Access-Control-Allow-Credentials")
+
+
+class Batch:
+    def __init__(self, max_requests=10, threads=4):
+        self.max_requests = max_requests
+        self.threads = threads
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        # Created on first use so that no threads exist before a prefork
+        # server forks its workers
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="batch")
+
+            return self.executor
+
+    """
+    Run the requests against `app` and return a response for each one, in
+    the same order.  `environ` is the WSGI environ of the batch request.
+    """
+    def run(self, app, environ, requests):
+        if len(requests) > self.max_requests:
+            raise BadRequestException("At most {0} requests can be batched".format(self.max_requests))
+
+        executor = self.get_executor()
+        futures = [ executor.submit(dispatch, app, environ, request) for request in requests ]
+
+        return [ future.result() for future in futures ]
+
+
+"""
+Get the path of a request in a batch, which is either the path itself or
+an object with a `path` and optionally a `method`.  Raises a
+`BadRequestException` for anything but a relative GET request to the API.
+"""
+def get_path(request):
+    if isinstance(request, dict):
+        if str(request.get("method", "GET")).upper() != "GET":
+            raise BadRequestException("Only GET requests can be batched")
+
+        request = request.get("path")
+
+    if not isinstance(request, str) or not request.startswith("/api/"):
+        raise BadRequestException("Batched requests must be paths starting with /api/")
+
+    if request.split("?")[0].rstrip("/") == "/api/batch":
+        raise BadRequestException("Batches cannot be nested")
+
+    return request
+
+
+"""
+Build the WSGI environ of a GET request to `path` from the environ of the
+batch request, keeping its headers
+"""
+def get_environ(environ, path):
+    path, _, query = path.partition("?")
+
+    sub_environ = { key: value for key, value in environ.items() if not key.startswith("werkzeug.") }
+    sub_environ.update({
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": unquote_to_bytes(path).decode("latin-1"),
+        "QUERY_STRING": query,
+        "CONTENT_TYPE": "",
+        "CONTENT_LENGTH": "0",
+        "wsgi.input": io.BytesIO(),
+    })
+
+    return sub_environ
+
+
+"""
+Dispatch one request in a batch to the app and collect its response
+"""
+def dispatch(app, environ, request):
+    try:
+        path = get_path(request)
+    except BadRequestException as err:
+        return { "path": request, "status": 400, "headers": {}, "body": { "message": str(err) } }
+
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = headers
+
+    try:
+        response = app.wsgi_app(get_environ(environ, path), start_response)
+
+        try:
+            body = b"".join(response)
+        finally:
+            if hasattr(response, "close"):
+                response.close()
+    except Exception as err:
+        return { "path": path, "status": 500, "headers": {}, "body": { "message": str(err) } }
+
+    headers = dict(started["headers"])
+
+    try:
+        body = json.loads(body) if body else None
+    except ValueError:
+        body = body.decode("utf8", "replace")
+
+    return {
+        "path": path,
+        "status": started["status"],
+        "headers": { name: value for name, value in headers.items() if name not in SKIPPED_HEADERS },
+        "body": body,
+    }
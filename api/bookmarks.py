@@ -0,0 +1,98 @@
+import base64
+import json
+
+from flask import current_app, g, request, has_app_context, has_request_context
+
+from neo4j import Bookmarks
+
+"""
+Carry Neo4j bookmarks across requests for read-your-writes consistency.
+
+After a write transaction the bookmark it produced is handed to the client
+in the `X-Neo4j-Bookmark` response header and a cookie of the same value.
+When a later request passes the token back, read transactions are opened
+with that bookmark and the follower serving them waits until it has caught
+up with the write, so reads can stay on followers without serving stale data.
+The cookie expires after `BOOKMARK_COOKIE_MAX_AGE` seconds, by when every
+member has applied the write, so browsers stop sending it and their reads
+no longer wait or skip the caches that requests with bookmarks bypass.
+"""
+
+BOOKMARK_HEADER = "X-Neo4j-Bookmark"
+BOOKMARK_COOKIE = "neo4j_bookmark"
+
+
+"""
+Encode a set of raw bookmark values into an opaque, URL-safe token
+"""
+def encode_bookmarks(values):
+    payload = json.dumps(sorted(values)).encode("utf8")
+
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+"""
+Decode a token created by `encode_bookmarks`.  Malformed tokens are ignored,
+in which case the request simply runs without causal consistency.
+"""
+def decode_bookmarks(token):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (ValueError, UnicodeError):
+        return []
+
+    if not isinstance(values, list):
+        return []
+
+    return [ value for value in values if isinstance(value, str) ]
+
+
+"""
+Get the bookmarks that transactions in the current request should wait for.
+
+Bookmarks produced by a write earlier in this request take precedence over
+the token sent by the client.
+"""
+def get_bookmarks():
+    if not has_app_context():
+        return None
+
+    if g.get("neo4j_bookmarks") is not None:
+        return g.neo4j_bookmarks
+
+    if not has_request_context():
+        return None
+
+    token = request.headers.get(BOOKMARK_HEADER) or request.cookies.get(BOOKMARK_COOKIE)
+
+    if not token:
+        return None
+
+    values = decode_bookmarks(token)
+
+    return Bookmarks.from_raw_values(values) if values else None
+
+
+"""
+Record the bookmarks produced by a write transaction so that they are used
+by the rest of the request and issued to the client with the response.
+"""
+def record_bookmarks(bookmarks):
+    if has_app_context() and bookmarks is not None:
+        g.neo4j_bookmarks = bookmarks
+
+
+"""
+Attach the bookmarks recorded during the request to the response
+"""
+def issue_bookmarks(response):
+    bookmarks = g.get("neo4j_bookmarks")
+
+    if bookmarks is not None and bookmarks.raw_values:
+        token = encode_bookmarks(bookmarks.raw_values)
+
+        response.headers[BOOKMARK_HEADER] = token
+        response.set_cookie(BOOKMARK_COOKIE, token, httponly=True, samesite="Lax",
+            max_age=current_app.config.get("BOOKMARK_COOKIE_MAX_AGE"))
+
+    return response
@@ -0,0 +1,115 @@
+import asyncio
+
+import bcrypt
+import jwt
+from datetime import datetime
+
+from flask import current_app
+
+from api.exceptions.validation import ValidationException
+
+from neo4j.exceptions import ConstraintError
+from api.transactions import execute_read_async, execute_write_async
+from api.workloads import workload, INTERACTIVE
+from api.queries import get_query
+
+class AsyncAuthDAO:
+    """
+    The async counterpart of `AuthDAO`.  The constructor expects an instance
+    of the async Neo4j Driver.
+
+    The coroutines run on the driver's event loop, so the bcrypt work is
+    handed to a thread to keep the loop free for other queries.
+    """
+    def __init__(self, driver, jwt_secret, db_name):
+        self.driver = driver
+        self.jwt_secret = jwt_secret
+        self.db_name = db_name
+
+    """
+    This method should create a new User node in the database with the email and name
+    provided, along with an encrypted version of the password and a `userId` property
+    generated by the server.
+    """
+    async def register(self, email, plain_password, name):
+        hashed = await asyncio.to_thread(bcrypt.hashpw, plain_password.encode("utf8"), bcrypt.gensalt())
+        encrypted = hashed.decode('utf8')
+
+        async def create_user(tx, email, encrypted, name):
+            result = await get_query("auth.register").run(tx,
+                email=email, encrypted=encrypted, name=name
+            )
+
+            return await result.single()
+
+        try:
+            result = await execute_write_async(self.driver, self.db_name, create_user, email, encrypted, name)
+
+            user = result['u']
+
+            payload = {
+                "userId": user["userId"],
+                "email":  user["email"],
+                "name":  user["name"],
+            }
+
+            payload["token"] = self._generate_token(payload)
+
+            return payload
+        except ConstraintError as err:
+            # Pass error details through to a ValidationException
+            raise ValidationException(err.message, {
+                "email": err.message
+            })
+
+    """
+    This method should attempt to find a user by the email address provided
+    and attempt to verify the password.
+    """
+    @workload(INTERACTIVE)
+    async def authenticate(self, email, plain_password):
+        async def get_user(tx, email):
+            result = await get_query("auth.get_user").run(tx, email=email)
+
+            first = await result.single()
+
+            if first is None:
+                return None
+
+            return first.get("u")
+
+        user = await execute_read_async(self.driver, self.db_name, get_user, email=email)
+
+        if user is None:
+            return False
+
+        # Passwords do not match, return false
+        matches = await asyncio.to_thread(bcrypt.checkpw, plain_password.encode('utf-8'), user["password"].encode('utf-8'))
+
+        if matches is False:
+            return False
+
+        # Generate JWT Token
+        payload = {
+            "userId": user["userId"],
+            "email":  user["email"],
+            "name":  user["name"],
+        }
+
+        payload["token"] = self._generate_token(payload)
+
+        return payload
+
+    def _generate_token(self, payload):
+        iat = datetime.utcnow()
+
+        payload["sub"] = payload["userId"]
+        payload["iat"] = iat
+        payload["nbf"] = iat
+        payload["exp"] = iat + current_app.config.get('JWT_EXPIRATION_DELTA')
+
+        return jwt.encode(
+            payload,
+            self.jwt_secret,
+            algorithm='HS256'
+        )
@@ -0,0 +1,80 @@
+from api.exceptions.notfound import NotFoundException
+from api.transactions import execute_read_async, execute_write_async
+from api.queries import get_query
+from api.favorite_cache import get_favorite_cache
+from api.user_versions import record_version
+from api.pagination import get_page_parameters
+
+class AsyncFavoriteDAO:
+    """
+    The async counterpart of `FavoriteDAO`.  The constructor expects an instance
+    of the async Neo4j Driver.
+    """
+    def __init__(self, driver, db_name):
+        self.driver=driver
+        self.db_name=db_name
+
+    """
+    This method should retrieve a list of movies that have an incoming :HAS_FAVORITE
+    relationship from a User node with the supplied `userId`.
+    """
+    async def all(self, user_id, sort = 'title', order = 'ASC', limit = 6, skip = 0, after = None):
+        query = get_query("favorites.all", "movie", sort, order, after is not None)
+
+        async def get_favorites(tx):
+            result = await query.run(tx, userId=user_id, **get_page_parameters(limit, skip, after))
+
+            return await result.value("movie")
+
+        return await execute_read_async(self.driver, self.db_name, get_favorites)
+
+    """
+    This method should create a `:HAS_FAVORITE` relationship between
+    the User and Movie ID nodes provided.
+    """
+    async def add(self, user_id, movie_id):
+        async def add_to_favorites(tx, user_id, movie_id):
+            result = await get_query("favorites.add").run(tx, userId=user_id, movieId=movie_id)
+            row = await result.single()
+
+            if row == None:
+                raise NotFoundException()
+
+            return row.get("movie"), row.get("version")
+
+        movie, version = await execute_write_async(self.driver, self.db_name, add_to_favorites, user_id, movie_id)
+
+        cache = get_favorite_cache()
+
+        if cache is not None:
+            cache.add(user_id, movie_id, version)
+
+        # Let the user's lists be revalidated against their new version
+        record_version(user_id, version)
+
+        return movie
+
+    """
+    This method should remove the `:HAS_FAVORITE` relationship between
+    the User and Movie ID nodes provided.
+    """
+    async def remove(self, user_id, movie_id):
+        async def remove_from_favorites(tx, user_id, movie_id):
+            result = await get_query("favorites.remove").run(tx, userId=user_id, movieId=movie_id)
+            row = await result.single()
+
+            if row == None:
+                raise NotFoundException()
+
+            return row.get("movie"), row.get("version")
+
+        movie, version = await execute_write_async(self.driver, self.db_name, remove_from_favorites, user_id, movie_id)
+
+        cache = get_favorite_cache()
+
+        if cache is not None:
+            cache.remove(user_id, movie_id, version)
+
+        record_version(user_id, version)
+
+        return movie
@@ -0,0 +1,54 @@
+from api.exceptions.notfound import NotFoundException
+from api.transactions import execute_read_async
+from api.workloads import workload, AGGREGATION
+from api.queries import get_query
+from api.genre_summaries import get_genre_cache
+
+class AsyncGenreDAO:
+    """
+    The async counterpart of `GenreDAO`.  The constructor expects an instance
+    of the async Neo4j Driver.
+    """
+    def __init__(self, driver, db_name):
+        self.driver=driver
+        self.db_name=db_name
+
+    async def all(self):
+        return [ dict(genre) for genre in (await self.get_summaries()).values() ]
+
+    """
+    This method should find a Genre node by its name and return a set of properties
+    along with a `poster` image and `movies` count.
+    """
+    async def find(self, name):
+        genre = (await self.get_summaries()).get(name)
+
+        if genre == None:
+            raise NotFoundException()
+
+        return dict(genre)
+
+    """
+    Get the summary of each genre by name, from the genre cache when it is
+    cached
+    """
+    async def get_summaries(self):
+        cache = get_genre_cache()
+        summaries = cache.get(self.db_name) if cache is not None else None
+
+        if summaries is None:
+            summaries = { genre["name"]: genre for genre in await self.load_summaries() }
+
+            if cache is not None:
+                cache.set(self.db_name, summaries)
+
+        return summaries
+
+    @workload(AGGREGATION)
+    async def load_summaries(self):
+        async def get_genres(tx):
+            result = await get_query("genres.summaries").run(tx)
+
+            return await result.value("genre")
+
+        return await execute_read_async(self.driver, self.db_name, get_genres)
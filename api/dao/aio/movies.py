@@ -0,0 +1,168 @@
+from api.data import popular
+
+from api.exceptions.notfound import NotFoundException
+from api.transactions import execute_read_async
+from api.workloads import workload, INTERACTIVE
+from api.hedging import hedged
+from api.queries import get_query
+from api.favorite_cache import get_cached_favorites_async, cache_favorites, flag_favorites
+from api.pagination import get_page_parameters
+from api.fields import to_map
+from api.movie_cache import get_movie_cache, shape_movie
+
+class AsyncMovieDAO:
+    """
+    The async counterpart of `MovieDAO`.  The constructor expects an instance
+    of the async Neo4j Driver, and every method is a coroutine that should be
+    awaited on the driver's event loop.
+    """
+    def __init__(self, driver, db_name):
+        self.driver = driver
+        self.db_name = db_name
+
+    """
+     This method should return a paginated list of movies ordered by the `sort`
+     parameter and limited to the number passed as `limit`.  The `skip` variable should be
+     used to skip a certain number of rows.
+
+     If a user_id value is suppled, a `favorite` boolean property should be returned to
+     signify whether the user has added the movie to their "My Favorites" list.
+    """
+    @hedged
+    async def all(self, sort, order, limit=6, skip=0, user_id=None, after=None, fields=None):
+        query = get_query("movies.all", "movie", sort, order, after is not None)
+
+        async def get_movies(tx, params):
+            result = await query.run(tx, fields=fields, **params)
+
+            return [to_map(row.value("movie"), fields) async for row in result]
+
+        movies = await execute_read_async(self.driver, self.db_name, get_movies, get_page_parameters(limit, skip, after))
+
+        return flag_favorites(movies, await self.get_user_favorites(user_id))
+
+    """
+    This method should return a paginated list of movies that have a relationship to the
+    supplied Genre.
+    """
+    @hedged
+    async def get_by_genre(self, name, sort='title', order='ASC', limit=6, skip=0, user_id=None, after=None, fields=None):
+        query = get_query("movies.by_genre", "movie", sort, order, after is not None)
+
+        async def get_movies_in_genre(tx, params):
+            result = await query.run(tx, name=name, fields=fields, **params)
+
+            return [ to_map(row.get("movie"), fields) async for row in result ]
+
+        movies = await execute_read_async(self.driver, self.db_name, get_movies_in_genre, get_page_parameters(limit, skip, after))
+
+        return flag_favorites(movies, await self.get_user_favorites(user_id))
+
+    """
+    This method should return a paginated list of movies that have an ACTED_IN relationship
+    to a Person with the id supplied
+    """
+    async def get_for_actor(self, id, sort='title', order='ASC', limit=6, skip=0, user_id=None, after=None, fields=None):
+        return await self.get_for_person("movies.for_actor", id, sort, order, limit, skip, user_id, after, fields)
+
+    """
+    This method should return a paginated list of movies that have an DIRECTED relationship
+    to a Person with the id supplied
+    """
+    async def get_for_director(self, id, sort='title', order='ASC', limit=6, skip=0, user_id=None, after=None, fields=None):
+        return await self.get_for_person("movies.for_director", id, sort, order, limit, skip, user_id, after, fields)
+
+    async def get_for_person(self, name, id, sort, order, limit, skip, user_id, after, fields):
+        query = get_query(name, "movie", sort, order, after is not None)
+
+        async def get_movies(tx):
+            result = await query.run(tx, id=id, fields=fields, **get_page_parameters(limit, skip, after))
+
+            return [ to_map(movie, fields) for movie in await result.value("movie") ]
+
+        movies = await execute_read_async(self.driver, self.db_name, get_movies)
+
+        return flag_favorites(movies, await self.get_user_favorites(user_id))
+
+    """
+    This method find a Movie node with the ID passed as the `id` parameter.
+    Along with the returned payload, a list of actors, directors, and genres should
+    be included.
+
+    `fields` limits the properties of the movie that are returned, and
+    `actors_limit` and `directors_limit` the number of actors and directors.
+    Cached movies are shaped from the movie cache without a query.
+    """
+    @workload(INTERACTIVE)
+    @hedged
+    async def find_by_id(self, id, user_id=None, fields=None, actors_limit=None, directors_limit=None):
+        async def find_movie_by_id(tx, id, fields=None, actors_limit=None, directors_limit=None):
+            result = await get_query("movies.find_by_id").run(tx, id=id, fields=fields,
+                actorsLimit=actors_limit, directorsLimit=directors_limit)
+            first = await result.single()
+
+            if first == None:
+                raise NotFoundException()
+
+            return dict(to_map(first.get("movie"), fields),
+                actors=first.get("actors"), directors=first.get("directors"), genres=first.get("genres"))
+
+        cache = get_movie_cache()
+
+        if cache is None:
+            movie = await execute_read_async(self.driver, self.db_name, find_movie_by_id, id, fields, actors_limit, directors_limit)
+        else:
+            movie = cache.get(id)
+
+            if movie is None:
+                movie = await execute_read_async(self.driver, self.db_name, find_movie_by_id, id)
+
+                cache.set(id, movie)
+
+            movie = shape_movie(movie, fields, actors_limit, directors_limit)
+
+        return flag_favorites([ movie ], await self.get_user_favorites(user_id))[0]
+
+    """
+    This method finds the movies with the IDs passed as `ids` in a single query,
+    and returns them in the same order.
+    """
+    @hedged
+    async def get_by_ids(self, ids, user_id=None, fields=None):
+        async def get_movies_by_ids(tx, ids):
+            result = await get_query("movies.by_ids").run(tx, ids=ids, fields=fields)
+
+            return [ to_map(row.value("movie"), fields) async for row in result ]
+
+        movies = { movie["tmdbId"]: movie for movie in await execute_read_async(self.driver, self.db_name, get_movies_by_ids, ids) }
+
+        return flag_favorites([ movies[id] for id in ids if id in movies ], await self.get_user_favorites(user_id))
+
+    """
+    This method should return a paginated list of similar movies to the Movie with the
+    id supplied.
+    """
+    async def get_similar_movies(self, id, limit=6, skip=0, user_id=None):
+        # TODO: Get similar movies from Neo4j
+        return popular[skip:limit]
+
+    """
+    This function should return a set of tmdbId properties for the movies that
+    the user has added to their 'My Favorites' list, from the favorites cache
+    when they are cached.
+    """
+    async def get_user_favorites(self, user_id):
+        if user_id == None:
+            return set()
+
+        favorites = await get_cached_favorites_async(user_id)
+
+        if favorites is None:
+            async def get_favorite_ids(tx):
+                result = await get_query("movies.user_favorites").run(tx, userId=user_id)
+
+                return await result.single()
+
+            favorites = cache_favorites(user_id, await execute_read_async(self.driver, self.db_name, get_favorite_ids))
+
+        return favorites
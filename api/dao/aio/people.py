@@ -0,0 +1,45 @@
+from api.data import people, pacino
+from api.exceptions.notfound import NotFoundException
+from api.transactions import execute_read_async
+from api.queries import get_query
+from api.pagination import get_page_parameters
+
+
+class AsyncPeopleDAO:
+    """
+    The async counterpart of `PeopleDAO`.  The constructor expects an instance
+    of the async Neo4j Driver.
+    """
+
+    def __init__(self, driver, db_name):
+        self.driver = driver
+        self.db_name = db_name
+
+    """
+    This method should return a paginated list of People (actors or directors),
+    with an optional filter on the person's name based on the `q` parameter.
+    """
+    async def all(self, q, sort = 'name', order = 'ASC', limit = 6, skip = 0, after = None):
+        query = get_query("people.all", "person", sort, order, after is not None)
+
+        async def get_people(tx):
+            result = await query.run(tx, q=q, **get_page_parameters(limit, skip, after))
+
+            return await result.value("person")
+
+        return await execute_read_async(self.driver, self.db_name, get_people)
+
+    """
+    Find a user by their ID.
+    """
+    async def find_by_id(self, id):
+        # TODO: Find a user by their ID
+        return pacino
+
+    """
+    Get a list of similar people to a Person, ordered by their similarity score
+    in descending order.
+    """
+    async def get_similar_people(self, id, limit = 6, skip = 0):
+        # TODO: Get a list of similar people to the person by their id
+        return people[skip:limit]
@@ -0,0 +1,62 @@
+from api.exceptions.notfound import NotFoundException
+from api.transactions import execute_read_async, execute_write_async
+from api.queries import get_query
+from api.pagination import get_page_parameters
+from api.movie_cache import get_movie_cache
+from api.response_cache import purge_responses, publish_purge_async
+from api.user_versions import record_version
+
+
+class AsyncRatingDAO:
+    """
+    The async counterpart of `RatingDAO`.  The constructor expects an instance
+    of the async Neo4j Driver.
+    """
+    def __init__(self, driver, db_name):
+        self.driver=driver
+        self.db_name = db_name
+
+    """
+    Add a relationship between a User and Movie with a `rating` property.
+    """
+    async def add(self, user_id, movie_id, rating):
+        async def create_rating(tx, user_id, movie_id, rating):
+            result = await get_query("ratings.add").run(tx, user_id=user_id, movie_id=movie_id, rating=rating)
+            record = await result.single()
+
+            if record is not None:
+                await publish_purge_async(tx, [ "movie:{0}".format(movie_id) ])
+
+            return record
+
+        record = await execute_write_async(self.driver, self.db_name, create_rating, user_id=user_id, movie_id=movie_id, rating=rating)
+
+        if record is None:
+            raise NotFoundException()
+
+        # Drop the cached details of the rated movie
+        cache = get_movie_cache()
+
+        if cache is not None:
+            cache.invalidate(movie_id)
+
+        # Drop this worker's cached lists that show the movie or its ratings
+        purge_responses("movie:{0}".format(movie_id))
+
+        # Let the user's lists be revalidated against their new version
+        record_version(user_id, record.get("version"))
+
+        return record["movie"]
+
+    """
+    Return a paginated list of reviews for a Movie.
+    """
+    async def for_movie(self, id, sort = 'timestamp', order = 'ASC', limit = 6, skip = 0, after = None):
+        query = get_query("ratings.for_movie", "rating", sort, order, after is not None)
+
+        async def get_reviews(tx):
+            result = await query.run(tx, id=id, **get_page_parameters(limit, skip, after))
+
+            return await result.value("review")
+
+        return await execute_read_async(self.driver, self.db_name, get_reviews)
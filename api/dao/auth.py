@@ -8,6 +8,9 @@ from api.exceptions.badrequest import BadRequestException
 from api.exceptions.validation import ValidationException
 
 from neo4j.exceptions import ConstraintError
+from api.transactions import execute_read, execute_write
+from api.workloads import workload, INTERACTIVE
+from api.queries import get_query
 
 class AuthDAO:
     """
@@ -32,33 +35,24 @@ class AuthDAO:
         encrypted = bcrypt.hashpw(plain_password.encode("utf8"), bcrypt.gensalt()).decode('utf8')
 
         def create_user(tx, email, encrypted, name):
-            return tx.run(""" // (1)
-                CREATE (u:User {
-                    userId: randomUuid(),
-                    email: $email,
-                    password: $encrypted,
-                    name: $name
-                })
-                RETURN u
-            """,
-            email=email, encrypted=encrypted, name=name # (2)
+            return get_query("auth.register").run(tx, # (1)
+                email=email, encrypted=encrypted, name=name # (2)
             ).single() # (3)
 
         try:
-            with self.driver.session(database=self.db_name) as session:
-                result = session.execute_write(create_user, email, encrypted, name)
+            result = execute_write(self.driver, self.db_name, create_user, email, encrypted, name)
 
-                user = result['u']
+            user = result['u']
 
-                payload = {
-                    "userId": user["userId"],
-                    "email":  user["email"],
-                    "name":  user["name"],
-                }
+            payload = {
+                "userId": user["userId"],
+                "email":  user["email"],
+                "name":  user["name"],
+            }
 
-                payload["token"] = self._generate_token(payload)
+            payload["token"] = self._generate_token(payload)
 
-                return payload
+            return payload
         except ConstraintError as err:
             # Pass error details through to a ValidationException
             raise ValidationException(err.message, {
@@ -82,12 +76,12 @@ class AuthDAO:
     }
     """
     # tag::authenticate[]
+    @workload(INTERACTIVE)
     def authenticate(self, email, plain_password):
         # TODO: Implement Login functionality
         def get_user(tx, email):
             # Get the result
-            result = tx.run("MATCH (u:User {email: $email}) RETURN u",
-                email=email)
+            result = get_query("auth.get_user").run(tx, email=email)
 
             # Expect a single row
             first = result.single()
@@ -100,8 +94,7 @@ class AuthDAO:
             user = first.get("u")
 
             return user
-        with self.driver.session(database=self.db_name) as session:
-            user = session.execute_read(get_user, email=email)
+        user = execute_read(self.driver, self.db_name, get_user, email=email)
 
         if user is None:
             return False
@@ -1,5 +1,10 @@
 from api.data import popular, goodfellas
 from api.exceptions.notfound import NotFoundException
+from api.transactions import execute_read, execute_write
+from api.queries import get_query
+from api.favorite_cache import get_favorite_cache
+from api.user_versions import record_version
+from api.pagination import get_page_parameters
 
 class FavoriteDAO:
     """
@@ -19,23 +24,18 @@ class FavoriteDAO:
     in the `order` parameter.
 
     Results should be limited to the number passed as `limit`.
-    The `skip` variable should be used to skip a certain number of rows.
+    The `skip` variable should be used to skip a certain number of rows, unless
+    `after`, a position decoded from a cursor, is passed.
     """
-    def all(self, user_id, sort = 'title', order = 'ASC', limit = 6, skip = 0):
+    def all(self, user_id, sort = 'title', order = 'ASC', limit = 6, skip = 0, after = None):
+        query = get_query("favorites.all", "movie", sort, order, after is not None)
+
         # Retrieve a list of movies favorited by the user
-        with self.driver.session(database=self.db_name) as session:
-            movies = session.execute_read(lambda tx: tx.run("""
-                MATCH (u:User {{userId: $userId}})-[r:HAS_FAVORITE]->(m:Movie)
-                RETURN m {{
-                    .*,
-                    favorite: true
-                }} AS movie
-                ORDER BY m.`{0}` {1}
-                SKIP $skip
-                LIMIT $limit
-            """.format(sort, order), userId=user_id, limit=limit, skip=skip).value("movie"))
-
-            return movies
+        movies = execute_read(self.driver, self.db_name, lambda tx: query.run(
+            tx, userId=user_id, **get_page_parameters(limit, skip, after)
+        ).value("movie"))
+
+        return movies
 
     """
     This method should create a `:HAS_FAVORITE` relationship between
@@ -46,25 +46,26 @@ class FavoriteDAO:
     def add(self, user_id, movie_id):
     # Define a new transaction function to create a HAS_FAVORITE relationship
         def add_to_favorites(tx, user_id, movie_id):
-            row = tx.run("""
-                MATCH (u:User {userId: $userId})
-                MATCH (m:Movie {tmdbId: $movieId})
-                MERGE (u)-[r:HAS_FAVORITE]->(m)
-                ON CREATE SET u.createdAt = datetime()
-                RETURN m {
-                    .*,
-                    favorite: true
-                } AS movie
-            """, userId=user_id, movieId=movie_id).single()
+            row = get_query("favorites.add").run(tx, userId=user_id, movieId=movie_id).single()
 
             # If no rows are returnedm throw a NotFoundException
             if row == None:
                 raise NotFoundException()
 
-            return row.get("movie")
+            return row.get("movie"), row.get("version")
+
+        movie, version = execute_write(self.driver, self.db_name, add_to_favorites, user_id, movie_id)
+
+        # Keep the user's cached favorites up to date
+        cache = get_favorite_cache()
+
+        if cache is not None:
+            cache.add(user_id, movie_id, version)
 
-        with self.driver.session(database=self.db_name) as session:
-            return session.execute_write(add_to_favorites, user_id, movie_id)
+        # Let the user's lists be revalidated against their new version
+        record_version(user_id, version)
+
+        return movie
 
     """
     This method should remove the `:HAS_FAVORITE` relationship between
@@ -75,22 +76,23 @@ class FavoriteDAO:
     """
     def remove(self, user_id, movie_id):
         def remove_from_favorites(tx, user_id, movie_id):
-            row = tx.run("""
-                MATCH (u:User {userId: $userId})-[r:HAS_FAVORITE]->(m:Movie {tmdbId: $movieId})
-                DELETE r
-                RETURN m {
-                    .*,
-                    favorite: false
-                } AS movie
-            """, userId=user_id, movieId=movie_id).single()
+            row = get_query("favorites.remove").run(tx, userId=user_id, movieId=movie_id).single()
 
             # If no rows are returnedm throw a NotFoundException
             if row == None:
                 raise NotFoundException()
 
-            return row.get("movie")
+            return row.get("movie"), row.get("version")
 
         # Execute the transaction function within a Write Transaction
-        with self.driver.session(database=self.db_name) as session:
-            # Return movie details and `favorite` property
-            return session.execute_write(remove_from_favorites, user_id, movie_id)
\ No newline at end of file
+        # and return movie details and `favorite` property
+        movie, version = execute_write(self.driver, self.db_name, remove_from_favorites, user_id, movie_id)
+
+        cache = get_favorite_cache()
+
+        if cache is not None:
+            cache.remove(user_id, movie_id, version)
+
+        record_version(user_id, version)
+
+        return movie
\ No newline at end of file
@@ -1,5 +1,8 @@
-from api.data import genres
 from api.exceptions.notfound import NotFoundException
+from api.transactions import execute_read
+from api.workloads import workload, AGGREGATION
+from api.queries import get_query
+from api.genre_summaries import get_genre_cache
 
 class GenreDAO:
     """
@@ -12,32 +15,8 @@ class GenreDAO:
 
     # tag::all[]
     def all(self):
-        # Define a unit of work to Get a list of Genres
-        def get_movies(tx):
-            result = tx.run("""
-                MATCH (g:Genre)
-                WHERE g.name <> '(no genres listed)'
-                CALL {
-                    WITH g
-                    MATCH (g)<-[:IN_GENRE]-(m:Movie)
-                    WHERE m.imdbRating IS NOT NULL AND m.poster IS NOT NULL
-                    RETURN m.poster AS poster
-                    ORDER BY m.imdbRating DESC LIMIT 1
-                }
-                RETURN g {
-                    .*,
-                    movies: count { (g)<-[:IN_GENRE]-(:Movie) },
-                    poster: poster
-                } AS genre
-                ORDER BY g.name ASC
-            """)
-
-            return [ g.value(0) for g in result ]
-
-        # Open a new session
-        with self.driver.session(database=self.db_name) as session:
-            # Execute within a Read Transaction
-            return session.execute_read(get_movies)
+        # Get the summaries of every genre, ordered by name
+        return [ dict(genre) for genre in self.get_summaries().values() ]
 
 
     """
@@ -48,9 +27,35 @@ class GenreDAO:
     """
     # tag::find[]
     def find(self, name):
-        # TODO: Open a new session
-        # TODO: Define a unit of work to find the genre by it's name
-        # TODO: Execute within a Read Transaction
+        genre = self.get_summaries().get(name)
 
-        return [g for g in genres if g["name"] == name][0]
-    # end::find[]
\ No newline at end of file
+        if genre == None:
+            raise NotFoundException()
+
+        return dict(genre)
+    # end::find[]
+
+    """
+    Get the summary of each genre by name, from the genre cache when it is
+    cached
+    """
+    def get_summaries(self):
+        cache = get_genre_cache()
+        summaries = cache.get(self.db_name) if cache is not None else None
+
+        if summaries is None:
+            summaries = { genre["name"]: genre for genre in self.load_summaries() }
+
+            if cache is not None:
+                cache.set(self.db_name, summaries)
+
+        return summaries
+
+    """
+    Read the genre summaries materialized on the Genre nodes, working out
+    those of genres that have not been refreshed yet
+    """
+    @workload(AGGREGATION)
+    def load_summaries(self):
+        # Execute within a Read Transaction
+        return execute_read(self.driver, self.db_name, lambda tx: get_query("genres.summaries").run(tx).value("genre"))
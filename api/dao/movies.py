@@ -2,6 +2,14 @@ from api.data import popular, goodfellas
 
 from api.exceptions.notfound import NotFoundException
 from api.data import popular
+from api.transactions import execute_read
+from api.workloads import workload, INTERACTIVE
+from api.hedging import hedged
+from api.queries import get_query
+from api.favorite_cache import get_cached_favorites, cache_favorites, flag_favorites
+from api.pagination import get_page_parameters
+from api.fields import to_map
+from api.movie_cache import get_movie_cache, shape_movie
 
 class MovieDAO:
     """
@@ -19,32 +27,29 @@ class MovieDAO:
 
      If a user_id value is suppled, a `favorite` boolean property should be returned to
      signify whether the user has added the movie to their "My Favorites" list.
+
+     If `after` is passed, a (sort key value, tmdbId) pair decoded from a cursor, the
+     page starts after that movie instead of skipping `skip` rows.
+
+     If `fields` is passed, a list of property names, only those properties are returned.
     """
     # tag::all[]
-    def all(self, sort, order, limit=6, skip=0, user_id=None):
-        def get_movies(tx, sort, order, limit, skip, user_id):
-
-            favorites = self.get_user_favorites(tx, user_id)
-
-            cypher = """
-            MATCH (m:Movie)
-            WHERE m.`{0}` IS NOT NULL
-            RETURN m {{
-                .*,
-                favorite: m.tmdbId IN $favorites
-            }} AS movie
-            ORDER BY m.`{0}` {1}
-            SKIP $skip
-            LIMIT $limit""".format(sort, order)
+    @hedged
+    def all(self, sort, order, limit=6, skip=0, user_id=None, after=None, fields=None):
+        # Get the pre-built variant of the query for this sort and order
+        query = get_query("movies.all", "movie", sort, order, after is not None)
 
+        def get_movies(tx, params):
             # Run the statement within the transaction passed as the first argument
-            result = tx.run(cypher, limit=limit, skip=skip, user_id=user_id, favorites=favorites)
+            result = query.run(tx, fields=fields, **params)
 
             # Extract a list of Movies from the Result
-            return [row.value("movie") for row in result]
+            return [to_map(row.value("movie"), fields) for row in result]
 
-        with self.driver.session(database=self.db_name) as session:
-            return session.execute_read(get_movies, sort, order, limit, skip, user_id)
+        movies = execute_read(self.driver, self.db_name, get_movies, get_page_parameters(limit, skip, after))
+
+        # Flag the user's favorites
+        return flag_favorites(movies, self.get_user_favorites(user_id))
 
     """
     This method should return a paginated list of movies that have a relationship to the
@@ -59,28 +64,18 @@ class MovieDAO:
     signify whether the user has added the movie to their "My Favorites" list.
     """
     # tag::getByGenre[]
-    def get_by_genre(self, name, sort='title', order='ASC', limit=6, skip=0, user_id=None):
-        def get_movies_in_genre(tx, sort, order, limit, skip, user_id):
-            favorites = self.get_user_favorites(tx, user_id)
-
-            cypher = """
-                MATCH (m:Movie)-[:IN_GENRE]->(:Genre {{name: $name}})
-                WHERE m.`{0}` IS NOT NULL
-                RETURN m {{
-                    .*,
-                    favorite: m.tmdbId in $favorites
-                }} AS movie
-                ORDER BY m.`{0}` {1}
-                SKIP $skip
-                LIMIT $limit
-            """.format(sort, order)
-
-            result = tx.run(cypher, name=name, limit=limit, skip=skip, user_id=user_id, favorites=favorites)
-
-            return [ row.get("movie") for row in result ]
-
-        with self.driver.session() as session:
-            return session.execute_read(get_movies_in_genre, sort, order, limit=limit, skip=skip, user_id=user_id)
+    @hedged
+    def get_by_genre(self, name, sort='title', order='ASC', limit=6, skip=0, user_id=None, after=None, fields=None):
+        query = get_query("movies.by_genre", "movie", sort, order, after is not None)
+
+        def get_movies_in_genre(tx, params):
+            result = query.run(tx, name=name, fields=fields, **params)
+
+            return [ to_map(row.get("movie"), fields) for row in result ]
+
+        movies = execute_read(self.driver, self.db_name, get_movies_in_genre, get_page_parameters(limit, skip, after))
+
+        return flag_favorites(movies, self.get_user_favorites(user_id))
         
     """
     This method should return a paginated list of movies that have an ACTED_IN relationship
@@ -95,12 +90,14 @@ class MovieDAO:
     signify whether the user has added the movie to their "My Favorites" list.
     """
     # tag::getForActor[]
-    def get_for_actor(self, id, sort='title', order='ASC', limit=6, skip=0, user_id=None):
-        # TODO: Get Movies for an Actor
-        # TODO: The Cypher string will be formated so remember to escape the braces: {{tmdbId: $id}}
-        # MATCH (:Person {tmdbId: $id})-[:ACTED_IN]->(m:Movie)
+    def get_for_actor(self, id, sort='title', order='ASC', limit=6, skip=0, user_id=None, after=None, fields=None):
+        query = get_query("movies.for_actor", "movie", sort, order, after is not None)
 
-        return popular[skip:limit]
+        movies = execute_read(self.driver, self.db_name, lambda tx: [ to_map(movie, fields) for movie in query.run(
+            tx, id=id, fields=fields, **get_page_parameters(limit, skip, after)
+        ).value("movie") ])
+
+        return flag_favorites(movies, self.get_user_favorites(user_id))
     # end::getForActor[]
 
     """
@@ -116,12 +113,14 @@ class MovieDAO:
     signify whether the user has added the movie to their "My Favorites" list.
     """
     # tag::getForDirector[]
-    def get_for_director(self, id, sort='title', order='ASC', limit=6, skip=0, user_id=None):
-        # TODO: Get Movies directed by a Person
-        # TODO: The Cypher string will be formated so remember to escape the braces: {{name: $name}}
-        # MATCH (:Person {tmdbId: $id})-[:DIRECTED]->(m:Movie)
+    def get_for_director(self, id, sort='title', order='ASC', limit=6, skip=0, user_id=None, after=None, fields=None):
+        query = get_query("movies.for_director", "movie", sort, order, after is not None)
 
-        return popular[skip:limit]
+        movies = execute_read(self.driver, self.db_name, lambda tx: [ to_map(movie, fields) for movie in query.run(
+            tx, id=id, fields=fields, **get_page_parameters(limit, skip, after)
+        ).value("movie") ])
+
+        return flag_favorites(movies, self.get_user_favorites(user_id))
     # end::getForDirector[]
 
     """
@@ -132,34 +131,62 @@ class MovieDAO:
 
     If a user_id value is suppled, a `favorite` boolean property should be returned to
     signify whether the user has added the movie to their "My Favorites" list.
+
+    `fields` limits the properties of the movie that are returned, and
+    `actors_limit` and `directors_limit` the number of actors and directors.
+
+    The full details are kept in the movie cache, and shaped for the request
+    from there, so a cached movie is found without querying the database.
     """
     # tag::findById[]
-    def find_by_id(self, id, user_id=None):
+    @workload(INTERACTIVE)
+    @hedged
+    def find_by_id(self, id, user_id=None, fields=None, actors_limit=None, directors_limit=None):
     # Find a movie by its ID
-        def find_movie_by_id(tx, id, user_id = None):
-            favorites = self.get_user_favorites(tx, user_id)
-
-            cypher = """
-            MATCH (m:Movie {tmdbId: $id})
-            RETURN m {
-                .*,
-                actors: [ (a)-[r:ACTED_IN]->(m) | a { .*, role: r.role } ],
-                directors: [ (d)-[:DIRECTED]->(m) | d { .* } ],
-                genres: [ (m)-[:IN_GENRE]->(g) | g { .name }],
-                favorite: m.tmdbId IN $favorites
-            } AS movie
-            LIMIT 1
-            """
-
-            first = tx.run(cypher, id=id, favorites=favorites).single()
+        def find_movie_by_id(tx, id, fields=None, actors_limit=None, directors_limit=None):
+            first = get_query("movies.find_by_id").run(tx, id=id, fields=fields,
+                actorsLimit=actors_limit, directorsLimit=directors_limit).single()
 
             if first == None:
                 raise NotFoundException()
 
-            return first.get("movie")
+            return dict(to_map(first.get("movie"), fields),
+                actors=first.get("actors"), directors=first.get("directors"), genres=first.get("genres"))
+
+        cache = get_movie_cache()
 
-        with self.driver.session(database=self.db_name) as session:
-            return session.execute_read(find_movie_by_id, id, user_id)
+        if cache is None:
+            movie = execute_read(self.driver, self.db_name, find_movie_by_id, id, fields, actors_limit, directors_limit)
+        else:
+            # Cache the full details and shape a copy of them for this request
+            movie = cache.get(id)
+
+            if movie is None:
+                movie = execute_read(self.driver, self.db_name, find_movie_by_id, id)
+
+                cache.set(id, movie)
+
+            movie = shape_movie(movie, fields, actors_limit, directors_limit)
+
+        return flag_favorites([ movie ], self.get_user_favorites(user_id))[0]
+
+    """
+    This method finds the movies with the IDs passed as `ids` in a single query,
+    and returns them in the same order.  IDs that do not match a movie are left out.
+
+    If a user_id value is suppled, a `favorite` boolean property should be returned to
+    signify whether the user has added the movie to their "My Favorites" list.
+    """
+    @hedged
+    def get_by_ids(self, ids, user_id=None, fields=None):
+        def get_movies_by_ids(tx, ids):
+            result = get_query("movies.by_ids").run(tx, ids=ids, fields=fields)
+
+            return [ to_map(row.value("movie"), fields) for row in result ]
+
+        movies = { movie["tmdbId"]: movie for movie in execute_read(self.driver, self.db_name, get_movies_by_ids, ids) }
+
+        return flag_favorites([ movies[id] for id in ids if id in movies ], self.get_user_favorites(user_id))
 
     """
     This method should return a paginated list of similar movies to the Movie with the
@@ -183,16 +210,20 @@ class MovieDAO:
 
 
     """
-    This function should return a list of tmdbId properties for the movies that
-    the user has added to their 'My Favorites' list.
+    This function should return a set of tmdbId properties for the movies that
+    the user has added to their 'My Favorites' list.  The set is read from the
+    favorites cache, and only loaded from the database when it is not cached
+    or may be out of date.
     """
-    def get_user_favorites(self, tx, user_id):
+    def get_user_favorites(self, user_id):
         if user_id == None:
-            return []
+            return set()
+
+        favorites = get_cached_favorites(user_id)
 
-        result = tx.run("""
-            MATCH (u:User {userId: $userId})-[:HAS_FAVORITE]->(m)
-            RETURN m.tmdbId AS id
-        """, userId=user_id)
+        if favorites is None:
+            favorites = cache_favorites(user_id, execute_read(self.driver, self.db_name, lambda tx: get_query("movies.user_favorites").run(
+                tx, userId=user_id
+            ).single()))
 
-        return [ record.get("id") for record in result ]
+        return favorites
@@ -1,5 +1,8 @@
 from api.data import people, pacino
 from api.exceptions.notfound import NotFoundException
+from api.transactions import execute_read
+from api.queries import get_query
+from api.pagination import get_page_parameters
 
 
 class PeopleDAO:
@@ -8,8 +11,9 @@ class PeopleDAO:
     used to interact with Neo4j.
     """
 
-    def __init__(self, driver):
+    def __init__(self, driver, db_name):
         self.driver = driver
+        self.db_name = db_name
 
     """
     This method should return a paginated list of People (actors or directors),
@@ -17,14 +21,16 @@ class PeopleDAO:
 
     Results should be ordered by the `sort` parameter and limited to the
     number passed as `limit`.  The `skip` variable should be used to skip a
-    certain number of rows.
+    certain number of rows, unless `after`, a position decoded from a cursor,
+    is passed.
     """
     # tag::all[]
-    def all(self, q, sort = 'name', order = 'ASC', limit = 6, skip = 0):
-        # TODO: Get a list of people from the database
-        # TODO: Remember to use double braces to replace the braces in the Cypher query {{ }}
+    def all(self, q, sort = 'name', order = 'ASC', limit = 6, skip = 0, after = None):
+        query = get_query("people.all", "person", sort, order, after is not None)
 
-        return people[skip:limit]
+        return execute_read(self.driver, self.db_name, lambda tx: query.run(
+            tx, q=q, **get_page_parameters(limit, skip, after)
+        ).value("person"))
 
     # end::all[]
 
@@ -1,7 +1,12 @@
-from api.data import ratings
 from api.exceptions.notfound import NotFoundException
 
 from api.data import goodfellas
+from api.transactions import execute_read, execute_write
+from api.queries import get_query
+from api.pagination import get_page_parameters
+from api.movie_cache import get_movie_cache
+from api.response_cache import purge_responses, publish_purge
+from api.user_versions import record_version
 
 
 class RatingDAO:
@@ -19,27 +24,34 @@ class RatingDAO:
     """
     # tag::add[]
     def add(self, user_id, movie_id, rating):
-        # Create function to save the rating in the database
+        # Create function to save the rating in the database, and have every
+        # worker drop its cached lists that show the movie or its ratings
         def create_rating(tx, user_id, movie_id, rating):
-            return tx.run("""
-            MATCH (u:User {userId: $user_id})
-            MATCH (m:Movie {tmdbId: $movie_id})
-            MERGE (u)-[r:RATED]->(m)
-            SET r.rating = $rating,
-                r.timestamp = timestamp()
-            RETURN m {
-                .*,
-                rating: r.rating
-            } AS movie
-            """, user_id=user_id, movie_id=movie_id, rating=rating).single()
-        
-        with self.driver.session(database=self.db_name) as session:
-            record = session.execute_write(create_rating, user_id=user_id, movie_id=movie_id, rating=rating)
+            record = get_query("ratings.add").run(tx, user_id=user_id, movie_id=movie_id, rating=rating).single()
+
+            if record is not None:
+                publish_purge(tx, [ "movie:{0}".format(movie_id) ])
+
+            return record
         
-            if record is None:
-                raise NotFoundException()
-            
-            return record["movie"]
+        record = execute_write(self.driver, self.db_name, create_rating, user_id=user_id, movie_id=movie_id, rating=rating)
+
+        if record is None:
+            raise NotFoundException()
+
+        # Drop the cached details of the rated movie
+        cache = get_movie_cache()
+
+        if cache is not None:
+            cache.invalidate(movie_id)
+
+        # Drop this worker's cached lists that show the movie or its ratings
+        purge_responses("movie:{0}".format(movie_id))
+
+        # Let the user's lists be revalidated against their new version
+        record_version(user_id, record.get("version"))
+
+        return record["movie"]
 
 
     """
@@ -48,12 +60,14 @@ class RatingDAO:
     Results should be ordered by the `sort` parameter, and in the direction specified
     in the `order` parameter.
     Results should be limited to the number passed as `limit`.
-    The `skip` variable should be used to skip a certain number of rows.
+    The `skip` variable should be used to skip a certain number of rows, unless
+    `after`, a position decoded from a cursor, is passed.
     """
     # tag::forMovie[]
-    def for_movie(self, id, sort = 'timestamp', order = 'ASC', limit = 6, skip = 0):
-        # TODO: Get ratings for a Movie
-        # TODO: Remember to escape the braces in the cypher query with double braces: {{ }}
+    def for_movie(self, id, sort = 'timestamp', order = 'ASC', limit = 6, skip = 0, after = None):
+        query = get_query("ratings.for_movie", "rating", sort, order, after is not None)
 
-        return ratings
+        return execute_read(self.driver, self.db_name, lambda tx: query.run(
+            tx, id=id, **get_page_parameters(limit, skip, after)
+        ).value("review"))
     # end::forMovie[]
@@ -0,0 +1,140 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, request, has_app_context
+
+from neo4j.exceptions import DriverError, Neo4jError
+
+from api.exceptions.deadline import DeadlineExceededException
+from api.exceptions.unavailable import ServiceUnavailableException
+from api.metrics import is_acquisition_timeout
+
+"""
+Give every request a deadline and make Neo4j respect it.
+
+A budget is looked up for the endpoint in `ROUTE_DEADLINES`, falling back to
+`ROUTE_DEADLINE`, when the request starts.  Each transaction then gets the
+time left as its timeout, so the server cancels the transaction when the
+deadline expires, and connection acquisition and retries are bounded by it
+too.  Requests that run out of time get a 504 instead of holding a worker.
+"""
+
+# Seconds allowed for endpoints that need longer than `ROUTE_DEADLINE`
+DEFAULT_ROUTE_DEADLINES = {
+    "genre.get_index": 30,
+    "genre.get_genre": 30,
+}
+
+
+"""
+Build the per-endpoint budgets from the defaults and the `ROUTE_DEADLINES`
+environment variable, a JSON object of endpoint names to seconds, for
+example `{"movies.get_movies": 5}`.
+"""
+def get_route_deadlines():
+    deadlines = dict(DEFAULT_ROUTE_DEADLINES)
+    deadlines.update(json.loads(os.getenv('ROUTE_DEADLINES') or '{}'))
+
+    return deadlines
+
+
+"""
+Get the budget in seconds for an endpoint, or None for no deadline
+"""
+def get_route_deadline(endpoint):
+    deadlines = current_app.config.get('ROUTE_DEADLINES') or {}
+
+    if endpoint in deadlines:
+        return deadlines[endpoint]
+
+    return current_app.config.get('ROUTE_DEADLINE')
+
+
+"""
+Start the deadline for the current request.  Registered as a
+`before_request` function.
+"""
+def start_deadline():
+    budget = get_route_deadline(request.endpoint)
+
+    if budget:
+        g.deadline = time.monotonic() + budget
+
+
+"""
+Get the number of seconds left before the deadline of the current request,
+or None if there is no deadline.  Raises a `DeadlineExceededException` once
+the deadline has passed.
+"""
+def get_remaining():
+    if not has_app_context() or g.get("deadline") is None:
+        return None
+
+    remaining = g.deadline - time.monotonic()
+
+    if remaining <= 0:
+        raise DeadlineExceededException("The request took too long to complete")
+
+    return remaining
+
+
+"""
+Combine a transaction timeout with the time left before the deadline
+"""
+def bound_timeout(timeout, remaining):
+    if remaining is None:
+        return timeout
+
+    if timeout is None:
+        return remaining
+
+    return min(timeout, remaining)
+
+
+"""
+Convert errors caused by running out of time into the matching HTTP errors:
+a transaction cancelled by its timeout becomes a 504, and a connection that
+could not be acquired in time a 503.
+"""
+def translate_timeout(err):
+    if "TransactionTimedOut" in (getattr(err, "code", None) or ""):
+        return DeadlineExceededException("The request took too long to complete")
+
+    if is_acquisition_timeout(err):
+        return ServiceUnavailableException("No database connection available, please try again")
+
+    return None
+
+
+"""
+Raise the HTTP error matching a timeout from the block, if it was one
+"""
+@contextmanager
+def deadline_errors():
+    try:
+        yield
+    except (Neo4jError, DriverError) as err:
+        translated = translate_timeout(err)
+
+        if translated is None:
+            raise
+
+        raise translated from err
+
+
+"""
+Options that bound how long a session may wait for a connection and keep
+retrying transactions by the time left before the deadline
+"""
+def get_session_deadline():
+    remaining = get_remaining()
+
+    if remaining is None:
+        return {}
+
+    return {
+        "connection_acquisition_timeout": remaining,
+        "max_transaction_retry_time": remaining,
+    }
@@ -0,0 +1,2 @@
+class DeadlineExceededException(Exception):
+    pass
\ No newline at end of file
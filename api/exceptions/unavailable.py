@@ -0,0 +1,2 @@
+class ServiceUnavailableException(Exception):
+    pass
\ No newline at end of file
@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, has_app_context
+
+from api.bookmarks import get_bookmarks
+from api.user_versions import get_known_version, load_version, load_version_async, record_version
+
+"""
+Cache each user's favorite movie IDs in the worker.
+
+List and detail queries no longer take the user's favorites as a parameter;
+the `favorite` flag is set on the results in Python from this cache, so the
+queries are the same for every user and the flag costs a set lookup per row.
+
+Each cached set is stored with the version of the user it was read at, see
+`api.user_versions`.  `FavoriteDAO.add` and `remove` update the cached set
+of the user along with its version, and a set is only used while its
+version matches the one this worker knows for the user.  When the worker
+does not know it, or the request carries a bookmark from the client, only
+the user's version is read, and the set is kept if it still matches.  A
+change made through another worker is therefore seen once this worker
+reloads the user's version, after at most `USER_VERSION_TTL` seconds, and
+straight away by requests that carry the bookmark of the write.
+"""
+
+
+class FavoriteCache:
+    def __init__(self, max_users=10000, ttl=30):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    """
+    Get the favorite IDs of a user, or None if they are not cached, have
+    expired or were read at a different `version`
+    """
+    def get(self, user_id, version=None):
+        with self.lock:
+            entry = self.entries.get(user_id)
+
+            if entry is None or entry[0] < time.monotonic() or (version is not None and entry[2] != version):
+                self.entries.pop(user_id, None)
+                self.misses += 1
+
+                return None
+
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+
+            return entry[1]
+
+    def __contains__(self, user_id):
+        with self.lock:
+            return user_id in self.entries
+
+    def set(self, user_id, ids, version=None):
+        with self.lock:
+            self.entries[user_id] = (time.monotonic() + self.ttl, set(ids), version)
+            self.entries.move_to_end(user_id)
+
+            while len(self.entries) > self.max_users:
+                self.entries.popitem(last=False)
+
+    """
+    Add a movie to the cached favorites of a user, if they are cached
+    """
+    def add(self, user_id, movie_id, version=None):
+        self.update(user_id, version, lambda ids: ids.add(movie_id))
+
+    """
+    Remove a movie from the cached favorites of a user, if they are cached
+    """
+    def remove(self, user_id, movie_id, version=None):
+        self.update(user_id, version, lambda ids: ids.discard(movie_id))
+
+    """
+    Apply a write made at `version` to the cached favorites of a user.  A
+    write that left the version as it was changed nothing.  The set is
+    dropped instead when it was not read at the version just before, as it
+    then misses writes made elsewhere.
+    """
+    def update(self, user_id, version, change):
+        with self.lock:
+            entry = self.entries.get(user_id)
+
+            if entry is None:
+                return
+
+            expires, ids, cached_version = entry
+
+            if version is not None and version == cached_version:
+                return
+
+            if version is not None and (cached_version is None or cached_version + 1 != version):
+                del self.entries[user_id]
+                return
+
+            change(ids)
+            self.entries[user_id] = (expires, ids, version if version is not None else cached_version)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "users": len(self.entries),
+                "max_users": self.max_users,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+"""
+Get the favorites cache of the current app, if it has one
+"""
+def get_favorite_cache():
+    if not has_app_context():
+        return None
+
+    return getattr(current_app, "favorite_cache", None)
+
+
+"""
+Get the version of a user that their cached favorites must match, if this
+worker can tell it without a query.  It cannot when it does not know the
+version, or when the request carries bookmarks from the client, as the
+write they stand for may have been made through another worker.
+"""
+def get_cached_version(user_id):
+    if g.get("neo4j_bookmarks") is None and get_bookmarks() is not None:
+        return None
+
+    return get_known_version(user_id)
+
+
+"""
+Get the cached favorite IDs of a user, or None if they have to be read from
+the database.  When the version to check them against is not known, it is
+read on its own, waiting for any bookmarks, which costs a lookup of the
+User node rather than reading all of their favorites.
+"""
+def get_cached_favorites(user_id):
+    cache = get_favorite_cache()
+
+    if cache is None or user_id not in cache:
+        return None
+
+    version = get_cached_version(user_id)
+
+    if version is None:
+        version = load_version(user_id)
+
+    return cache.get(user_id, version)
+
+
+async def get_cached_favorites_async(user_id):
+    cache = get_favorite_cache()
+
+    if cache is None or user_id not in cache:
+        return None
+
+    version = get_cached_version(user_id)
+
+    if version is None:
+        version = await load_version_async(user_id)
+
+    return cache.get(user_id, version)
+
+
+"""
+Cache the favorite IDs of a user from a `movies.user_favorites` row and
+return them as a set
+"""
+def cache_favorites(user_id, row):
+    favorites = set(row["ids"]) if row is not None else set()
+    version = row["version"] if row is not None else 0
+
+    record_version(user_id, version)
+
+    cache = get_favorite_cache()
+
+    if cache is not None:
+        cache.set(user_id, favorites, version)
+
+    return favorites
+
+
+"""
+Set the `favorite` flag on each movie from a set of favorite IDs
+"""
+def flag_favorites(movies, favorites):
+    for movie in movies:
+        movie["favorite"] = movie.get("tmdbId") in favorites
+
+    return movies
@@ -0,0 +1,63 @@
+from flask import request
+
+from api.exceptions.badrequest import BadRequestException
+
+"""
+Sparse fieldsets for movie payloads.
+
+List views usually only show a movie's title and poster, but `m { .* }`
+sends every property, including the plot, languages and budgets.  With
+`?fields=title,poster` the movie queries return just those properties, so
+less is sent over Bolt, hydrated by the driver and encoded as JSON.
+
+Cypher map projections cannot take their keys from a parameter, so the
+queries return the values of `$fields` as a list, in the same order, and
+`to_map` zips them back into a map.
+"""
+
+# Movie properties that can be requested with `fields=`
+MOVIE_FIELDS = (
+    "tmdbId", "movieId", "imdbId", "title", "plot", "poster", "url",
+    "released", "year", "runtime", "imdbRating", "imdbVotes",
+    "languages", "countries", "budget", "revenue",
+)
+
+
+"""
+Get the movie properties requested with `fields=`, or None to return every
+property.  The `tmdbId`, which the favorite flag is set from, and the sort
+key, which the next cursor is built from, are always included.  Raises a
+`BadRequestException` for properties that are not in `MOVIE_FIELDS`.
+"""
+def get_fields(sort=None):
+    value = request.args.get("fields")
+
+    if not value:
+        return None
+
+    fields = []
+
+    for field in [ "tmdbId" ] + value.split(",") + ([ sort ] if sort else []):
+        field = field.strip()
+
+        if field and field not in fields:
+            fields.append(field)
+
+    unknown = [ field for field in fields if field not in MOVIE_FIELDS ]
+
+    if unknown:
+        raise BadRequestException("Invalid fields {0}, expected any of {1}".format(
+            ", ".join(unknown), ", ".join(MOVIE_FIELDS)
+        ))
+
+    return fields
+
+
+"""
+Turn a movie returned by a query run with `fields` into a map
+"""
+def to_map(value, fields):
+    if fields is None:
+        return value
+
+    return dict(zip(fields, value))
@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+
+from neo4j import WRITE_ACCESS
+
+from api.neo4j import get_db_name
+from api.queries import get_query
+from api.http_cache import get_etag_registry
+from api.response_cache import purge_responses, publish_purge
+
+"""
+Materialized genre summaries.
+
+The genre list shows each genre with its number of movies and the poster
+of its highest rated movie.  Working these out means counting and sorting
+the movies of every genre, although the results only change when movies
+are loaded.  `refresh_summaries` stores them on the Genre nodes as
+`movieCount` and `poster`, and `GenreDAO` reads them back, keeping the list
+in a per-worker cache for `ttl` seconds.  `GenreDAO.find` looks a genre up
+in the same list, so neither reads more than the Genre nodes.
+
+Summaries are refreshed with `flask genres refresh` after movies have been
+loaded, on startup when `NEO4J_REFRESH_GENRES` is set, and every
+`GENRE_REFRESH_INTERVAL` seconds when it is set.  Genres that have not been
+refreshed, such as genres added since, are summarised from their movies on
+every read.  A refresh clears the caches of the worker that runs it only,
+so other workers see it once their cached list expires.
+"""
+
+log = logging.getLogger(__name__)
+
+
+class GenreSummaryCache:
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    """
+    Get the genre summaries of a database, by name, or None if they are not
+    cached or have expired
+    """
+    def get(self, database):
+        with self.lock:
+            entry = self.entries.get(database)
+
+            if entry is None or entry[0] < time.monotonic():
+                self.entries.pop(database, None)
+                self.misses += 1
+
+                return None
+
+            self.hits += 1
+
+            return entry[1]
+
+    def set(self, database, summaries):
+        with self.lock:
+            self.entries[database] = (time.monotonic() + self.ttl, summaries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "databases": len(self.entries),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+"""
+Get the genre summary cache of the current app, if it has one
+"""
+def get_genre_cache():
+    if not has_app_context():
+        return None
+
+    return getattr(current_app, "genre_cache", None)
+
+
+"""
+Store the movie count and poster of each genre, or only of the genres in
+`names`, on the Genre nodes, and drop the responses of this worker that
+show them.  Returns the number of genres refreshed.
+"""
+def refresh_summaries(driver, database, names=None):
+    started = time.monotonic()
+
+    def refresh(tx):
+        refreshed = get_query("genres.refresh").run(tx, names=names).single()["names"]
+
+        if refreshed:
+            publish_purge(tx, [ "genre:{0}".format(name) for name in refreshed ])
+
+        return refreshed
+
+    with driver.session(database=database, default_access_mode=WRITE_ACCESS) as session:
+        refreshed = session.execute_write(refresh)
+
+    log.info("Refreshed %s genre summaries in %.3fs", len(refreshed), time.monotonic() - started)
+
+    cache = get_genre_cache()
+
+    if cache is not None:
+        cache.clear()
+
+    etags = get_etag_registry()
+
+    if etags is not None:
+        etags.invalidate("/api/genres")
+
+    if refreshed:
+        purge_responses(*[ "genre:{0}".format(name) for name in refreshed ])
+
+    return len(refreshed)
+
+
+"""
+Startup task that refreshes the genre summaries, see `init_driver`
+"""
+def refresh_genre_summaries(driver):
+    refresh_summaries(driver, get_db_name())
+
+
+"""
+Refresh the genre summaries every `interval` seconds on a background thread
+until the worker stops.  A refresh that fails is logged and tried again at
+the next interval.
+"""
+def start_genre_refresh(app, interval):
+    def refresh_periodically():
+        while not app.readiness.stopped.wait(interval):
+            try:
+                with app.app_context():
+                    refresh_summaries(app.driver, get_db_name())
+            except Exception as err:
+                log.warning("Failed to refresh genre summaries: %s", err)
+
+    thread = threading.Thread(target=refresh_periodically, name="genre-refresh", daemon=True)
+    thread.start()
+
+    return thread
+
+
+genres_cli = AppGroup("genres", help="Manage the materialized genre summaries.")
+
+
+@genres_cli.command("refresh")
+@click.argument("names", nargs=-1)
+def refresh_command(names):
+    count = refresh_summaries(current_app.driver, get_db_name(), list(names) or None)
+
+    click.echo("Refreshed {0} genre summaries".format(count))
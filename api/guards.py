@@ -0,0 +1,231 @@
+import threading
+from collections import defaultdict, namedtuple
+
+from flask import current_app, request
+from werkzeug.datastructures import ImmutableMultiDict
+
+from neo4j import READ_ACCESS
+
+from api.exceptions.badrequest import BadRequestException
+from api.neo4j import get_db_name
+from api.plans import get_sample_parameters, walk_plan
+from api.queries import get_query, validate_sort
+
+"""
+Request guards for pagination and sort parameters.
+
+`limit` and `skip` are passed to Cypher as they are, so a request for a
+million rows would make the database produce them and the worker hold them
+all in memory.  Every request goes through `guard_request` before it
+reaches a route:
+
+* `limit`, `skip` and the nested limits must be whole numbers that are
+  not negative.
+* A `limit` above `MAX_LIMIT` is clamped to it, as are the
+  `actors_limit` and `directors_limit` of a movie.
+* A `skip` above `MAX_SKIP` is rejected; deep pages should use a cursor.
+* The `sort` and `order` of a list endpoint are checked against the sort
+  keys registered for it.
+* A multi-get may ask for at most `MAX_BATCH_SIZE` movies.
+* With `QUERY_COST_LIMIT` set, list requests whose query is estimated by
+  `EXPLAIN` to touch more rows than that are rejected.
+
+Rejected and clamped requests are counted in `GuardMetrics`.
+"""
+
+ListEndpoint = namedtuple("ListEndpoint", ["query", "entity", "sort"])
+
+# The registered query, sort entity and default sort key behind each list endpoint
+LIST_ENDPOINTS = {
+    "movies.get_movies": ListEndpoint("movies.all", "movie", "title"),
+    "movies.get_movie_ratings": ListEndpoint("ratings.for_movie", "rating", "timestamp"),
+    "genre.get_genre_movies": ListEndpoint("movies.by_genre", "movie", "title"),
+    "people.get_index": ListEndpoint("people.all", "person", "name"),
+    "people.get_movies_acted_in": ListEndpoint("movies.for_actor", "movie", "title"),
+    "people.get_movies_directed": ListEndpoint("movies.for_director", "movie", "title"),
+    "account.get_favorites": ListEndpoint("favorites.all", "movie", "title"),
+}
+
+# Parameters that limit the number of rows returned
+LIMITS = ("limit", "actors_limit", "directors_limit")
+
+# Number of cost estimates kept before the cache is cleared
+ESTIMATE_CACHE_SIZE = 1024
+
+
+class GuardMetrics:
+    """
+    Count the requests rejected by the guards, by reason, and the parameters
+    that were clamped, along with the cost estimates made
+    """
+    def __init__(self):
+        self.rejected = defaultdict(int)
+        self.clamped = defaultdict(int)
+        self.estimates = 0
+        self.lock = threading.Lock()
+
+    def reject(self, reason):
+        with self.lock:
+            self.rejected[reason] += 1
+
+    def clamp(self, parameter):
+        with self.lock:
+            self.clamped[parameter] += 1
+
+    def estimate(self):
+        with self.lock:
+            self.estimates += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "rejected": dict(self.rejected),
+                "clamped": dict(self.clamped),
+                "estimates": self.estimates,
+            }
+
+
+"""
+Count a rejected request and raise a `BadRequestException` for it
+"""
+def reject(reason, message):
+    current_app.guard_metrics.reject(reason)
+
+    raise BadRequestException(message)
+
+
+"""
+Read a whole number that is not negative from the query string, or None
+when it was not passed
+"""
+def get_count(name):
+    value = request.args.get(name)
+
+    if value is None:
+        return None
+
+    try:
+        count = int(value)
+    except ValueError:
+        count = -1
+
+    if count < 0:
+        reject(name, "'{0}' must be a whole number that is not negative".format(name))
+
+    return count
+
+
+"""
+Replace the value of a query string parameter for the rest of the request
+"""
+def replace_arg(name, value):
+    args = request.args.copy()
+    args[name] = str(value)
+
+    request.args = ImmutableMultiDict(args)
+
+
+"""
+Get the IDs requested with `?ids=a,b,c`, or the `ids` list in a JSON body,
+without duplicates and in the order they were requested.  Raises a
+`BadRequestException` when there are none or more than `MAX_BATCH_SIZE`.
+"""
+def get_requested_ids():
+    if "ids" in request.args:
+        ids = request.args.get("ids").split(",")
+    else:
+        ids = (request.get_json(silent=True) or {}).get("ids")
+
+    if not isinstance(ids, list) or not all(isinstance(id, str) for id in ids):
+        reject("ids", "'ids' must be a list of IDs")
+
+    ids = list(dict.fromkeys(id.strip() for id in ids if id.strip()))
+    max_size = current_app.config.get("MAX_BATCH_SIZE")
+
+    if not ids:
+        reject("ids", "'ids' must be a list of IDs")
+
+    if max_size is not None and len(ids) > max_size:
+        reject("ids", "At most {0} IDs can be requested at once".format(max_size))
+
+    return ids
+
+
+"""
+Estimate the cost of a query as the largest number of rows that `EXPLAIN`
+expects any operator in its plan to produce.  Estimates only depend on the
+query text and the page, so they are cached per variant, `limit` and `skip`.
+"""
+def estimate_rows(driver, database, query, limit, skip):
+    cache = current_app.guard_estimates
+    key = (query.label, limit, skip)
+
+    if key in cache:
+        return cache[key]
+
+    parameters = get_sample_parameters(query)
+    parameters.update({ name: value for name, value in (("limit", limit), ("skip", skip)) if name in query.params })
+
+    with driver.session(database=database, default_access_mode=READ_ACCESS) as session:
+        summary = session.run("EXPLAIN " + query.text, parameters).consume()
+
+    current_app.guard_metrics.estimate()
+
+    rows = max(operator.get("args", {}).get("EstimatedRows", 0) for operator in walk_plan(summary.plan))
+
+    if len(cache) >= ESTIMATE_CACHE_SIZE:
+        cache.clear()
+
+    cache[key] = rows
+
+    return rows
+
+
+"""
+Check the pagination and sort parameters of the current request, see the
+module docstring.  Registered with `before_request` for every blueprint.
+"""
+def guard_request():
+    max_limit = current_app.config.get("MAX_LIMIT")
+    max_skip = current_app.config.get("MAX_SKIP")
+
+    for name in LIMITS:
+        count = get_count(name)
+
+        if count is not None and max_limit is not None and count > max_limit:
+            current_app.guard_metrics.clamp(name)
+            replace_arg(name, max_limit)
+
+    limit = get_count("limit")
+    skip = get_count("skip")
+
+    if skip is not None and max_skip is not None and skip > max_skip:
+        reject("skip", "'skip' must be at most {0}, use the cursor to page further".format(max_skip))
+
+    endpoint = LIST_ENDPOINTS.get(request.endpoint)
+
+    if endpoint is None:
+        return
+
+    try:
+        sort, order = validate_sort(endpoint.entity,
+            request.args.get("sort", endpoint.sort), request.args.get("order", "ASC"))
+    except BadRequestException:
+        current_app.guard_metrics.reject("sort")
+        raise
+
+    cost_limit = current_app.config.get("QUERY_COST_LIMIT")
+
+    # Requests that continue from a cursor seek straight to their page, and
+    # multi-gets look movies up by their key
+    if cost_limit is None or request.args.get("cursor") or "ids" in request.args:
+        return
+
+    query = get_query(endpoint.query, endpoint.entity, sort, order)
+    rows = estimate_rows(current_app.driver, get_db_name(), query,
+        limit if limit is not None else 6, skip if skip is not None else 0)
+
+    if rows > cost_limit:
+        reject("cost", "This request is estimated to read {0:.0f} rows, more than the limit of {1}".format(
+            rows, cost_limit
+        ))
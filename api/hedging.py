@@ -0,0 +1,336 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait, FIRST_COMPLETED
+
+from flask import current_app, has_app_context
+
+"""
+Hedged reads for idempotent DAO methods.
+
+When hedging is enabled and a read tagged with `@hedged` has not returned
+after the configured percentile of that method's recent latencies, the same
+read is started again on a new session with its own connection.  The driver
+picks the reader for that connection as for any other read, so it may or
+may not be a different cluster member than the slow one; the hedge still
+helps when the first attempt is held up by its connection or by a slow
+query on a busy server.  Whichever attempt answers first wins and the other
+one is cancelled.
+
+The hedge counts against the concurrency cap of the read's workload for as
+long as either attempt runs, and is not started when the workload has no
+free slot.
+"""
+
+current_hedge = contextvars.ContextVar("neo4j_hedge", default=None)
+
+# Number of recent latencies kept per method
+LATENCY_WINDOW = 1000
+
+
+class HedgeCancelled(Exception):
+    pass
+
+
+"""
+Mark a read-only, idempotent DAO method as safe to hedge
+"""
+def hedged(method):
+    name = method.__qualname__
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def wrapped(*args, **kwargs):
+            token = current_hedge.set(name)
+
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                current_hedge.reset(token)
+    else:
+        @functools.wraps(method)
+        def wrapped(*args, **kwargs):
+            token = current_hedge.set(name)
+
+            try:
+                return method(*args, **kwargs)
+            finally:
+                current_hedge.reset(token)
+
+    return wrapped
+
+
+class LatencyTracker:
+    """
+    Keep a window of recent latencies and report a percentile of them.  The
+    sorted window is cached and only rebuilt every `refresh` observations.
+    """
+    def __init__(self, window=LATENCY_WINDOW, refresh=50):
+        self.samples = deque(maxlen=window)
+        self.refresh = refresh
+        self.sorted = []
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            self.samples.append(value)
+            self.pending += 1
+
+    def percentile(self, percentile):
+        with self.lock:
+            if self.pending >= self.refresh or len(self.sorted) == 0:
+                self.sorted = sorted(self.samples)
+                self.pending = 0
+
+            if not self.sorted:
+                return None
+
+            index = max(0, math.ceil(percentile / 100 * len(self.sorted)) - 1)
+
+            return self.sorted[index]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class Hedging:
+    def __init__(self, enabled=False, percentile=95, delay=0.05, min_samples=100, threads=32):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = delay
+        self.min_samples = min_samples
+        self.threads = threads
+        self.executor = None
+        self.latencies = {}
+        self.fired = 0
+        self.won = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        # Created on first use so that no threads exist before a prefork
+        # server forks its workers
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="neo4j-hedge")
+
+            return self.executor
+
+    def get_tracker(self, name):
+        with self.lock:
+            return self.latencies.setdefault(name, LatencyTracker())
+
+    """
+    How long to wait for the first attempt before hedging.  The configured
+    delay is used until enough latencies have been seen, and is also the
+    lower bound.
+    """
+    def delay(self, name):
+        tracker = self.get_tracker(name)
+
+        if len(tracker) < self.min_samples:
+            return self.min_delay
+
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def record(self, name, started, hedge_won):
+        self.get_tracker(name).observe(time.perf_counter() - started)
+
+        if hedge_won:
+            with self.lock:
+                self.won += 1
+
+    def hedge_fired(self):
+        with self.lock:
+            self.fired += 1
+
+    def hedge_skipped(self):
+        with self.lock:
+            self.skipped += 1
+
+    """
+    Run `attempt(cancelled)` and hedge it with a second attempt if it is
+    slower than the delay for `name`.  `cancelled` is an Event that is set
+    when the attempt has lost and should stop.
+
+    A sync transaction cannot be interrupted from another thread, so the
+    losing attempt stops at its next check of `cancelled` and its result is
+    discarded; its query is bounded by the transaction timeout.
+
+    The caller holds one slot of `workload`, if given, for the first
+    attempt.  The hedge takes a second slot, which is only released once
+    both attempts have finished, so a losing attempt that is still running
+    after the winner has returned stays counted.  When no slot is free the
+    read is not hedged.
+    """
+    def run(self, name, attempt, workload=None):
+        executor = self.get_executor()
+        started = time.perf_counter()
+
+        def submit():
+            cancelled = threading.Event()
+            context = contextvars.copy_context()
+
+            return executor.submit(context.run, attempt, cancelled), cancelled
+
+        first, first_cancelled = submit()
+
+        try:
+            output = first.result(timeout=self.delay(name))
+        except FutureTimeoutError:
+            pass
+        else:
+            self.record(name, started, False)
+
+            return output
+
+        if workload is not None and not workload.try_enter():
+            self.hedge_skipped()
+
+            output = first.result()
+            self.record(name, started, False)
+
+            return output
+
+        self.hedge_fired()
+
+        second, second_cancelled = submit()
+
+        if workload is not None:
+            release_when_done(workload, first, second)
+
+        attempts = { first: first_cancelled, second: second_cancelled }
+        pending = set(attempts)
+        error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        attempts[loser].set()
+
+                    self.record(name, started, future is second)
+
+                    return future.result()
+
+                error = future.exception()
+
+        raise error
+
+    """
+    Async version of `run`.  `attempt()` returns a coroutine; the losing
+    attempt is cancelled, which closes its connection and stops the query.
+    """
+    async def run_async(self, name, attempt):
+        started = time.perf_counter()
+        first = asyncio.ensure_future(attempt())
+
+        done, _ = await asyncio.wait({ first }, timeout=self.delay(name))
+
+        if done:
+            self.record(name, started, False)
+
+            return first.result()
+
+        self.hedge_fired()
+
+        second = asyncio.ensure_future(attempt())
+        pending = { first, second }
+        error = None
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+
+                    self.record(name, started, task is second)
+
+                    return task.result()
+
+                error = task.exception()
+
+        raise error
+
+    def snapshot(self):
+        with self.lock:
+            names = list(self.latencies)
+            fired = self.fired
+            won = self.won
+            skipped = self.skipped
+
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "fired": fired,
+            "won": won,
+            "skipped": skipped,
+            "delays": { name: self.delay(name) for name in names },
+        }
+
+
+"""
+Release a slot of `workload` once every one of `futures` has finished
+"""
+def release_when_done(workload, *futures):
+    remaining = [ len(futures) ]
+    lock = threading.Lock()
+
+    def done(future):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+
+        if last:
+            workload.exit()
+
+    for future in futures:
+        future.add_done_callback(done)
+
+
+"""
+Wrap a unit of work so that a losing hedge attempt stops before running its
+query, or rolls back instead of returning once its query has finished.
+"""
+def cancellable(work, cancelled):
+    @functools.wraps(work)
+    def run(tx, *args, **kwargs):
+        if cancelled.is_set():
+            raise HedgeCancelled()
+
+        output = work(tx, *args, **kwargs)
+
+        if cancelled.is_set():
+            raise HedgeCancelled()
+
+        return output
+
+    return run
+
+
+"""
+Get the hedging settings for the DAO method currently running, or None if
+the method is not tagged or hedging is disabled.
+"""
+def get_hedge():
+    name = current_hedge.get()
+
+    if name is None or not has_app_context():
+        return None
+
+    hedging = getattr(current_app, "hedging", None)
+
+    if hedging is None or not hedging.enabled:
+        return None
+
+    return name, hedging
@@ -0,0 +1,175 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context, request
+
+"""
+HTTP caching for the anonymous catalog endpoints.
+
+Genres, movie details, people and similar movies and people are the same
+for every anonymous caller, so their responses carry a strong `ETag`, the
+hash of the body, and a `Cache-Control` header that lets browsers and shared
+caches reuse them, and serve them stale while they revalidate.
+
+Each worker remembers the last `ETag` it sent for each URL for `ttl`
+seconds.  A request with a matching `If-None-Match` is answered with a
+`304 Not Modified` before the route runs, so revalidating costs no query.
+Otherwise the route runs and the response is still turned into a 304 when
+the hash of its body matches.
+
+Responses to signed in users include the `favorite` flag, so they are not
+marked as cacheable and `Vary: Authorization` keeps shared caches from
+serving an anonymous response to them.
+"""
+
+# The endpoints whose responses are the same for every anonymous caller
+CATALOG_ENDPOINTS = (
+    "genre.get_index",
+    "genre.get_genre",
+    "movies.get_movie_details",
+    "movies.get_similar_movies",
+    "people.get_person",
+    "people.get_similar_people",
+)
+
+
+class ETagRegistry:
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    """
+    Get the last ETag sent for a URL, or None if it is not known or has
+    expired
+    """
+    def get(self, url):
+        with self.lock:
+            entry = self.entries.get(url)
+
+            if entry is None or entry[0] < time.monotonic():
+                self.entries.pop(url, None)
+                return None
+
+            self.entries.move_to_end(url)
+
+            return entry[1]
+
+    def set(self, url, etag):
+        with self.lock:
+            self.entries[url] = (time.monotonic() + self.ttl, etag)
+            self.entries.move_to_end(url)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    """
+    Forget the ETags of every URL starting with `prefix`
+    """
+    def invalidate(self, prefix=""):
+        with self.lock:
+            for url in [ url for url in self.entries if url.startswith(prefix) ]:
+                del self.entries[url]
+
+    """
+    Count a conditional request, by whether it was answered before the
+    route ran
+    """
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "urls": len(self.entries),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+"""
+Get the ETag registry of the current app, if it has one
+"""
+def get_etag_registry():
+    if not has_app_context():
+        return None
+
+    return getattr(current_app, "etags", None)
+
+
+"""
+Check whether the current request is an anonymous GET of a catalog endpoint
+"""
+def is_catalog_request():
+    return request.method in ("GET", "HEAD") \
+        and request.endpoint in CATALOG_ENDPOINTS \
+        and "Authorization" not in request.headers
+
+
+def get_cache_control():
+    return "public, max-age={0}, stale-while-revalidate={1}".format(
+        current_app.config.get("CATALOG_MAX_AGE"),
+        current_app.config.get("CATALOG_STALE_WHILE_REVALIDATE"),
+    )
+
+
+"""
+Answer a conditional request for a catalog endpoint with a 304 when the
+worker knows its current ETag.  Registered with `before_request`.
+"""
+def check_not_modified():
+    if not is_catalog_request() or not request.if_none_match:
+        return None
+
+    registry = get_etag_registry()
+    etag = registry.get(request.full_path) if registry is not None else None
+
+    if registry is not None:
+        registry.record(etag is not None and request.if_none_match.contains(etag))
+
+    if etag is None or not request.if_none_match.contains(etag):
+        return None
+
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = get_cache_control()
+    response.vary.add("Authorization")
+
+    return response
+
+
+"""
+Add an ETag and caching headers to successful catalog responses, and turn
+them into a 304 when the client already has the same body.  Registered
+with `after_request`.
+"""
+def add_cache_headers(response):
+    if not is_catalog_request():
+        return response
+
+    response.vary.add("Authorization")
+
+    if response.status_code != 200 or response.direct_passthrough:
+        return response
+
+    etag = hashlib.sha256(response.get_data()).hexdigest()[:32]
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = get_cache_control()
+
+    registry = get_etag_registry()
+
+    if registry is not None:
+        registry.set(request.full_path, etag)
+
+    return response.make_conditional(request)
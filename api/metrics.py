@@ -0,0 +1,164 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from neo4j import READ_ACCESS
+from neo4j.exceptions import ClientError
+
+try:
+    from neo4j.exceptions import ConnectionAcquisitionTimeoutError
+except ImportError:
+    # Older drivers raise a ClientError that did not come from the server
+    ConnectionAcquisitionTimeoutError = None
+
+"""
+Lightweight in-process metrics used to expose driver and application
+statistics through the status routes.  Everything is kept in memory per
+worker process, so each gunicorn worker reports its own numbers.
+"""
+
+# Upper bounds (in seconds) of the connection acquisition wait buckets
+ACQUISITION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30, 60)
+
+
+"""
+Check whether an error was raised because no connection could be acquired
+from the pool in time
+"""
+def is_acquisition_timeout(err):
+    if ConnectionAcquisitionTimeoutError is not None:
+        return isinstance(err, ConnectionAcquisitionTimeoutError)
+
+    return isinstance(err, ClientError) and err.code is None
+
+
+class Histogram:
+    """
+    A fixed-bucket histogram.  Each observation is counted against the first
+    bucket whose upper bound is greater than or equal to the value, values
+    above the last bound are counted as `+Inf`.
+    """
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.total += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self.lock:
+            buckets = { str(bound): count for bound, count in zip(self.buckets, self.counts) }
+            buckets["+Inf"] = self.counts[-1]
+
+            return {
+                "count": self.total,
+                "sum": self.sum,
+                "buckets": buckets,
+            }
+
+
+class PoolMetrics:
+    """
+    Collect statistics about the connection pool of a Neo4j Driver.
+
+    The driver does not publish pool statistics, so `instrument` wraps the
+    private `acquire` method of the driver's pool, when the driver has one, to time each connection checkout
+    and count acquisition timeouts.  Every transaction checks out exactly one
+    connection, so the checkouts are also counted per cluster member and
+    access mode to show how reads and writes are spread.  The number of
+    connections in use and idle is read from the pool when a snapshot is taken.
+    """
+    def __init__(self):
+        self.driver = None
+        self.acquisition_wait = Histogram(ACQUISITION_BUCKETS)
+        self.acquired = 0
+        self.timeouts = 0
+        self.members = defaultdict(lambda: { "read": 0, "write": 0 })
+        self.instrumented = False
+        self.lock = threading.Lock()
+
+    def instrument(self, driver):
+        self.driver = driver
+        pool = getattr(driver, "_pool", None)
+        acquire = getattr(pool, "acquire", None)
+
+        # Drivers that keep their pool elsewhere are left as they are, and
+        # only the counts that can be read without it are reported
+        if not callable(acquire):
+            return driver
+
+        def timed_acquire(*args, **kwargs):
+            access_mode = kwargs.get("access_mode", args[0] if args else None)
+            start = time.perf_counter()
+
+            try:
+                connection = acquire(*args, **kwargs)
+            except Exception as err:
+                if is_acquisition_timeout(err):
+                    with self.lock:
+                        self.timeouts += 1
+                raise
+            finally:
+                self.acquisition_wait.observe(time.perf_counter() - start)
+
+            address = str(getattr(connection, "unresolved_address", None))
+
+            with self.lock:
+                self.acquired += 1
+                self.members[address]["read" if access_mode == READ_ACCESS else "write"] += 1
+
+            return connection
+
+        try:
+            pool.acquire = timed_acquire
+        except AttributeError:
+            return driver
+
+        self.instrumented = True
+
+        return driver
+
+    def snapshot(self):
+        in_use = 0
+        idle = 0
+        addresses = {}
+
+        pool = getattr(self.driver, "_pool", None)
+        connections = getattr(pool, "connections", None)
+
+        if not isinstance(connections, dict):
+            connections = {}
+
+        for address, members in list(connections.items()):
+            members = list(members)
+            busy = sum(1 for connection in members if getattr(connection, "in_use", False))
+
+            addresses[str(address)] = {
+                "in_use": busy,
+                "idle": len(members) - busy,
+            }
+
+            in_use += busy
+            idle += len(members) - busy
+
+        pool_config = getattr(pool, "pool_config", None)
+
+        with self.lock:
+            return {
+                "instrumented": self.instrumented,
+                "max_size": getattr(pool_config, "max_connection_pool_size", None),
+                "in_use": in_use,
+                "idle": idle,
+                "addresses": addresses,
+                "acquired": self.acquired,
+                "timeouts": self.timeouts,
+                "members": { address: dict(counts) for address, counts in self.members.items() },
+                "acquisition_wait": self.acquisition_wait.snapshot(),
+            }
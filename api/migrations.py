@@ -0,0 +1,178 @@
+import logging
+import time
+from collections import namedtuple
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from neo4j import WRITE_ACCESS
+
+from api.neo4j import get_db_name
+
+"""
+Versioned schema migrations.
+
+Each migration is a numbered list of schema statements that create the
+constraints and indexes the DAO queries rely on.  Applied migrations are
+recorded as `(:SchemaMigration)` nodes, so each one runs once per database.
+Statements use `IF NOT EXISTS`, so running a migration again, or from two
+workers at once, is harmless.
+
+Migrations are applied with `flask schema migrate`, or on startup when
+`NEO4J_MIGRATE` is set.
+"""
+
+log = logging.getLogger(__name__)
+
+Migration = namedtuple("Migration", ["version", "description", "statements"])
+
+MIGRATIONS = [
+    Migration(1, "Track applied migrations", [
+        "CREATE CONSTRAINT schema_migration_version IF NOT EXISTS FOR (m:SchemaMigration) REQUIRE m.version IS UNIQUE",
+    ]),
+    Migration(2, "Unique lookup keys", [
+        "CREATE CONSTRAINT movie_tmdb_id IF NOT EXISTS FOR (m:Movie) REQUIRE m.tmdbId IS UNIQUE",
+        "CREATE CONSTRAINT user_user_id IF NOT EXISTS FOR (u:User) REQUIRE u.userId IS UNIQUE",
+        "CREATE CONSTRAINT user_email IF NOT EXISTS FOR (u:User) REQUIRE u.email IS UNIQUE",
+        "CREATE CONSTRAINT genre_name IF NOT EXISTS FOR (g:Genre) REQUIRE g.name IS UNIQUE",
+        "CREATE CONSTRAINT person_tmdb_id IF NOT EXISTS FOR (p:Person) REQUIRE p.tmdbId IS UNIQUE",
+    ]),
+    Migration(3, "Range indexes for sorting movies", [
+        "CREATE INDEX movie_title IF NOT EXISTS FOR (m:Movie) ON (m.title)",
+        "CREATE INDEX movie_imdb_rating IF NOT EXISTS FOR (m:Movie) ON (m.imdbRating)",
+        "CREATE INDEX movie_released IF NOT EXISTS FOR (m:Movie) ON (m.released)",
+        "CREATE INDEX movie_year IF NOT EXISTS FOR (m:Movie) ON (m.year)",
+    ]),
+    Migration(4, "Relationship property indexes", [
+        "CREATE INDEX rated_timestamp IF NOT EXISTS FOR ()-[r:RATED]-() ON (r.timestamp)",
+        "CREATE INDEX has_favorite_created_at IF NOT EXISTS FOR ()-[r:HAS_FAVORITE]-() ON (r.createdAt)",
+    ]),
+    Migration(5, "Shared response cache purges", [
+        "CREATE CONSTRAINT cache_generation_name IF NOT EXISTS FOR (c:CacheGeneration) REQUIRE c.name IS UNIQUE",
+        "CREATE INDEX cache_purge_generation IF NOT EXISTS FOR (p:CachePurge) ON (p.generation)",
+    ]),
+]
+
+
+"""
+Get the versions of the migrations applied to the database, mapped to when
+they were applied
+"""
+def get_applied(driver, database):
+    with driver.session(database=database, default_access_mode=WRITE_ACCESS) as session:
+        result = session.run("""
+            MATCH (m:SchemaMigration)
+            RETURN m.version AS version, toString(m.appliedAt) AS appliedAt
+        """)
+
+        return { row["version"]: row["appliedAt"] for row in result }
+
+
+"""
+Apply the migrations that have not been applied yet, in order, up to and
+including version `target`.  Schema statements cannot share a transaction
+with writes, so each statement runs in a transaction of its own and the
+migration is recorded once they have all succeeded.
+
+Returns the versions that were applied.
+"""
+def migrate(driver, database, target=None):
+    applied = get_applied(driver, database)
+    versions = []
+
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+
+        if target is not None and migration.version > target:
+            break
+
+        started = time.monotonic()
+
+        with driver.session(database=database, default_access_mode=WRITE_ACCESS) as session:
+            for statement in migration.statements:
+                session.run(statement).consume()
+
+            session.run("""
+                MERGE (m:SchemaMigration {version: $version})
+                SET m.description = $description,
+                    m.appliedAt = datetime()
+            """, version=migration.version, description=migration.description).consume()
+
+        log.info("Applied schema migration %s (%s) in %.3fs",
+            migration.version, migration.description, time.monotonic() - started)
+
+        versions.append(migration.version)
+
+    return versions
+
+
+"""
+Get the state and population progress of every index in the database
+"""
+def get_index_progress(driver, database):
+    with driver.session(database=database, default_access_mode=WRITE_ACCESS) as session:
+        result = session.run("""
+            SHOW INDEXES
+            YIELD name, type, entityType, labelsOrTypes, properties, state, populationPercent
+            RETURN *
+            ORDER BY name
+        """)
+
+        return result.data()
+
+
+"""
+Wait up to `timeout` seconds for all indexes to come online
+"""
+def await_indexes(driver, database, timeout=300):
+    with driver.session(database=database, default_access_mode=WRITE_ACCESS) as session:
+        session.run("CALL db.awaitIndexes($timeout)", timeout=timeout).consume()
+
+
+"""
+Startup task that applies pending migrations, see `init_driver`
+"""
+def run_migrations(driver):
+    migrate(driver, get_db_name())
+
+
+schema_cli = AppGroup("schema", help="Manage the Neo4j schema.")
+
+
+@schema_cli.command("migrate")
+@click.option("--target", type=int, default=None, help="Stop after this migration version.")
+@click.option("--wait/--no-wait", default=False, help="Wait for new indexes to finish populating.")
+def migrate_command(target, wait):
+    driver = current_app.driver
+    database = get_db_name()
+    versions = migrate(driver, database, target)
+
+    if versions:
+        click.echo("Applied migrations: {0}".format(", ".join(str(version) for version in versions)))
+    else:
+        click.echo("Schema is up to date")
+
+    if wait:
+        await_indexes(driver, database)
+        click.echo("All indexes are online")
+
+
+@schema_cli.command("status")
+def status_command():
+    driver = current_app.driver
+    database = get_db_name()
+    applied = get_applied(driver, database)
+
+    for migration in MIGRATIONS:
+        click.echo("{0:>3} {1:<40} {2}".format(
+            migration.version, migration.description, applied.get(migration.version) or "pending"
+        ))
+
+    click.echo("")
+
+    for index in get_index_progress(driver, database):
+        click.echo("{0:<40} {1:<8} {2:>6.1f}%".format(
+            index["name"], index["state"], index["populationPercent"] or 0
+        ))
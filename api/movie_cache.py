@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+
+"""
+Cache movie details in the worker.
+
+The details of a movie, with its actors, directors and genres, are the same
+for every user apart from the `favorite` flag, which is set from the
+favorites cache when the response is built.  `MovieDAO.find_by_id` keeps
+the full document of each movie it loads here, keyed by `tmdbId`, so
+details of popular movies are served without a database round trip.
+`fields`, `actors_limit` and `directors_limit` are applied to a copy of the
+cached document by `shape_movie`.
+
+Entries are dropped when a rating is saved for the movie, and otherwise
+expire after `ttl` seconds, which bounds how long a change made elsewhere,
+such as a movie being reloaded, takes to show up.
+"""
+
+
+class MovieCache:
+    def __init__(self, max_entries=1000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    """
+    Get the cached details of a movie, or None if it is not cached or has
+    expired
+    """
+    def get(self, movie_id):
+        with self.lock:
+            entry = self.entries.get(movie_id)
+
+            if entry is None or entry[0] < time.monotonic():
+                self.entries.pop(movie_id, None)
+                self.misses += 1
+
+                return None
+
+            self.entries.move_to_end(movie_id)
+            self.hits += 1
+
+            return entry[1]
+
+    def set(self, movie_id, movie):
+        with self.lock:
+            self.entries[movie_id] = (time.monotonic() + self.ttl, movie)
+            self.entries.move_to_end(movie_id)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    """
+    Drop the cached details of a movie after it has changed
+    """
+    def invalidate(self, movie_id):
+        with self.lock:
+            if self.entries.pop(movie_id, None) is not None:
+                self.invalidations += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "movies": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+"""
+Get the movie cache of the current app, if it has one and it is enabled
+"""
+def get_movie_cache():
+    if not has_app_context():
+        return None
+
+    cache = getattr(current_app, "movie_cache", None)
+
+    if cache is None or cache.max_entries <= 0:
+        return None
+
+    return cache
+
+
+"""
+Copy the cached details of a movie with only the properties in `fields`
+and at most `actors_limit` actors and `directors_limit` directors
+"""
+def shape_movie(movie, fields=None, actors_limit=None, directors_limit=None):
+    nested = ("actors", "directors", "genres")
+    output = { key: value for key, value in movie.items() if fields is None or key in fields or key in nested }
+
+    for key, limit in (("actors", actors_limit), ("directors", directors_limit)):
+        output[key] = list(movie.get(key) or [])[:limit]
+
+    if fields is not None:
+        for field in fields:
+            output.setdefault(field, None)
+
+    return output
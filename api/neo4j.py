@@ -1,22 +1,163 @@
+import asyncio
+import logging
+import threading
+
 from flask import Flask, current_app
 
 # tag::import[]
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, AsyncGraphDatabase
 # end::import[]
 
+from api.metrics import PoolMetrics
+from api.readiness import Readiness
+from api.workloads import Workload
+
+log = logging.getLogger(__name__)
+
+# Delay between connectivity checks while the database is unreachable
+WARMUP_RETRY_DELAY = 1
+WARMUP_MAX_RETRY_DELAY = 30
+
+"""
+Map the pool settings held in the app config to the keyword arguments
+accepted by `GraphDatabase.driver`.  Settings that have not been configured
+are left out so that the driver defaults apply.
+"""
+def get_driver_config(config):
+    settings = {
+        "max_connection_pool_size": config.get('NEO4J_MAX_CONNECTION_POOL_SIZE'),
+        "connection_acquisition_timeout": config.get('NEO4J_CONNECTION_ACQUISITION_TIMEOUT'),
+        "max_connection_lifetime": config.get('NEO4J_MAX_CONNECTION_LIFETIME'),
+        "liveness_check_timeout": config.get('NEO4J_LIVENESS_CHECK_TIMEOUT'),
+        "fetch_size": config.get('NEO4J_FETCH_SIZE'),
+    }
+
+    return { key: value for key, value in settings.items() if value is not None }
+
+
 """
 Initiate the Neo4j Driver
+
+Any additional keyword arguments are passed to `GraphDatabase.driver` as
+pool configuration.  When `min_connections` is set, that many connections
+are opened up front so the first requests do not pay for the handshake.
+
+Creating the driver does not open any connections.  With `background=True`
+the connectivity check and pool warm-up run on a background thread, and
+`current_app.readiness` flips to ready once they succeed, so the app can
+start serving straight away.
+
+`workloads` maps workload class names to their settings (see
+`api.workloads`).  A class with a `pool_size` gets a driver of its own.
+
+`startup` is a list of functions that are called with the driver once it
+has connected, such as schema migrations.  The worker only becomes ready
+when they have all succeeded.
 """
 # tag::initDriver[]
-def init_driver(uri, username, password):
-    current_app.driver = GraphDatabase.driver(uri, auth=(username, password))
+def init_driver(uri, username, password, min_connections=0, background=False, workloads=None, startup=(), **config):
+    current_app.pool_metrics = PoolMetrics()
+    current_app.readiness = Readiness()
+    current_app.driver = current_app.pool_metrics.instrument(
+        GraphDatabase.driver(uri, auth=(username, password), **config)
+    )
+
+    current_app.workloads = {}
+
+    for name, settings in (workloads or {}).items():
+        driver = None
+        pool_metrics = None
+
+        if settings.get("pool_size"):
+            pool_metrics = PoolMetrics()
+            driver = pool_metrics.instrument(GraphDatabase.driver(
+                uri, auth=(username, password),
+                **dict(config, max_connection_pool_size=settings["pool_size"])
+            ))
+
+        current_app.workloads[name] = Workload(
+            name, driver,
+            concurrency=settings.get("concurrency"),
+            timeout=settings.get("timeout"),
+            pool_metrics=pool_metrics,
+        )
+
+    if background:
+        thread = threading.Thread(
+            target=warm_up,
+            args=(current_app.driver, current_app.readiness, min_connections, startup),
+            name="neo4j-warmup",
+            daemon=True,
+        )
+        thread.start()
+    else:
+        current_app.driver.verify_connectivity()
+
+        if min_connections:
+            warm_pool(current_app.driver, min_connections)
 
-    current_app.driver.verify_connectivity()
+        for task in startup:
+            task(current_app.driver)
+
+        current_app.readiness.succeeded()
 
     return current_app.driver
 # end::initDriver[]
 
 
+"""
+Verify connectivity, warm the pool and run the startup tasks, retrying with
+a growing delay while the database is unreachable or a task fails, then
+mark the worker as ready.
+"""
+def warm_up(driver, readiness, min_connections=0, startup=()):
+    delay = WARMUP_RETRY_DELAY
+
+    while not readiness.stopped.is_set():
+        try:
+            driver.verify_connectivity()
+
+            if min_connections:
+                warm_pool(driver, min_connections)
+
+            for task in startup:
+                task(driver)
+        except Exception as err:
+            if readiness.stopped.is_set():
+                return
+
+            log.warning("Neo4j warm-up failed, retrying in %ss: %s", delay, err)
+            readiness.failed(err)
+
+            readiness.stopped.wait(delay)
+            delay = min(delay * 2, WARMUP_MAX_RETRY_DELAY)
+        else:
+            readiness.succeeded()
+            log.info("Neo4j warm-up finished in %.3fs", readiness.elapsed)
+
+            return
+
+
+"""
+Open `size` connections at the same time and hand them back to the pool.
+
+Each explicit transaction holds on to its own connection until it is closed,
+so opening the transactions side by side forces the pool to grow to `size`.
+"""
+def warm_pool(driver, size):
+    sessions = []
+
+    try:
+        for _ in range(size):
+            session = driver.session(database=get_db_name())
+            sessions.append(session)
+
+            session.begin_transaction()
+    finally:
+        for session in sessions:
+            session.close()
+
+
 """
 Get the instance of the Neo4j Driver created in the `initDriver` function
 """
@@ -26,6 +167,24 @@ def get_driver():
 
 # end::getDriver[]
 
+"""
+Get a snapshot of the connection pool statistics for the current driver
+"""
+def get_pool_metrics():
+    return current_app.pool_metrics.snapshot()
+
+"""
+Get the settings and statistics of each workload class
+"""
+def get_workload_metrics():
+    return { name: workload.snapshot() for name, workload in current_app.workloads.items() }
+
+"""
+Get the readiness state of the current driver
+"""
+def get_readiness():
+    return current_app.readiness.snapshot()
+
 """
 If the driver has been instantiated, close it and all remaining open sessions
 """
@@ -33,11 +192,79 @@ If the driver has been instantiated, close it and all remaining open sessions
 # tag::closeDriver[]
 def close_driver():
     if current_app.driver != None:
+        current_app.readiness.stop()
         current_app.driver.close()
+
+        for workload in current_app.workloads.values():
+            if workload.driver is not None:
+                workload.driver.close()
+                workload.driver = None
         current_app.driver = None
 
         return current_app.driver
 # end::closeDriver[]
 
+"""
+Initiate the async Neo4j Driver used by the async DAOs and routes.
+
+An async driver is bound to the event loop it was created on, while Flask
+runs every async view in a fresh event loop.  The driver is therefore
+created on a long-lived loop running in a background thread, and the views
+hand their coroutines to that loop with `run_async`, so every request shares
+one connection pool.
+"""
+def init_async_driver(uri, username, password, background=False, **config):
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="neo4j-async", daemon=True)
+    thread.start()
+
+    async def create_driver():
+        driver = AsyncGraphDatabase.driver(uri, auth=(username, password), **config)
+
+        if not background:
+            await driver.verify_connectivity()
+
+        return driver
+
+    current_app.driver_loop = loop
+    current_app.async_driver = asyncio.run_coroutine_threadsafe(create_driver(), loop).result()
+
+    return current_app.async_driver
+
+
+"""
+Get the instance of the async Neo4j Driver created in `init_async_driver`
+"""
+def get_async_driver():
+    return current_app.async_driver
+
+
+"""
+Run a coroutine on the async driver's event loop and wait for its result
+without blocking the calling event loop.  The coroutine is scheduled with a
+copy of the caller's context, so `current_app` is available inside it.
+"""
+async def run_async(coro):
+    future = asyncio.run_coroutine_threadsafe(coro, current_app.driver_loop)
+
+    return await asyncio.wrap_future(future)
+
+
+"""
+Close the async driver and stop the event loop that it runs on
+"""
+def close_async_driver():
+    if getattr(current_app, "async_driver", None) != None:
+        loop = current_app.driver_loop
+
+        asyncio.run_coroutine_threadsafe(current_app.async_driver.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+        current_app.async_driver = None
+        current_app.driver_loop = None
+
+        return current_app.async_driver
+
+
 def get_db_name():
     return "neoflix"
@@ -0,0 +1,124 @@
+import base64
+import json
+
+from flask import g, request
+
+from neo4j.time import Date, DateTime
+
+from api.exceptions.badrequest import BadRequestException
+
+"""
+Keyset pagination for list endpoints.
+
+`SKIP` makes the database walk and throw away every row before the page, so
+deep pages get slower the further in they are.  A list response also
+carries an opaque cursor in the `X-Next-Cursor` header, holding the sort key
+and ID of its last row.  Passing it back as `?cursor=` fetches the next page
+by seeking past that row, which a range index on the sort key can answer
+directly, and the page does not shift when rows are added before it.
+
+`skip` keeps working for clients that do not pass a cursor.
+"""
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+"""
+Convert a sort key value into something that can be stored as JSON
+"""
+def encode_value(value):
+    if isinstance(value, (Date, DateTime)):
+        return { "type": type(value).__name__, "value": value.iso_format() }
+
+    return value
+
+
+def decode_value(value):
+    if isinstance(value, dict):
+        kind = { "Date": Date, "DateTime": DateTime }.get(value.get("type"))
+
+        if kind is None:
+            raise ValueError("Unknown value type")
+
+        return kind.from_iso_format(value["value"])
+
+    return value
+
+
+"""
+Encode the position after the row with sort key `value` and ID `id` into an
+opaque, URL-safe token.  The sort key and order are included so that a
+cursor cannot be used with a different sort.
+"""
+def encode_cursor(sort, order, value, id):
+    payload = json.dumps([ sort, order.upper(), encode_value(value), id ]).encode("utf8")
+
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+"""
+Decode a cursor created by `encode_cursor` into the sort key value and ID
+to seek past.  Raises a `BadRequestException` if the cursor is malformed
+or was created for a different sort.
+"""
+def decode_cursor(token, sort, order):
+    try:
+        cursor_sort, cursor_order, value, id = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+
+        value = decode_value(value)
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise BadRequestException("Invalid cursor")
+
+    if cursor_sort != sort or cursor_order != str(order).upper():
+        raise BadRequestException("The cursor was created for a different sort order")
+
+    return value, id
+
+
+"""
+Get the position to continue from for the current request, or None when
+no `cursor` was passed
+"""
+def get_cursor(sort, order):
+    token = request.args.get("cursor")
+
+    if not token:
+        return None
+
+    return decode_cursor(token, sort, order)
+
+
+"""
+Get the parameters for a page of a list query, either seeking past `after`
+or skipping `skip` rows
+"""
+def get_page_parameters(limit, skip, after):
+    if after is not None:
+        return { "limit": limit, "after": after[0], "afterId": after[1] }
+
+    return { "limit": limit, "skip": skip }
+
+
+"""
+Remember the cursor for the page after `items` so it is issued with the
+response.  No cursor is issued for the last page.
+"""
+def set_next_cursor(items, sort, order, limit, get_id=lambda item: item.get("tmdbId")):
+    if not items or len(items) < limit:
+        return
+
+    last = items[-1]
+
+    g.next_cursor = encode_cursor(sort, order, last.get(sort), get_id(last))
+
+
+"""
+Attach the cursor for the next page to the response
+"""
+def issue_cursor(response):
+    cursor = g.get("next_cursor")
+
+    if cursor is not None:
+        response.headers[CURSOR_HEADER] = cursor
+
+    return response
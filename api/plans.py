@@ -0,0 +1,280 @@
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from neo4j import READ_ACCESS, WRITE_ACCESS
+
+from api.neo4j import get_db_name
+from api.queries import all_queries
+
+"""
+Query plan warm-up and plan regression checks.
+
+Neo4j parses and plans a query the first time it sees its text, so after a
+deploy or a database restart the first request for each query and sort
+variant is slow.  Running `EXPLAIN` for every registered query plans it
+without executing it and leaves the plan in the server's plan cache.
+
+`PROFILE` runs every registered query against the dataset and records the
+operators in its plan, its estimated rows and its db hits.  These are
+compared with the budgets checked in to `plan_budgets.json`, so that a plan
+that has become worse, such as a lookup turning into an `AllNodesScan`, is
+caught by the tests or `flask plans check` before it reaches production.
+"""
+
+log = logging.getLogger(__name__)
+
+# Representative values for query parameters, so that the plans are built
+# for the same parameter types that the DAOs pass
+SAMPLE_PARAMETERS = {
+    "limit": 6,
+    "skip": 0,
+    "rating": 5,
+    "fields": None,
+    "ids": [],
+    "names": None,
+    "actorsLimit": None,
+    "directorsLimit": None,
+    "generation": 0,
+    "keys": [],
+}
+
+
+"""
+Get representative parameters for a registered query
+"""
+def get_sample_parameters(query):
+    return { name: SAMPLE_PARAMETERS.get(name, "") for name in query.params }
+
+
+"""
+Run `EXPLAIN` for every registered query and sort variant.  Reads are
+explained in read sessions, so they are planned on the members that will
+serve them, and writes in write sessions.
+
+Returns the time taken and a dict of the queries that failed to plan,
+by label, mapped to their errors.
+"""
+def warm_plans(driver, database):
+    started = time.monotonic()
+    failed = {}
+
+    for access_mode in (READ_ACCESS, WRITE_ACCESS):
+        queries = [ query for query in all_queries() if query.write == (access_mode == WRITE_ACCESS) ]
+
+        with driver.session(database=database, default_access_mode=access_mode) as session:
+            for query in queries:
+                try:
+                    session.run("EXPLAIN " + query.text, **get_sample_parameters(query)).consume()
+                except Exception as err:
+                    failed[query.label] = str(err)
+
+    elapsed = time.monotonic() - started
+
+    for name, error in failed.items():
+        log.warning("Failed to plan query %s: %s", name, error)
+
+    log.info("Planned %s queries in %.3fs, %s failed",
+        len(all_queries()), elapsed, len(failed))
+
+    return elapsed, failed
+
+
+"""
+Startup task that warms the plan cache, see `init_driver`.  Queries that
+fail to plan are logged and do not hold up readiness.
+"""
+def warm_query_plans(driver):
+    warm_plans(driver, get_db_name())
+
+
+BUDGET_FILE = os.path.join(os.path.dirname(__file__), '..', 'plan_budgets.json')
+
+# Operators that signal a regression unless the budgeted plan already has them
+REGRESSION_OPERATORS = ("AllNodesScan", "CartesianProduct")
+
+# How far db hits and estimated rows may exceed the budget
+DEFAULT_TOLERANCE = 0.2
+
+
+"""
+Walk every operator in a profiled plan
+"""
+def walk_plan(plan):
+    yield plan
+
+    for child in plan.get("children", []):
+        yield from walk_plan(child)
+
+
+"""
+Summarise a profiled plan as the sorted operator types in it, the total db
+hits of all operators and the rows estimated for the root operator
+"""
+def summarise_plan(plan):
+    operators = set()
+    db_hits = 0
+
+    for operator in walk_plan(plan):
+        # Operator types carry the runtime, for example `NodeIndexSeek@neo4j`
+        operators.add(operator["operatorType"].split("@")[0])
+        db_hits += operator.get("dbHits", 0)
+
+    return {
+        "operators": sorted(operators),
+        "db_hits": db_hits,
+        "estimated_rows": plan.get("args", {}).get("EstimatedRows"),
+    }
+
+
+"""
+`PROFILE` a registered query.  The query runs in an explicit transaction
+that is rolled back, so profiling a write leaves the data untouched.
+"""
+def profile_query(driver, database, query, parameters):
+    access_mode = WRITE_ACCESS if query.write else READ_ACCESS
+
+    with driver.session(database=database, default_access_mode=access_mode) as session:
+        tx = session.begin_transaction()
+
+        try:
+            summary = tx.run("PROFILE " + query.text, **parameters).consume()
+        finally:
+            tx.rollback()
+
+    return summarise_plan(summary.profile)
+
+
+"""
+Get the parameters to profile a query with: the sample parameters, with the
+values from the budget file in their place.  A write is given a new `email`
+each time, so that creating a user does not fail on the unique constraint
+on the email of the user it would otherwise reuse.
+"""
+def get_profile_parameters(query, overrides):
+    parameters = get_sample_parameters(query)
+    parameters.update({ name: value for name, value in overrides.items() if name in query.params })
+
+    if query.write and "email" in query.params:
+        parameters["email"] = "plans-{0}@example.com".format(uuid.uuid4())
+
+    return parameters
+
+
+"""
+Profile every registered query and sort variant, using the parameters from
+the budget file in place of the sample parameters
+"""
+def profile_all(driver, database, budgets):
+    overrides = budgets.get("parameters", {})
+    profiles = {}
+
+    for query in all_queries():
+        parameters = get_profile_parameters(query, overrides)
+
+        profiles[query.label] = profile_query(driver, database, query, parameters)
+
+    return profiles
+
+
+def load_budgets(path=BUDGET_FILE):
+    with open(path) as budget_file:
+        return json.load(budget_file)
+
+
+def save_budgets(budgets, path=BUDGET_FILE):
+    with open(path, "w") as budget_file:
+        json.dump(budgets, budget_file, indent=2, sort_keys=True)
+        budget_file.write("\n")
+
+
+"""
+Compare the profile of one query with its budget and return a list of the
+ways it is worse.  A query without a recorded budget is only checked for
+regression operators.
+"""
+def check_plan(profile, budget, tolerance=DEFAULT_TOLERANCE):
+    problems = []
+    allowed = set((budget or {}).get("operators") or [])
+
+    for operator in REGRESSION_OPERATORS:
+        if operator in profile["operators"] and operator not in allowed:
+            problems.append("plan contains {0}".format(operator))
+
+    if not budget:
+        return problems
+
+    new_operators = set(profile["operators"]) - allowed
+
+    if budget.get("operators") is not None and new_operators:
+        problems.append("new operators {0}".format(", ".join(sorted(new_operators))))
+
+    for key in ("db_hits", "estimated_rows"):
+        limit = budget.get(key)
+        value = profile.get(key)
+
+        if limit is not None and value is not None and value > limit * (1 + tolerance):
+            problems.append("{0} {1} over budget of {2}".format(key, value, limit))
+
+    return problems
+
+
+"""
+Check every profile against the budget file.  Returns the problems found,
+keyed by query label, for the queries that got worse.
+"""
+def check_budgets(profiles, budgets):
+    tolerance = budgets.get("tolerance", DEFAULT_TOLERANCE)
+    queries = budgets.get("queries", {})
+    regressions = {}
+
+    for label, profile in profiles.items():
+        problems = check_plan(profile, queries.get(label), tolerance)
+
+        if problems:
+            regressions[label] = problems
+
+    return regressions
+
+
+"""
+Record the profiles as the new budgets
+"""
+def record_budgets(profiles, budgets):
+    return dict(budgets, queries={ label: dict(profile) for label, profile in profiles.items() })
+
+
+plans_cli = AppGroup("plans", help="Check query plans against their budgets.")
+
+
+@plans_cli.command("check")
+@click.option("--budgets", "path", default=BUDGET_FILE, help="Path to the budget file.")
+@click.option("--update", is_flag=True, help="Record the current plans as the new budgets.")
+def check_command(path, update):
+    budgets = load_budgets(path)
+    profiles = profile_all(current_app.driver, get_db_name(), budgets)
+
+    if update:
+        save_budgets(record_budgets(profiles, budgets), path)
+        click.echo("Recorded budgets for {0} queries in {1}".format(len(profiles), path))
+        return
+
+    regressions = check_budgets(profiles, budgets)
+
+    for label, profile in sorted(profiles.items()):
+        click.echo("{0:<40} {1:>8} db hits  {2}".format(
+            label, profile["db_hits"], "REGRESSED" if label in regressions else "ok"
+        ))
+
+        for problem in regressions.get(label, []):
+            click.echo("    " + problem)
+
+    if regressions:
+        sys.exit(1)
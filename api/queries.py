@@ -0,0 +1,402 @@
+import re
+
+from api.exceptions.badrequest import BadRequestException
+
+"""
+The registry of every Cypher statement run by the DAOs.
+
+Statements are registered once under a name and never built from request
+input.  Lists that can be sorted are registered as one variant per
+`(sort, order)` pair from a fixed set of sort keys per entity, so the server
+only ever sees a small, known set of query texts whose plans it can cache,
+and a sort key that is not in the set is rejected with a 400 before it
+reaches the database.
+"""
+
+ASC = "ASC"
+DESC = "DESC"
+
+ORDERS = (ASC, DESC)
+
+# Properties that lists of each entity can be sorted by
+SORTS = {
+    "movie": ("title", "released", "imdbRating", "year"),
+    "rating": ("timestamp", "rating"),
+    "person": ("name", "born"),
+}
+
+PARAMETER = re.compile(r"\$(\w+)")
+
+
+class Query:
+    def __init__(self, name, text, write=False, variant=None):
+        self.name = name
+        self.text = text
+        self.write = write
+        self.variant = variant
+        self.params = frozenset(PARAMETER.findall(text))
+
+    """
+    The name of the statement, followed by the sort key and order for a
+    variant of a sortable statement
+    """
+    @property
+    def label(self):
+        if self.variant is None:
+            return self.name
+
+        sort, order, seek = self.variant
+
+        return "{0} ({1} {2}{3})".format(self.name, sort, order, " after cursor" if seek else "")
+
+    """
+    Run the statement on a transaction, after checking that exactly the
+    parameters it uses have been passed.  With an async transaction the
+    coroutine returned by `tx.run` should be awaited.
+    """
+    def run(self, tx, **params):
+        if set(params) != self.params:
+            raise ValueError("Query {0} expects parameters {1}, got {2}".format(
+                self.name, sorted(self.params), sorted(params)
+            ))
+
+        return tx.run(self.text, params)
+
+
+QUERIES = {}
+
+
+"""
+Build the condition that seeks past the last row of the previous page.
+Rows are ordered by the sort key and then by a unique ID, so a row comes
+after the cursor when its key is past `$after`, or equal to it with an ID
+past `$afterId`.  The first comparison on its own can be answered from a
+range index on the sort key.
+"""
+def seek_condition(key, id, order):
+    operator = ">" if order == ASC else "<"
+
+    return "AND {0} {1}= $after AND ({0} {1} $after OR {2} {1} $afterId)".format(key, operator, id)
+
+
+"""
+Register a statement under a name.  A template registered with `sorts`
+(an entity name from `SORTS`) is formatted into one variant per sort key
+and order, with `{sort}` and `{order}` in the template replaced.  Statements
+that write are registered with `write=True`.
+
+Lists registered with `keyset`, a pair of the sort key expression and the
+expression of the unique ID used to break ties, get a second variant per
+sort key and order that continues from a cursor.  `{seek}` in the template
+becomes the condition from `seek_condition` in that variant and `{skip}`
+becomes `SKIP $skip` in the other one.
+"""
+def register(name, text, sorts=None, write=False, keyset=None):
+    if sorts is None:
+        QUERIES[name] = Query(name, text, write)
+        return
+
+    for sort in SORTS[sorts]:
+        for order in ORDERS:
+            for seek in ((False, True) if keyset else (False,)):
+                text_variant = text.replace("{seek}", seek_condition(keyset[0], keyset[1], order) if seek else "") \
+                    .replace("{skip}", "" if seek else "SKIP $skip") \
+                    .replace("{sort}", sort) \
+                    .replace("{order}", order)
+
+                QUERIES[(name, sort, order, seek)] = Query(name, text_variant, write, (sort, order, seek))
+
+
+"""
+Check a sort key and order against the allowed values for an entity,
+returning them normalised.  The order is case insensitive.  Raises a
+`BadRequestException` for anything else.
+"""
+def validate_sort(entity, sort, order):
+    if sort not in SORTS[entity]:
+        raise BadRequestException("Invalid sort '{0}', expected one of {1}".format(
+            sort, ", ".join(SORTS[entity])
+        ))
+
+    normalised = str(order).upper()
+
+    if normalised not in ORDERS:
+        raise BadRequestException("Invalid order '{0}', expected one of {1}".format(
+            order, ", ".join(ORDERS)
+        ))
+
+    return sort, normalised
+
+
+"""
+Get a registered statement by name, or the variant of a sortable statement
+for a sort key and order of `entity`.  With `seek` the variant that
+continues from a cursor is returned.
+"""
+def get_query(name, entity=None, sort=None, order=None, seek=False):
+    if entity is None:
+        return QUERIES[name]
+
+    sort, order = validate_sort(entity, sort, order)
+
+    return QUERIES[(name, sort, order, seek)]
+
+
+"""
+Get every registered statement, including each variant of the sortable ones
+"""
+def all_queries():
+    return list(QUERIES.values())
+
+
+# Movies
+#
+# Movies are returned with every property, or when `$fields` is a list of
+# property names, as a list of just those values, see `api.fields`
+
+MOVIE_KEYSET = ("m.`{sort}`", "m.tmdbId")
+
+register("movies.all", """
+    MATCH (m:Movie)
+    WHERE m.`{sort}` IS NOT NULL
+    {seek}
+    RETURN CASE WHEN $fields IS NULL THEN m { .* } ELSE [key IN $fields | m[key]] END AS movie
+    ORDER BY m.`{sort}` {order}, m.tmdbId {order}
+    {skip}
+    LIMIT $limit
+""", sorts="movie", keyset=MOVIE_KEYSET)
+
+register("movies.by_genre", """
+    MATCH (m:Movie)-[:IN_GENRE]->(:Genre {name: $name})
+    WHERE m.`{sort}` IS NOT NULL
+    {seek}
+    RETURN CASE WHEN $fields IS NULL THEN m { .* } ELSE [key IN $fields | m[key]] END AS movie
+    ORDER BY m.`{sort}` {order}, m.tmdbId {order}
+    {skip}
+    LIMIT $limit
+""", sorts="movie", keyset=MOVIE_KEYSET)
+
+register("movies.for_actor", """
+    MATCH (:Person {tmdbId: $id})-[:ACTED_IN]->(m:Movie)
+    WHERE m.`{sort}` IS NOT NULL
+    {seek}
+    RETURN CASE WHEN $fields IS NULL THEN m { .* } ELSE [key IN $fields | m[key]] END AS movie
+    ORDER BY m.`{sort}` {order}, m.tmdbId {order}
+    {skip}
+    LIMIT $limit
+""", sorts="movie", keyset=MOVIE_KEYSET)
+
+register("movies.for_director", """
+    MATCH (:Person {tmdbId: $id})-[:DIRECTED]->(m:Movie)
+    WHERE m.`{sort}` IS NOT NULL
+    {seek}
+    RETURN CASE WHEN $fields IS NULL THEN m { .* } ELSE [key IN $fields | m[key]] END AS movie
+    ORDER BY m.`{sort}` {order}, m.tmdbId {order}
+    {skip}
+    LIMIT $limit
+""", sorts="movie", keyset=MOVIE_KEYSET)
+
+register("movies.by_ids", """
+    UNWIND $ids AS id
+    MATCH (m:Movie {tmdbId: id})
+    RETURN CASE WHEN $fields IS NULL THEN m { .* } ELSE [key IN $fields | m[key]] END AS movie
+""")
+
+register("movies.find_by_id", """
+    MATCH (m:Movie {tmdbId: $id})
+    WITH m,
+        [ (a)-[r:ACTED_IN]->(m) | a { .*, role: r.role } ] AS actors,
+        [ (d)-[:DIRECTED]->(m) | d { .* } ] AS directors
+    RETURN CASE WHEN $fields IS NULL THEN m { .* } ELSE [key IN $fields | m[key]] END AS movie,
+        actors[..coalesce($actorsLimit, size(actors))] AS actors,
+        directors[..coalesce($directorsLimit, size(directors))] AS directors,
+        [ (m)-[:IN_GENRE]->(g) | g { .name } ] AS genres
+    LIMIT 1
+""")
+
+# The user's version is read with their favorites, so the cached set can be
+# checked against later writes, see `api.favorite_cache`
+register("movies.user_favorites", """
+    MATCH (u:User {userId: $userId})
+    OPTIONAL MATCH (u)-[:HAS_FAVORITE]->(m)
+    RETURN coalesce(u.version, 0) AS version, collect(m.tmdbId) AS ids
+""")
+
+# Favorites
+
+register("favorites.all", """
+    MATCH (u:User {userId: $userId})-[r:HAS_FAVORITE]->(m:Movie)
+    WHERE m.`{sort}` IS NOT NULL
+    {seek}
+    RETURN m {
+        .*,
+        favorite: true
+    } AS movie
+    ORDER BY m.`{sort}` {order}, m.tmdbId {order}
+    {skip}
+    LIMIT $limit
+""", sorts="movie", keyset=MOVIE_KEYSET)
+
+register("favorites.add", """
+    MATCH (u:User {userId: $userId})
+    MATCH (m:Movie {tmdbId: $movieId})
+    MERGE (u)-[r:HAS_FAVORITE]->(m)
+    ON CREATE SET r.createdAt = datetime(),
+        u.version = coalesce(u.version, 0) + 1
+    RETURN m {
+        .*,
+        favorite: true
+    } AS movie, u.version AS version
+""", write=True)
+
+register("favorites.remove", """
+    MATCH (u:User {userId: $userId})-[r:HAS_FAVORITE]->(m:Movie {tmdbId: $movieId})
+    DELETE r
+    SET u.version = coalesce(u.version, 0) + 1
+    RETURN m {
+        .*,
+        favorite: false
+    } AS movie, u.version AS version
+""", write=True)
+
+# Ratings
+
+register("ratings.add", """
+    MATCH (u:User {userId: $user_id})
+    MATCH (m:Movie {tmdbId: $movie_id})
+    MERGE (u)-[r:RATED]->(m)
+    SET r.rating = $rating,
+        r.timestamp = timestamp()
+    SET u.version = coalesce(u.version, 0) + 1
+    RETURN m {
+        .*,
+        rating: r.rating
+    } AS movie, u.version AS version
+""", write=True)
+
+register("ratings.for_movie", """
+    MATCH (u:User)-[r:RATED]->(:Movie {tmdbId: $id})
+    WHERE r.`{sort}` IS NOT NULL
+    {seek}
+    RETURN r {
+        .rating,
+        .timestamp,
+        user: u { .userId, .name }
+    } AS review
+    ORDER BY r.`{sort}` {order}, u.userId {order}
+    {skip}
+    LIMIT $limit
+""", sorts="rating", keyset=("r.`{sort}`", "u.userId"))
+
+# People
+
+register("people.all", """
+    MATCH (p:Person)
+    WHERE ($q IS NULL OR p.name CONTAINS $q)
+    AND p.`{sort}` IS NOT NULL
+    {seek}
+    RETURN p { .* } AS person
+    ORDER BY p.`{sort}` {order}, p.tmdbId {order}
+    {skip}
+    LIMIT $limit
+""", sorts="person", keyset=("p.`{sort}`", "p.tmdbId"))
+
+# Genres
+#
+# Working out each genre's movie count and poster means sorting the movies of
+# every genre.  `genres.refresh` stores the results on the Genre nodes, which
+# `genres.summaries` reads back, see `api.genre_summaries`
+
+register("genres.refresh", """
+    MATCH (g:Genre)
+    WHERE g.name <> '(no genres listed)'
+    AND ($names IS NULL OR g.name IN $names)
+    CALL {
+        WITH g
+        MATCH (g)<-[:IN_GENRE]-(m:Movie)
+        WHERE m.imdbRating IS NOT NULL AND m.poster IS NOT NULL
+        RETURN m.poster AS poster
+        ORDER BY m.imdbRating DESC LIMIT 1
+    }
+    SET g.movieCount = count { (g)<-[:IN_GENRE]-(:Movie) },
+        g.poster = poster,
+        g.summarizedAt = datetime()
+    RETURN collect(g.name) AS names
+""", write=True)
+
+# Genres that have not been refreshed yet are summarised from their movies
+register("genres.summaries", """
+    MATCH (g:Genre)
+    WHERE g.name <> '(no genres listed)'
+    CALL {
+        WITH g
+        OPTIONAL MATCH (g)<-[:IN_GENRE]-(m:Movie)
+        WHERE g.movieCount IS NULL AND m.imdbRating IS NOT NULL AND m.poster IS NOT NULL
+        WITH m
+        ORDER BY m.imdbRating DESC LIMIT 1
+        RETURN m.poster AS poster
+    }
+    RETURN g {
+        .name,
+        poster: CASE WHEN g.movieCount IS NULL THEN poster ELSE g.poster END,
+        movies: CASE WHEN g.movieCount IS NULL THEN count { (g)<-[:IN_GENRE]-(:Movie) } ELSE g.movieCount END
+    } AS genre
+    ORDER BY g.name ASC
+""")
+
+# Response cache
+#
+# Purges are numbered from a shared generation counter, and only the last
+# 1000 are kept, see `api.response_cache`
+
+register("responses.publish_purge", """
+    MERGE (c:CacheGeneration {name: 'responses'})
+    SET c.generation = coalesce(c.generation, 0) + 1
+    CREATE (:CachePurge {generation: c.generation, keys: $keys, createdAt: datetime()})
+    WITH c
+    CALL {
+        WITH c
+        MATCH (p:CachePurge)
+        WHERE p.generation <= c.generation - 1000
+        DELETE p
+    }
+    RETURN c.generation AS generation
+""", write=True)
+
+register("responses.purges", """
+    MATCH (c:CacheGeneration {name: 'responses'})
+    CALL {
+        WITH c
+        MATCH (p:CachePurge)
+        WHERE p.generation > $generation AND p.generation <= c.generation
+        WITH p
+        ORDER BY p.generation
+        RETURN collect(p.keys) AS purges
+    }
+    RETURN c.generation AS generation, purges
+""")
+
+# Auth
+
+register("auth.register", """
+    CREATE (u:User {
+        userId: randomUuid(),
+        email: $email,
+        password: $encrypted,
+        name: $name
+    })
+    RETURN u
+""", write=True)
+
+register("auth.get_user", """
+    MATCH (u:User {email: $email}) RETURN u
+""")
+
+# Users
+
+# Writes to a user's favorites and ratings increment `u.version`, which
+# `users.version` reads back to revalidate their lists, see `api.user_versions`
+register("users.version", """
+    MATCH (u:User {userId: $userId})
+    RETURN coalesce(u.version, 0) AS version
+""")
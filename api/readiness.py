@@ -0,0 +1,57 @@
+import threading
+import time
+
+"""
+Track whether the worker's connection pool has been primed.
+
+The app starts serving as soon as it is created; the driver connects and
+warms its pool in the background, and the readiness probe reports `ready`
+once that has finished.
+"""
+
+STARTING = "starting"
+READY = "ready"
+CLOSED = "closed"
+
+
+class Readiness:
+    def __init__(self):
+        self.state = STARTING
+        self.attempts = 0
+        self.error = None
+        self.started = time.monotonic()
+        self.elapsed = None
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.state == READY
+
+    def failed(self, err):
+        with self.lock:
+            self.attempts += 1
+            self.error = str(err)
+
+    def succeeded(self):
+        with self.lock:
+            self.attempts += 1
+            self.error = None
+            self.state = READY
+            self.elapsed = time.monotonic() - self.started
+
+    def stop(self):
+        with self.lock:
+            self.state = CLOSED
+
+        self.stopped.set()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "ready": self.state == READY,
+                "attempts": self.attempts,
+                "error": self.error,
+                "warmup_seconds": self.elapsed,
+            }
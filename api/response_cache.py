@@ -0,0 +1,374 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+import click
+from flask import current_app, g, has_app_context, request
+from flask.cli import AppGroup
+
+from neo4j import WRITE_ACCESS
+
+from api.bookmarks import BOOKMARK_COOKIE, BOOKMARK_HEADER
+from api.neo4j import get_db_name
+from api.queries import get_query
+from api.transactions import execute_read
+
+"""
+Cache anonymous list responses in the worker.
+
+Movie, genre, people and rating lists return the same body to every
+anonymous caller asking for the same page, so each worker keeps the encoded
+body of those responses, keyed by the path and the normalized query string,
+and serves repeats before the route runs.
+
+Each entry is tagged with surrogate keys for what it lists: `movie:<tmdbId>`
+for every movie in it, `person:<tmdbId>` for every person, `genre:<name>`
+and `person:<tmdbId>` for the genre or person whose movies it lists, and
+`movie:<tmdbId>` for the movie whose ratings it lists.  Lists of movies and
+people are also tagged with `movie` or `person`.  A write purges the keys it
+affects from the cache of the worker that made it, so saving a rating drops
+only the lists there that show that movie, and a data import can purge every
+list of movies at once.
+
+To reach the other workers, the write also publishes the purge in its own
+transaction as a `(:CachePurge)` node, numbered from a shared generation
+counter on a `(:CacheGeneration)` node.  Before serving a cached response,
+each worker reads the purges published since the last generation it saw, at
+most once every `purge_interval` seconds, and applies them.  A purge made
+anywhere therefore reaches every worker within `purge_interval` seconds,
+and `ttl` only bounds how long a response is kept when nothing purges it.
+"""
+
+log = logging.getLogger(__name__)
+
+# The endpoints whose anonymous responses are cached, mapped to the kind of
+# item they list, if its `tmdbId` should be a key, and the view argument
+# that identifies what they list, if any
+RESPONSE_CACHE_ENDPOINTS = {
+    "movies.get_movies": ("movie", None),
+    "movies.get_movie_ratings": (None, ("movie", "movie_id")),
+    "genre.get_genre_movies": ("movie", ("genre", "name")),
+    "people.get_index": ("person", None),
+    "people.get_movies_acted_in": ("movie", ("person", "id")),
+    "people.get_movies_directed": ("movie", ("person", "id")),
+}
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1000, ttl=30, purge_interval=1):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.generation = None
+        self.next_poll = 0
+        self.entries = OrderedDict()
+        self.tags = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.purged = 0
+        self.lock = threading.Lock()
+
+    """
+    Get the cached response for a URL as a tuple of its body, mimetype and
+    next cursor, or None if it is not cached or has expired
+    """
+    def get(self, url):
+        with self.lock:
+            entry = self.entries.get(url)
+
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self.drop(url)
+
+                self.misses += 1
+
+                return None
+
+            self.entries.move_to_end(url)
+            self.hits += 1
+
+            return entry[1]
+
+    """
+    Cache a response for a URL, tagged with the surrogate keys in `keys`
+    """
+    def set(self, url, response, keys):
+        with self.lock:
+            if url in self.entries:
+                self.drop(url)
+
+            self.entries[url] = (time.monotonic() + self.ttl, response, keys)
+            self.size += len(response[0])
+
+            for key in keys:
+                self.tags.setdefault(key, set()).add(url)
+
+            while len(self.entries) > self.max_entries:
+                self.drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    """
+    Drop every response tagged with any of `keys`, or every response when
+    no keys are given.  Returns the number of responses dropped.
+    """
+    def purge(self, *keys):
+        with self.lock:
+            if keys:
+                urls = set()
+
+                for key in keys:
+                    urls.update(self.tags.get(key, ()))
+            else:
+                urls = list(self.entries)
+
+            for url in urls:
+                self.drop(url)
+
+            self.purged += len(urls)
+
+            return len(urls)
+
+    """
+    Check whether it is time to read the purges published by other workers,
+    claiming the check if it is so that other threads skip it
+    """
+    def claim_poll(self):
+        with self.lock:
+            now = time.monotonic()
+
+            if now < self.next_poll:
+                return False
+
+            self.next_poll = now + self.purge_interval
+
+            return True
+
+    """
+    Apply the purges published up to `generation` since the last generation
+    this worker saw, given as the keys of each purge.  The first call only
+    records the generation.  When fewer purges are given than were published
+    in between, some have been deleted already, and every response is
+    dropped.  Returns the number of responses dropped.
+    """
+    def apply_purges(self, generation, purges):
+        with self.lock:
+            seen = self.generation
+
+            if seen is not None and generation <= seen:
+                return 0
+
+            self.generation = generation
+
+        if seen is None:
+            return 0
+
+        if generation - seen > len(purges):
+            return self.purge()
+
+        return sum(self.purge(*keys) for keys in purges)
+
+    def drop(self, url):
+        # Called with the lock held
+        _, response, keys = self.entries.pop(url)
+        self.size -= len(response[0])
+
+        for key in keys:
+            urls = self.tags.get(key)
+
+            if urls is not None:
+                urls.discard(url)
+
+                if not urls:
+                    del self.tags[key]
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "responses": len(self.entries),
+                "bytes": self.size,
+                "keys": len(self.tags),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "purged": self.purged,
+                "generation": self.generation,
+            }
+
+
+"""
+Get the response cache of the current app, if it has one and it is enabled
+"""
+def get_response_cache():
+    if not has_app_context():
+        return None
+
+    cache = getattr(current_app, "response_cache", None)
+
+    if cache is None or cache.max_entries <= 0:
+        return None
+
+    return cache
+
+
+"""
+Drop the cached responses of this worker tagged with any of `keys`, for
+example `purge_responses("movie:769")` after a movie has changed, or every
+cached response when no keys are given
+"""
+def purge_responses(*keys):
+    cache = get_response_cache()
+
+    if cache is None:
+        return 0
+
+    return cache.purge(*keys)
+
+
+"""
+Publish a purge of `keys`, or of every response when there are none, for
+the other workers to apply.  Called in the transaction of the write that
+changed what the responses show, so the purge is published if and only if
+the write is committed.
+"""
+def publish_purge(tx, keys):
+    if get_response_cache() is not None:
+        get_query("responses.publish_purge").run(tx, keys=list(keys)).consume()
+
+
+async def publish_purge_async(tx, keys):
+    if get_response_cache() is not None:
+        result = await get_query("responses.publish_purge").run(tx, keys=list(keys))
+
+        await result.consume()
+
+
+"""
+Apply the purges published by other workers, if it is time to check for
+them.  When they cannot be read the check is logged and skipped, and the
+cache is served as it is until the next one.
+"""
+def apply_published_purges(cache):
+    if not cache.claim_poll():
+        return
+
+    try:
+        row = execute_read(current_app.driver, get_db_name(), lambda tx: get_query("responses.purges").run(
+            tx, generation=cache.generation
+        ).single())
+    except Exception as err:
+        log.warning("Failed to read published response cache purges: %s", err)
+        return
+
+    if row is not None:
+        cache.apply_purges(row["generation"], row["purges"])
+
+
+"""
+Check whether the current request is an anonymous GET of a list endpoint
+that does not wait for bookmarks
+"""
+def is_cacheable_request():
+    return request.method == "GET" \
+        and request.endpoint in RESPONSE_CACHE_ENDPOINTS \
+        and "Authorization" not in request.headers \
+        and BOOKMARK_HEADER not in request.headers \
+        and BOOKMARK_COOKIE not in request.cookies
+
+
+"""
+Get the cache key of the current request: its path and its query string
+with the arguments sorted, so the same page asked for with its arguments
+in a different order is cached once
+"""
+def get_cache_url():
+    return request.path + "?" + urlencode(sorted(request.args.items(multi=True)))
+
+
+"""
+Get the surrogate keys of a list response from the route's view arguments
+and the listed items
+"""
+def get_surrogate_keys(endpoint, view_args, items):
+    kind, argument = RESPONSE_CACHE_ENDPOINTS[endpoint]
+    keys = set()
+
+    if argument is not None:
+        prefix, name = argument
+        keys.add("{0}:{1}".format(prefix, view_args[name]))
+
+    if kind is not None:
+        keys.add(kind)
+
+        for item in items if isinstance(items, list) else ():
+            if isinstance(item, dict) and item.get("tmdbId") is not None:
+                keys.add("{0}:{1}".format(kind, item["tmdbId"]))
+
+    return keys
+
+
+"""
+Serve a cached response to an anonymous list request.  Registered with
+`before_request`, after the request guards so that the cache key uses the
+clamped arguments.
+"""
+def serve_cached_response():
+    cache = get_response_cache()
+
+    if cache is None or not is_cacheable_request():
+        return None
+
+    apply_published_purges(cache)
+
+    cached = cache.get(get_cache_url())
+
+    if cached is None:
+        return None
+
+    body, mimetype, cursor = cached
+
+    # Issued with the response by `issue_cursor`
+    if cursor is not None:
+        g.next_cursor = cursor
+
+    g.response_cached = True
+
+    return current_app.response_class(body, mimetype=mimetype)
+
+
+"""
+Cache successful responses to anonymous list requests.  Registered with
+`after_request`.
+"""
+def store_response(response):
+    cache = get_response_cache()
+
+    if cache is None or g.get("response_cached") or not is_cacheable_request():
+        return response
+
+    if response.status_code != 200 or response.direct_passthrough or not response.is_json:
+        return response
+
+    body = response.get_data()
+    keys = get_surrogate_keys(request.endpoint, request.view_args, response.get_json())
+
+    cache.set(get_cache_url(), (body, response.mimetype, g.get("next_cursor")), keys)
+
+    return response
+
+
+cache_cli = AppGroup("cache", help="Manage the response caches of the workers.")
+
+
+@cache_cli.command("purge")
+@click.argument("keys", nargs=-1)
+def purge_command(keys):
+    with current_app.driver.session(database=get_db_name(), default_access_mode=WRITE_ACCESS) as session:
+        session.execute_write(publish_purge, keys)
+
+    click.echo("Published a purge of {0}".format(", ".join(keys) or "every response"))
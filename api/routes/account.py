@@ -1,6 +1,9 @@
 from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import current_user, jwt_required
 
+from api.neo4j import get_db_name
+from api.pagination import get_cursor, set_next_cursor
+from api.user_versions import versioned
 from api.dao.favorites import FavoriteDAO
 from api.dao.ratings import RatingDAO
 
@@ -13,6 +16,7 @@ def get_profile():
 
 @account_routes.route('/favorites', methods=['GET'])
 @jwt_required()
+@versioned
 def get_favorites():
     # Get user ID from JWT
     user_id = current_user["sub"]
@@ -22,11 +26,14 @@ def get_favorites():
     order = request.args.get("order", "ASC")
     limit = request.args.get("limit", 6, type=int)
     skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
 
     # Create the DAO
-    dao = FavoriteDAO(current_app.driver)
+    dao = FavoriteDAO(current_app.driver, get_db_name())
 
-    output = dao.all(user_id, sort, order, limit, skip)
+    output = dao.all(user_id, sort, order, limit, skip, after)
+
+    set_next_cursor(output, sort, order, limit)
 
     return jsonify(output)
 
@@ -37,7 +44,7 @@ def add_favorite(movie_id):
     user_id = current_user["sub"]
 
     # Create the DAO
-    dao = FavoriteDAO(current_app.driver)
+    dao = FavoriteDAO(current_app.driver, get_db_name())
 
     if request.method == "POST":
         # Save the favorite
@@ -61,7 +68,7 @@ def save_rating(movie_id):
     rating = int(form_data["rating"])
 
     # Create the DAO
-    dao = RatingDAO(current_app.driver)
+    dao = RatingDAO(current_app.driver, get_db_name())
 
     # Save the rating
     output = dao.add(user_id, movie_id, rating)
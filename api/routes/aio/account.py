@@ -0,0 +1,77 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import current_user, jwt_required
+
+from api.neo4j import get_db_name, run_async
+from api.pagination import get_cursor, set_next_cursor
+from api.user_versions import versioned
+from api.dao.aio.favorites import AsyncFavoriteDAO
+from api.dao.aio.ratings import AsyncRatingDAO
+
+account_routes = Blueprint("account", __name__, url_prefix="/api/account")
+
+@account_routes.route('/', methods=['GET'])
+@jwt_required()
+def get_profile():
+    return jsonify(current_user)
+
+@account_routes.route('/favorites', methods=['GET'])
+@jwt_required()
+@versioned
+async def get_favorites():
+    # Get user ID from JWT
+    user_id = current_user["sub"]
+
+    # Get search parameters
+    sort = request.args.get("sort", "title")
+    order = request.args.get("order", "ASC")
+    limit = request.args.get("limit", 6, type=int)
+    skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
+
+    # Create the DAO
+    dao = AsyncFavoriteDAO(current_app.async_driver, get_db_name())
+
+    output = await run_async(dao.all(user_id, sort, order, limit, skip, after))
+
+    set_next_cursor(output, sort, order, limit)
+
+    return jsonify(output)
+
+@account_routes.route('/favorites/<movie_id>', methods=['POST', 'DELETE'])
+@jwt_required()
+async def add_favorite(movie_id):
+    # Get user ID from JWT
+    user_id = current_user["sub"]
+
+    # Create the DAO
+    dao = AsyncFavoriteDAO(current_app.async_driver, get_db_name())
+
+    if request.method == "POST":
+        # Save the favorite
+        output = await run_async(dao.add(user_id, movie_id))
+    else:
+        # Remove the favorite
+        output = await run_async(dao.remove(user_id, movie_id))
+
+    # Return the output
+    return jsonify(output)
+
+
+@account_routes.route('/ratings/<movie_id>', methods=['POST'])
+@jwt_required()
+async def save_rating(movie_id):
+    # Get user ID from JWT
+    user_id = current_user["sub"]
+
+    # Get rating from Request
+    form_data = request.get_json()
+    rating = int(form_data["rating"])
+
+    # Create the DAO
+    dao = AsyncRatingDAO(current_app.async_driver, get_db_name())
+
+    # Save the rating
+    output = await run_async(dao.add(user_id, movie_id, rating))
+
+    # Return the output
+    return jsonify(output)
@@ -0,0 +1,37 @@
+from flask import Blueprint, current_app, request, jsonify
+
+from api.neo4j import get_db_name, run_async
+from api.dao.aio.auth import AsyncAuthDAO
+
+auth_routes = Blueprint("auth", __name__, url_prefix="/api/auth")
+
+@auth_routes.route('/register', methods=['POST'])
+async def register():
+    form_data = request.get_json()
+
+    email = form_data['email']
+    password = form_data['password']
+    name = form_data['name']
+
+    dao = AsyncAuthDAO(current_app.async_driver, current_app.config.get('SECRET_KEY'), get_db_name())
+
+    user = await run_async(dao.register(email, password, name))
+
+    return user
+
+
+@auth_routes.route('/login', methods=['POST'])
+async def login():
+    form_data = request.get_json()
+
+    email = form_data['email']
+    password = form_data['password']
+
+    dao = AsyncAuthDAO(current_app.async_driver, current_app.config.get('SECRET_KEY'), get_db_name())
+
+    user = await run_async(dao.authenticate(email, password))
+
+    if user is False:
+        return "Unauthorized", 401
+
+    return jsonify(user)
@@ -0,0 +1,54 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import current_user, jwt_required
+
+from api.neo4j import get_db_name, run_async
+from api.pagination import get_cursor, set_next_cursor
+from api.fields import get_fields
+from api.dao.aio.genres import AsyncGenreDAO
+from api.dao.aio.movies import AsyncMovieDAO
+
+genre_routes = Blueprint("genre", __name__, url_prefix="/api/genres")
+
+@genre_routes.get('/')
+async def get_index():
+    # Create the DAO
+    dao = AsyncGenreDAO(current_app.async_driver, get_db_name())
+
+    # Get output
+    output = await run_async(dao.all())
+
+    return jsonify(output)
+
+@genre_routes.get('/<name>/')
+async def get_genre(name):
+    # Create the DAO
+    dao = AsyncGenreDAO(current_app.async_driver, get_db_name())
+
+    # Get the Genre
+    output = await run_async(dao.find(name))
+
+    return jsonify(output)
+
+@genre_routes.get('/<name>/movies')
+@jwt_required(optional=True)
+async def get_genre_movies(name):
+    # Get User ID from JWT Auth
+    user_id = current_user["sub"] if current_user != None else None
+
+    # Get Pagination Values
+    sort = request.args.get("sort", "title")
+    order = request.args.get("order", "ASC")
+    limit = request.args.get("limit", 6, type=int)
+    skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
+    fields = get_fields(sort)
+
+    # Create the DAO
+    dao = AsyncMovieDAO(current_app.async_driver, get_db_name())
+
+    # Get the Genre
+    output = await run_async(dao.get_by_genre(name, sort, order, limit, skip, user_id, after, fields))
+
+    set_next_cursor(output, sort, order, limit)
+
+    return jsonify(output)
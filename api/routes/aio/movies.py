@@ -0,0 +1,122 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import current_user, jwt_required
+
+from api.neo4j import get_db_name, run_async
+from api.pagination import get_cursor, set_next_cursor
+from api.fields import get_fields
+from api.guards import get_requested_ids
+from api.dao.aio.movies import AsyncMovieDAO
+from api.dao.aio.ratings import AsyncRatingDAO
+
+movie_routes = Blueprint("movies", __name__, url_prefix="/api/movies")
+
+@movie_routes.get('/')
+@jwt_required(optional=True)
+async def get_movies():
+    # Look up a batch of movies by ID
+    if "ids" in request.args:
+        return await get_movies_for_ids()
+
+    # Extract pagination values from the request
+    sort = request.args.get("sort", "title")
+    order = request.args.get("order", "ASC")
+    limit = request.args.get("limit", 6, type=int)
+    skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
+    fields = get_fields(sort)
+
+    # Get User ID from JWT Auth
+    user_id = current_user["sub"] if current_user != None else None
+
+    # Create a new AsyncMovieDAO Instance
+    dao = AsyncMovieDAO(current_app.async_driver, get_db_name())
+
+    # Retrieve a paginated list of movies
+    output = await run_async(dao.all(sort, order, limit=limit, skip=skip, user_id=user_id, after=after, fields=fields))
+
+    # Hand out the cursor for the next page
+    set_next_cursor(output, sort, order, limit)
+
+    # Return as JSON
+    return jsonify(output)
+
+
+@movie_routes.post('/')
+@jwt_required(optional=True)
+async def get_movies_by_ids():
+    return await get_movies_for_ids()
+
+
+async def get_movies_for_ids():
+    # Extract the IDs from the query string or the body
+    ids = get_requested_ids()
+    fields = get_fields()
+
+    # Get User ID from JWT Auth
+    user_id = current_user["sub"] if current_user != None else None
+
+    dao = AsyncMovieDAO(current_app.async_driver, get_db_name())
+
+    # Get the movies in the order they were requested
+    output = await run_async(dao.get_by_ids(ids, user_id, fields))
+
+    return jsonify(output)
+
+
+@movie_routes.get('/<movie_id>')
+@jwt_required(optional=True)
+async def get_movie_details(movie_id):
+    # Get User ID from JWT Auth
+    user_id = current_user["sub"] if current_user != None else None
+
+    # Extract the properties and number of actors and directors to return
+    fields = get_fields()
+    actors_limit = request.args.get("actors_limit", type=int)
+    directors_limit = request.args.get("directors_limit", type=int)
+
+    # Create a new AsyncMovieDAO Instance
+    dao = AsyncMovieDAO(current_app.async_driver, get_db_name())
+
+    # Get the Movie
+    movie = await run_async(dao.find_by_id(movie_id, user_id, fields, actors_limit, directors_limit))
+
+    return jsonify(movie)
+
+
+@movie_routes.get('/<movie_id>/ratings')
+async def get_movie_ratings(movie_id):
+    # Extract pagination values from the request
+    sort = request.args.get("sort", "timestamp")
+    order = request.args.get("order", "ASC")
+    limit = request.args.get("limit", 6, type=int)
+    skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
+
+    # Create a new AsyncRatingDAO Instance
+    dao = AsyncRatingDAO(current_app.async_driver, get_db_name())
+
+    # Get ratings for the movie
+    ratings = await run_async(dao.for_movie(movie_id, sort, order, limit, skip, after))
+
+    set_next_cursor(ratings, sort, order, limit, get_id=lambda review: review["user"]["userId"])
+
+    return jsonify(ratings)
+
+
+@movie_routes.get('/<movie_id>/similar')
+@jwt_required(optional=True)
+async def get_similar_movies(movie_id):
+    # Get User ID from JWT Auth
+    user_id = current_user["sub"] if current_user != None else None
+
+    # Extract pagination values from the request
+    limit = request.args.get("limit", 6, type=int)
+    skip = request.args.get("skip", 0, type=int)
+
+    # Create a new AsyncMovieDAO Instance
+    dao = AsyncMovieDAO(current_app.async_driver, get_db_name())
+
+    # Get Similar Movies
+    output = await run_async(dao.get_similar_movies(movie_id, limit, skip, user_id))
+
+    return jsonify(output)
@@ -0,0 +1,91 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import current_user, jwt_required
+
+from api.neo4j import get_db_name, run_async
+from api.pagination import get_cursor, set_next_cursor
+from api.fields import get_fields
+from api.dao.aio.people import AsyncPeopleDAO
+from api.dao.aio.movies import AsyncMovieDAO
+
+people_routes = Blueprint("people", __name__, url_prefix="/api/people")
+
+@people_routes.route('/', methods=['GET'])
+async def get_index():
+    # Get Pagination Values
+    q = request.args.get("q")
+    sort = request.args.get("sort", "name")
+    order = request.args.get("order", "ASC")
+    limit = request.args.get("limit", 6, type=int)
+    skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
+
+    # Create an instance of the AsyncPeopleDAO
+    dao = AsyncPeopleDAO(current_app.async_driver, get_db_name())
+
+    # Get output
+    output = await run_async(dao.all(q, sort, order, limit, skip, after))
+
+    set_next_cursor(output, sort, order, limit)
+
+    return jsonify(output)
+
+
+@people_routes.get('/<id>')
+async def get_person(id):
+    # Create an instance of the AsyncPeopleDAO
+    dao = AsyncPeopleDAO(current_app.async_driver, get_db_name())
+
+    # Get the person
+    person = await run_async(dao.find_by_id(id))
+
+    return jsonify(person)
+
+
+@people_routes.get('/<id>/similar')
+async def get_similar_people(id):
+    # Get Pagination Values
+    limit = request.args.get("limit", 6, type=int)
+    skip = request.args.get("skip", 0, type=int)
+
+    # Create an instance of the AsyncPeopleDAO
+    dao = AsyncPeopleDAO(current_app.async_driver, get_db_name())
+
+    # Get the person
+    similar = await run_async(dao.get_similar_people(id, limit, skip))
+
+    return jsonify(similar)
+
+
+@people_routes.get('/<id>/acted')
+@jwt_required(optional=True)
+async def get_movies_acted_in(id):
+    return await get_movies_for_person(id, AsyncMovieDAO.get_for_actor)
+
+
+@people_routes.get('/<id>/directed')
+@jwt_required(optional=True)
+async def get_movies_directed(id):
+    return await get_movies_for_person(id, AsyncMovieDAO.get_for_director)
+
+
+async def get_movies_for_person(id, method):
+    # Get User ID from JWT Auth
+    user_id = current_user["sub"] if current_user != None else None
+
+    # Get Pagination Values
+    sort = request.args.get("sort", "title")
+    order = request.args.get("order", "ASC")
+    limit = request.args.get("limit", 6, type=int)
+    skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
+    fields = get_fields(sort)
+
+    # Create the DAO
+    dao = AsyncMovieDAO(current_app.async_driver, get_db_name())
+
+    # Get the movies
+    output = await run_async(method(dao, id, sort, order, limit, skip, user_id, after, fields))
+
+    set_next_cursor(output, sort, order, limit)
+
+    return jsonify(output)
@@ -1,6 +1,7 @@
 from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import current_user
 
+from api.neo4j import get_db_name
 from api.dao.auth import AuthDAO
 
 auth_routes = Blueprint("auth", __name__, url_prefix="/api/auth")
@@ -13,7 +14,7 @@ def register():
     password = form_data['password']
     name = form_data['name']
 
-    dao = AuthDAO(current_app.driver, current_app.config.get('SECRET_KEY'))
+    dao = AuthDAO(current_app.driver, current_app.config.get('SECRET_KEY'), get_db_name())
 
     user = dao.register(email, password, name)
 
@@ -27,7 +28,7 @@ def login():
     email = form_data['email']
     password = form_data['password']
 
-    dao = AuthDAO(current_app.driver, current_app.config.get('SECRET_KEY'))
+    dao = AuthDAO(current_app.driver, current_app.config.get('SECRET_KEY'), get_db_name())
 
     user = dao.authenticate(email, password)
 
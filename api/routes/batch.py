@@ -0,0 +1,19 @@
+from flask import Blueprint, current_app, request, jsonify
+
+from api.exceptions.badrequest import BadRequestException
+
+batch_routes = Blueprint("batch", __name__, url_prefix="/api/batch")
+
+@batch_routes.post('/')
+def run_batch():
+    # Extract the requests from the body
+    form_data = request.get_json(silent=True) or {}
+    requests = form_data.get("requests")
+
+    if not isinstance(requests, list):
+        raise BadRequestException("'requests' must be a list of GET requests")
+
+    # Run the requests concurrently and answer each one in order
+    responses = current_app.batch.run(current_app._get_current_object(), request.environ, requests)
+
+    return jsonify({ "responses": responses })
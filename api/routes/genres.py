@@ -1,6 +1,9 @@
 from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import current_user, jwt_required
 
+from api.neo4j import get_db_name
+from api.pagination import get_cursor, set_next_cursor
+from api.fields import get_fields
 from api.dao.genres import GenreDAO
 from api.dao.movies import MovieDAO
 
@@ -9,7 +12,7 @@ genre_routes = Blueprint("genre", __name__, url_prefix="/api/genres")
 @genre_routes.get('/')
 def get_index():
     # Create the DAO
-    dao = GenreDAO(current_app.driver)
+    dao = GenreDAO(current_app.driver, get_db_name())
 
     # Get output
     output = dao.all()
@@ -19,7 +22,7 @@ def get_index():
 @genre_routes.get('/<name>/')
 def get_genre(name):
     # Create the DAO
-    dao = GenreDAO(current_app.driver)
+    dao = GenreDAO(current_app.driver, get_db_name())
 
     # Get the Genre
     output = dao.find(name)
@@ -37,12 +40,16 @@ def get_genre_movies(name):
     order = request.args.get("order", "ASC")
     limit = request.args.get("limit", 6, type=int)
     skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
+    fields = get_fields(sort)
 
     # Create the DAO
-    dao = MovieDAO(current_app.driver)
+    dao = MovieDAO(current_app.driver, get_db_name())
 
     # Get the Genre
-    output = dao.get_by_genre(name, sort, order, limit, skip, user_id)
+    output = dao.get_by_genre(name, sort, order, limit, skip, user_id, after, fields)
+
+    set_next_cursor(output, sort, order, limit)
 
     return jsonify(output)
 
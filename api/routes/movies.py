@@ -1,6 +1,10 @@
 from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import current_user, jwt_required
 
+from api.neo4j import get_db_name
+from api.pagination import get_cursor, set_next_cursor
+from api.fields import get_fields
+from api.guards import get_requested_ids
 from api.dao.movies import MovieDAO
 from api.dao.ratings import RatingDAO
 
@@ -10,37 +14,73 @@ movie_routes = Blueprint("movies", __name__, url_prefix="/api/movies")
 @movie_routes.get('/')
 @jwt_required(optional=True)
 def get_movies():
+    # Look up a batch of movies by ID
+    if "ids" in request.args:
+        return get_movies_for_ids()
+
     # Extract pagination values from the request
     sort = request.args.get("sort", "title")
     order = request.args.get("order", "ASC")
     limit = request.args.get("limit", 6, type=int)
     skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
+    fields = get_fields(sort)
 
     # Get User ID from JWT Auth
     user_id = current_user["sub"] if current_user != None else None
 
     # Create a new MovieDAO Instance
-    dao = MovieDAO(current_app.driver)
+    dao = MovieDAO(current_app.driver, get_db_name())
 
     # Retrieve a paginated list of movies
-    output = dao.all(sort, order, limit=limit, skip=skip, user_id=user_id)
+    output = dao.all(sort, order, limit=limit, skip=skip, user_id=user_id, after=after, fields=fields)
+
+    # Hand out the cursor for the next page
+    set_next_cursor(output, sort, order, limit)
 
     # Return as JSON
     return jsonify(output)
 # end::list[]
 
 
+@movie_routes.post('/')
+@jwt_required(optional=True)
+def get_movies_by_ids():
+    return get_movies_for_ids()
+
+
+def get_movies_for_ids():
+    # Extract the IDs from the query string or the body
+    ids = get_requested_ids()
+    fields = get_fields()
+
+    # Get User ID from JWT Auth
+    user_id = current_user["sub"] if current_user != None else None
+
+    dao = MovieDAO(current_app.driver, get_db_name())
+
+    # Get the movies in the order they were requested
+    output = dao.get_by_ids(ids, user_id, fields)
+
+    return jsonify(output)
+
+
 @movie_routes.get('/<movie_id>')
 @jwt_required(optional=True)
 def get_movie_details(movie_id):
     # Get User ID from JWT Auth
     user_id = current_user["sub"] if current_user != None else None
 
+    # Extract the properties and number of actors and directors to return
+    fields = get_fields()
+    actors_limit = request.args.get("actors_limit", type=int)
+    directors_limit = request.args.get("directors_limit", type=int)
+
     # Create a new MovieDAO Instance
-    dao = MovieDAO(current_app.driver)
+    dao = MovieDAO(current_app.driver, get_db_name())
 
     # Get the Movie
-    movie = dao.find_by_id(movie_id, user_id)
+    movie = dao.find_by_id(movie_id, user_id, fields, actors_limit, directors_limit)
 
     return jsonify(movie)
 
@@ -52,12 +92,15 @@ def get_movie_ratings(movie_id):
     order = request.args.get("order", "ASC")
     limit = request.args.get("limit", 6, type=int)
     skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
 
     # Create a new RatingDAO Instance
-    dao = RatingDAO(current_app.driver)
+    dao = RatingDAO(current_app.driver, get_db_name())
 
     # Get ratings for the movie
-    ratings = dao.for_movie(movie_id, sort, order, limit, skip)
+    ratings = dao.for_movie(movie_id, sort, order, limit, skip, after)
+
+    set_next_cursor(ratings, sort, order, limit, get_id=lambda review: review["user"]["userId"])
 
     return jsonify(ratings)
 
@@ -73,7 +116,7 @@ def get_similar_movies(movie_id):
     skip = request.args.get("skip", 0, type=int)
 
     # Create a new MovieDAO Instance
-    dao = MovieDAO(current_app.driver)
+    dao = MovieDAO(current_app.driver, get_db_name())
 
     # Get Similar Movies
     output = dao.get_similar_movies(movie_id, limit, skip, user_id)
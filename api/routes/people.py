@@ -1,6 +1,11 @@
 from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import current_user, jwt_required
 
+from api.neo4j import get_db_name
+from api.pagination import get_cursor, set_next_cursor
+from api.fields import get_fields
 from api.dao.people import PeopleDAO
+from api.dao.movies import MovieDAO
 
 people_routes = Blueprint("people", __name__, url_prefix="/api/people")
 
@@ -8,16 +13,19 @@ people_routes = Blueprint("people", __name__, url_prefix="/api/people")
 def get_index():
     # Get Pagination Values
     q = request.args.get("q")
-    sort = request.args.get("sort", "title")
+    sort = request.args.get("sort", "name")
     order = request.args.get("order", "ASC")
     limit = request.args.get("limit", 6, type=int)
     skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
 
     # Create an instance of the PeopleDAO
-    dao = PeopleDAO(current_app.driver)
+    dao = PeopleDAO(current_app.driver, get_db_name())
 
     # Get output
-    output = dao.all(q, sort, order, limit, skip)
+    output = dao.all(q, sort, order, limit, skip, after)
+
+    set_next_cursor(output, sort, order, limit)
 
     return jsonify(output)
 
@@ -25,7 +33,7 @@ def get_index():
 @people_routes.get('/<id>')
 def get_person(id):
     # Create an instance of the PeopleDAO
-    dao = PeopleDAO(current_app.driver)
+    dao = PeopleDAO(current_app.driver, get_db_name())
 
     # Get the person
     person = dao.find_by_id(id)
@@ -40,10 +48,45 @@ def get_similar_people(id):
     skip = request.args.get("skip", 0, type=int)
 
     # Create an instance of the PeopleDAO
-    dao = PeopleDAO(current_app.driver)
+    dao = PeopleDAO(current_app.driver, get_db_name())
 
     # Get the person
     similar = dao.get_similar_people(id, limit, skip)
 
     return jsonify(similar)
 
+
+@people_routes.get('/<id>/acted')
+@jwt_required(optional=True)
+def get_movies_acted_in(id):
+    return get_movies_for_person(id, MovieDAO.get_for_actor)
+
+
+@people_routes.get('/<id>/directed')
+@jwt_required(optional=True)
+def get_movies_directed(id):
+    return get_movies_for_person(id, MovieDAO.get_for_director)
+
+
+def get_movies_for_person(id, method):
+    # Get User ID from JWT Auth
+    user_id = current_user["sub"] if current_user != None else None
+
+    # Get Pagination Values
+    sort = request.args.get("sort", "title")
+    order = request.args.get("order", "ASC")
+    limit = request.args.get("limit", 6, type=int)
+    skip = request.args.get("skip", 0, type=int)
+    after = get_cursor(sort, order)
+    fields = get_fields(sort)
+
+    # Create the DAO
+    dao = MovieDAO(current_app.driver, get_db_name())
+
+    # Get the movies
+    output = method(dao, id, sort, order, limit, skip, user_id, after, fields)
+
+    set_next_cursor(output, sort, order, limit)
+
+    return jsonify(output)
+
@@ -1,14 +1,79 @@
 from flask import Blueprint, current_app, jsonify
 
+from api.neo4j import get_db_name, get_pool_metrics, get_readiness, get_workload_metrics
+from api.migrations import MIGRATIONS, get_applied, get_index_progress
+
 status_routes = Blueprint("status", __name__, url_prefix="/api/status")
 
 @status_routes.route('/', methods=['GET'])
 def get_index():
     return jsonify({
         "driver": current_app.driver is not None,
+        "ready": current_app.readiness.ready,
         "NEO4J_URI": current_app.config.get('NEO4J_URI'),
         "NEO4J_USERNAME": current_app.config.get('NEO4J_USERNAME'),
         "NEO4J_PASSWORD": current_app.config.get('NEO4J_PASSWORD'),
         "NEO4J_DATABASE": current_app.config.get('NEO4J_DATABASE'),
         "JWT_SECRET": current_app.config.get('JWT_SECRET'),
-    })
\ No newline at end of file
+    })
+
+
+@status_routes.route('/pool', methods=['GET'])
+def get_pool():
+    return jsonify(get_pool_metrics())
+
+
+@status_routes.route('/workloads', methods=['GET'])
+def get_workloads():
+    return jsonify(get_workload_metrics())
+
+
+@status_routes.route('/hedging', methods=['GET'])
+def get_hedging():
+    return jsonify(current_app.hedging.snapshot())
+
+
+@status_routes.route('/caches', methods=['GET'])
+def get_caches():
+    return jsonify({
+        "favorites": current_app.favorite_cache.snapshot(),
+        "genres": current_app.genre_cache.snapshot(),
+        "movies": current_app.movie_cache.snapshot(),
+        "etags": current_app.etags.snapshot(),
+        "responses": current_app.response_cache.snapshot(),
+        "user_versions": current_app.user_versions.snapshot(),
+    })
+
+
+@status_routes.route('/guards', methods=['GET'])
+def get_guards():
+    return jsonify(current_app.guard_metrics.snapshot())
+
+
+@status_routes.route('/schema', methods=['GET'])
+def get_schema():
+    applied = get_applied(current_app.driver, get_db_name())
+
+    return jsonify({
+        "migrations": [
+            {
+                "version": migration.version,
+                "description": migration.description,
+                "appliedAt": applied.get(migration.version),
+            }
+            for migration in MIGRATIONS
+        ],
+        "indexes": get_index_progress(current_app.driver, get_db_name()),
+    })
+
+
+@status_routes.route('/live', methods=['GET'])
+def get_live():
+    return jsonify({"live": True})
+
+
+@status_routes.route('/ready', methods=['GET'])
+def get_ready():
+    readiness = get_readiness()
+
+    return jsonify(readiness), 200 if readiness["ready"] else 503
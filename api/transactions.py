@@ -0,0 +1,209 @@
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, has_request_context
+
+from neo4j import READ_ACCESS, WRITE_ACCESS
+
+from api.bookmarks import get_bookmarks, record_bookmarks
+from api.deadlines import bound_timeout, deadline_errors, get_remaining, get_session_deadline
+from api.workloads import enter_workload, get_workload, with_timeout
+from api.hedging import cancellable, get_hedge
+
+"""
+Run units of work against Neo4j on behalf of the DAOs.
+
+Every DAO goes through `execute_read` or `execute_write` rather than opening
+sessions itself, so decisions about where a transaction is routed and which
+bookmarks it waits for are made in one place.
+
+Within a Flask request all transactions share one lazily opened session,
+stored on `flask.g` and closed when the request is torn down, so a request
+that calls several DAOs checks a connection out of the pool per transaction
+without paying for a new session each time.
+"""
+
+# Reads are routed to followers and read replicas, writes to the leader
+FOLLOWERS = "followers"
+# Every transaction, read or write, is routed to the leader
+LEADER = "leader"
+
+ROUTING_MODES = (FOLLOWERS, LEADER)
+
+
+"""
+Get the read routing mode from the app config, defaulting to `followers`
+when called outside of an app context.
+"""
+def get_read_routing():
+    if not has_app_context():
+        return FOLLOWERS
+
+    return current_app.config.get('NEO4J_READ_ROUTING') or FOLLOWERS
+
+
+"""
+Get the access mode that read sessions are opened with
+"""
+def get_read_access_mode():
+    return WRITE_ACCESS if get_read_routing() == LEADER else READ_ACCESS
+
+
+"""
+Get the options a session is opened with: its access mode, the bookmarks to
+wait for, and limits on connection acquisition and retries derived from the
+deadline of the request.
+"""
+def get_session_options(access_mode):
+    return dict(default_access_mode=access_mode, bookmarks=get_bookmarks(), **get_session_deadline())
+
+
+"""
+Get the session for the current request, opening it on first use.  The
+session defaults to the read access mode.  Sessions are kept per driver, so
+a request that also reads through a workload with its own driver, such as
+the aggregation workload, holds one session for each.
+"""
+def get_request_session(driver, database):
+    sessions = g.setdefault("neo4j_sessions", {})
+    key = (id(driver), database)
+
+    if key not in sessions:
+        sessions[key] = driver.session(database=database, **get_session_options(get_read_access_mode()))
+
+    return sessions[key]
+
+
+"""
+Close the sessions opened during the request.  Registered as an app context
+teardown function.
+"""
+def close_request_sessions(exception=None):
+    for session in g.pop("neo4j_sessions", {}).values():
+        session.close()
+
+
+"""
+Use the request session when there is one, otherwise open a session that is
+closed again once the unit of work has finished.
+"""
+@contextmanager
+def open_session(driver, database, access_mode):
+    if has_request_context():
+        yield get_request_session(driver, database)
+    else:
+        with driver.session(database=database, **get_session_options(access_mode)) as session:
+            yield session
+
+
+"""
+Execute a unit of work within a read transaction.  With a routing driver
+(`neo4j://`) the transaction is sent to a follower or read replica, unless
+`NEO4J_READ_ROUTING` is set to `leader`.  The transaction waits for any
+bookmarks passed in with the request, and runs on the pool and within the
+limits of the workload class of the calling DAO method.
+
+Reads from methods tagged with `@hedged` are hedged when hedging is enabled.
+Each attempt runs on its own session, as sessions cannot be shared between
+threads.
+
+The transaction and the wait for a connection are bounded by the deadline
+of the request; running out of time raises a `DeadlineExceededException`.
+"""
+def execute_read(driver, database, work, *args, **kwargs):
+    with deadline_errors(), enter_workload(driver) as (driver, timeout):
+        access_mode = get_read_access_mode()
+        work = with_timeout(work, timeout)
+        hedge = get_hedge()
+
+        if hedge is not None:
+            name, hedging = hedge
+
+            def attempt(cancelled):
+                with driver.session(database=database, **get_session_options(access_mode)) as session:
+                    return run_read(session, access_mode, cancellable(work, cancelled), *args, **kwargs)
+
+            return hedging.run(name, attempt, get_workload())
+
+        with open_session(driver, database, access_mode) as session:
+            return run_read(session, access_mode, work, *args, **kwargs)
+
+
+"""
+Run a read on a session, as a write transaction when reads are routed to
+the leader.
+"""
+def run_read(session, access_mode, work, *args, **kwargs):
+    if access_mode == WRITE_ACCESS:
+        return session.execute_write(work, *args, **kwargs)
+
+    return session.execute_read(work, *args, **kwargs)
+
+
+"""
+Execute a unit of work within a write transaction on the leader, and record
+the bookmark it produces so it can be issued to the client.
+"""
+def execute_write(driver, database, work, *args, **kwargs):
+    with deadline_errors(), enter_workload(driver) as (driver, timeout):
+        with open_session(driver, database, WRITE_ACCESS) as session:
+            output = session.execute_write(with_timeout(work, timeout), *args, **kwargs)
+
+            record_bookmarks(session.last_bookmarks())
+
+            return output
+
+
+"""
+Async versions of `execute_read` and `execute_write` for the async DAOs.
+
+Async DAO calls within one request may run concurrently, and a session must
+not be used by more than one coroutine at a time, so these open a session
+per unit of work.  Only the transaction timeout of a workload class applies
+to the async driver; pools and concurrency caps are per sync driver.
+"""
+def get_workload_timeout():
+    workload = get_workload()
+
+    return bound_timeout(workload.timeout if workload is not None else None, get_remaining())
+
+
+async def execute_read_async(driver, database, work, *args, **kwargs):
+    with deadline_errors():
+        return await run_read_async(driver, database, work, *args, **kwargs)
+
+
+async def run_read_async(driver, database, work, *args, **kwargs):
+    access_mode = get_read_access_mode()
+    work = with_timeout(work, get_workload_timeout())
+
+    async def attempt():
+        async with driver.session(database=database, **get_session_options(access_mode)) as session:
+            if access_mode == WRITE_ACCESS:
+                return await session.execute_write(work, *args, **kwargs)
+
+            return await session.execute_read(work, *args, **kwargs)
+
+    hedge = get_hedge()
+
+    if hedge is not None:
+        name, hedging = hedge
+
+        return await hedging.run_async(name, attempt)
+
+    return await attempt()
+
+
+async def execute_write_async(driver, database, work, *args, **kwargs):
+    with deadline_errors():
+        return await run_write_async(driver, database, work, *args, **kwargs)
+
+
+async def run_write_async(driver, database, work, *args, **kwargs):
+    work = with_timeout(work, get_workload_timeout())
+
+    async with driver.session(database=database, **get_session_options(WRITE_ACCESS)) as session:
+        output = await session.execute_write(work, *args, **kwargs)
+
+        record_bookmarks(await session.last_bookmarks())
+
+        return output
@@ -0,0 +1,236 @@
+import functools
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context, make_response, request
+from flask_jwt_extended import current_user
+
+from api.neo4j import get_db_name, run_async
+from api.queries import get_query
+from api.transactions import execute_read, execute_read_async
+
+"""
+Per-user version counters for revalidating a user's lists.
+
+Every write that changes what a user sees in their own lists, adding or
+removing a favorite or rating a movie, also increments `version` on the
+User node in the same transaction.  Routes decorated with `versioned`
+answer with a weak `ETag` built from the user's version and the URL, and a
+request whose `If-None-Match` matches it gets a `304 Not Modified` without
+running the route.
+
+The version of each user is kept in a per-worker map, updated from the
+writes made through this worker and reloaded after `ttl` seconds, so a
+revalidation usually costs no query at all and otherwise one lookup of the
+User node by its unique `userId`.  When a route does run, the version is
+read from the database first, so the `ETag` it returns is never newer than
+its body.
+"""
+
+
+class UserVersions:
+    def __init__(self, max_users=10000, ttl=5):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.lock = threading.Lock()
+
+    """
+    Get the version of a user, or None if it is not known or has expired
+    """
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+
+            if entry is None or entry[0] < time.monotonic():
+                self.entries.pop(user_id, None)
+                self.misses += 1
+
+                return None
+
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+
+            return entry[1]
+
+    """
+    Record the version of a user, unless a newer one is already known
+    """
+    def set(self, user_id, version):
+        with self.lock:
+            entry = self.entries.get(user_id)
+
+            if entry is not None and entry[1] > version:
+                return
+
+            self.entries[user_id] = (time.monotonic() + self.ttl, version)
+            self.entries.move_to_end(user_id)
+
+            while len(self.entries) > self.max_users:
+                self.entries.popitem(last=False)
+
+    def record_not_modified(self):
+        with self.lock:
+            self.not_modified += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "users": len(self.entries),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
+
+
+"""
+Get the user version map of the current app, if it has one
+"""
+def get_user_versions():
+    if not has_app_context():
+        return None
+
+    return getattr(current_app, "user_versions", None)
+
+
+"""
+Remember the version of a user returned by a write
+"""
+def record_version(user_id, version):
+    versions = get_user_versions()
+
+    if versions is not None and version is not None:
+        versions.set(user_id, version)
+
+
+"""
+Read the version of a user from the database
+"""
+def load_version(user_id):
+    row = execute_read(current_app.driver, get_db_name(), lambda tx: get_query("users.version").run(
+        tx, userId=user_id
+    ).single())
+
+    version = row["version"] if row is not None else 0
+
+    record_version(user_id, version)
+
+    return version
+
+
+async def load_version_async(user_id):
+    async def get_user_version(tx):
+        result = await get_query("users.version").run(tx, userId=user_id)
+
+        return await result.single()
+
+    row = await run_async(execute_read_async(current_app.async_driver, get_db_name(), get_user_version))
+
+    version = row["version"] if row is not None else 0
+
+    record_version(user_id, version)
+
+    return version
+
+
+"""
+Get the version of a user known to this worker, or None if it has to be
+read from the database
+"""
+def get_known_version(user_id):
+    versions = get_user_versions()
+
+    return versions.get(user_id) if versions is not None else None
+
+
+"""
+Build the weak ETag of the current URL for a user at a version
+"""
+def get_etag(user_id, version):
+    digest = hashlib.sha256("{0}\n{1}".format(user_id, request.full_path).encode("utf8")).hexdigest()[:16]
+
+    return "v{0}-{1}".format(version, digest)
+
+
+"""
+Build a 304 response if the client has the ETag of the user's version
+"""
+def get_not_modified(user_id, version):
+    etag = get_etag(user_id, version)
+
+    if not request.if_none_match.contains_weak(etag):
+        return None
+
+    versions = get_user_versions()
+
+    if versions is not None:
+        versions.record_not_modified()
+
+    return tag_response(current_app.response_class(status=304), etag)
+
+
+"""
+Add the ETag of the user's version to a successful response
+"""
+def tag_response(response, etag):
+    response = make_response(response)
+
+    if response.status_code in (200, 304):
+        response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = "private, no-cache"
+
+    return response
+
+
+"""
+Decorate a route that lists the signed in user's own data so that it can
+be revalidated against their version.  Apply it below `jwt_required`.
+"""
+def versioned(view):
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapped(*args, **kwargs):
+            user_id = current_user["sub"]
+
+            if request.if_none_match:
+                version = get_known_version(user_id)
+
+                if version is None:
+                    version = await load_version_async(user_id)
+
+                not_modified = get_not_modified(user_id, version)
+
+                if not_modified is not None:
+                    return not_modified
+
+            etag = get_etag(user_id, await load_version_async(user_id))
+
+            return tag_response(await view(*args, **kwargs), etag)
+    else:
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            user_id = current_user["sub"]
+
+            if request.if_none_match:
+                version = get_known_version(user_id)
+
+                if version is None:
+                    version = load_version(user_id)
+
+                not_modified = get_not_modified(user_id, version)
+
+                if not_modified is not None:
+                    return not_modified
+
+            etag = get_etag(user_id, load_version(user_id))
+
+            return tag_response(view(*args, **kwargs), etag)
+
+    return wrapped
@@ -0,0 +1,199 @@
+import functools
+import inspect
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, has_app_context
+
+from neo4j import unit_of_work
+
+from api.deadlines import bound_timeout, get_remaining
+from api.exceptions.unavailable import ServiceUnavailableException
+
+"""
+Isolate workloads with different latency profiles from each other.
+
+DAO methods are tagged with a workload class using the `@workload` decorator.
+Each class can have its own connection pool (a dedicated driver), a cap on
+the number of its transactions running at the same time, and a transaction
+timeout, so that a spike of heavy aggregation queries cannot take the
+connections needed by logins and detail pages.
+
+Untagged methods belong to the `interactive` class, which uses the app's
+main driver.
+"""
+
+INTERACTIVE = "interactive"
+AGGREGATION = "aggregation"
+
+SETTINGS = ("pool_size", "concurrency", "timeout")
+
+DEFAULT_WORKLOADS = {
+    # `pool_size` of None shares the main driver and its pool
+    INTERACTIVE: { "pool_size": None, "concurrency": None, "timeout": 10 },
+    AGGREGATION: { "pool_size": 10, "concurrency": 4, "timeout": 30 },
+}
+
+current_workload = ContextVar("neo4j_workload", default=INTERACTIVE)
+
+
+"""
+Tag a DAO method with the workload class its transactions belong to
+"""
+def workload(name):
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def wrapped(*args, **kwargs):
+                token = current_workload.set(name)
+
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    current_workload.reset(token)
+        else:
+            @functools.wraps(method)
+            def wrapped(*args, **kwargs):
+                token = current_workload.set(name)
+
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    current_workload.reset(token)
+
+        return wrapped
+
+    return decorator
+
+
+"""
+Build the settings for each workload class from the defaults, environment
+variables named `NEO4J_WORKLOAD_<CLASS>_<SETTING>` (for example
+`NEO4J_WORKLOAD_AGGREGATION_POOL_SIZE`) and the `NEO4J_WORKLOADS` app config.
+"""
+def get_workload_settings(config):
+    workloads = { name: dict(settings) for name, settings in DEFAULT_WORKLOADS.items() }
+
+    for name, settings in workloads.items():
+        for setting in SETTINGS:
+            value = os.getenv("NEO4J_WORKLOAD_{0}_{1}".format(name, setting).upper())
+
+            if value:
+                settings[setting] = float(value) if setting == "timeout" else int(value)
+
+    for name, settings in (config.get('NEO4J_WORKLOADS') or {}).items():
+        workloads.setdefault(name, { setting: None for setting in SETTINGS }).update(settings)
+
+    return workloads
+
+
+class Workload:
+    def __init__(self, name, driver=None, concurrency=None, timeout=None, pool_metrics=None):
+        self.name = name
+        self.driver = driver
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.pool_metrics = pool_metrics
+        self.slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+        self.active = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    """
+    Take one of the workload's concurrency slots, waiting at most for the
+    transaction timeout or `wait` seconds, whichever is shorter.  Returns
+    False if no slot became free in time.
+    """
+    def enter(self, wait=None):
+        if self.slots is not None and not self.slots.acquire(timeout=bound_timeout(self.timeout, wait)):
+            with self.lock:
+                self.rejected += 1
+
+            return False
+
+        with self.lock:
+            self.active += 1
+
+        return True
+
+    """
+    Take a concurrency slot only if one is free right away, without counting
+    a rejection when none is
+    """
+    def try_enter(self):
+        if self.slots is not None and not self.slots.acquire(blocking=False):
+            return False
+
+        with self.lock:
+            self.active += 1
+
+        return True
+
+    def exit(self):
+        with self.lock:
+            self.active -= 1
+
+        if self.slots is not None:
+            self.slots.release()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "dedicated_pool": self.driver is not None,
+                "concurrency": self.concurrency,
+                "timeout": self.timeout,
+                "active": self.active,
+                "rejected": self.rejected,
+                "pool": self.pool_metrics.snapshot() if self.pool_metrics else None,
+            }
+
+
+"""
+Get the workload class of the DAO method currently running, if the app has
+workloads configured.
+"""
+def get_workload():
+    if not has_app_context():
+        return None
+
+    return getattr(current_app, "workloads", {}).get(current_workload.get())
+
+
+"""
+Apply the transaction timeout of a workload to a unit of work
+"""
+def with_timeout(work, timeout):
+    if timeout is None:
+        return work
+
+    return unit_of_work(timeout=timeout)(work)
+
+
+"""
+Enter the current workload for the duration of a transaction.
+
+Yields the driver to run the transaction on, which is the workload's own
+driver if it has a dedicated pool, and the transaction timeout: the
+workload's timeout, cut short by the deadline of the request.  Raises a
+`ServiceUnavailableException` when the workload is at its concurrency cap
+for longer than its timeout or the time left.
+"""
+@contextmanager
+def enter_workload(driver):
+    workload = get_workload()
+
+    if workload is None:
+        yield driver, get_remaining()
+        return
+
+    if not workload.enter(get_remaining()):
+        raise ServiceUnavailableException(
+            "Too many {0} queries in progress, please try again".format(workload.name)
+        )
+
+    try:
+        yield workload.driver or driver, bound_timeout(workload.timeout, get_remaining())
+    finally:
+        workload.exit()
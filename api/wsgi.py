@@ -0,0 +1,14 @@
+from dotenv import load_dotenv
+
+from api import create_app
+
+"""
+WSGI entry point for production servers.
+
+The app is created without connecting to Neo4j so that it can be preloaded
+in a prefork master.  Each worker creates its own drivers by calling
+`init_neo4j` after the fork, see `gunicorn.conf.py`.
+"""
+load_dotenv()
+
+app = create_app(connect=False)
@@ -0,0 +1,69 @@
+"""
+Compare requests per second between the sync and async API paths.
+
+Both apps are created in-process against the database configured in `.env`
+and driven through the Flask test client from a pool of threads, so the
+numbers reflect the DAO, driver and view overhead rather than a web server.
+
+    python benchmarks/async_vs_sync.py --concurrency 200 --requests 5000
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api import create_app
+
+PATHS = [
+    "/api/movies/?sort=imdbRating&order=DESC&limit=6",
+    "/api/movies/769",
+    "/api/genres/",
+    "/api/genres/Action/movies?limit=6",
+]
+
+
+def run(app, concurrency, total):
+    def worker(i):
+        with app.test_client() as client:
+            res = client.get(PATHS[i % len(PATHS)])
+
+            return res.status_code
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Warm up the pool and the query plans before measuring
+        list(executor.map(worker, range(concurrency)))
+
+        start = time.perf_counter()
+        statuses = list(executor.map(worker, range(total)))
+        elapsed = time.perf_counter() - start
+
+    errors = sum(1 for status in statuses if status >= 500)
+
+    return total / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    for mode in (False, True):
+        app = create_app({'TESTING': True, 'NEO4J_ASYNC': mode})
+
+        rps, errors = run(app, args.concurrency, args.requests)
+
+        print("{0:>5}: {1:8.1f} req/s, {2} errors ({3} requests, concurrency {4})".format(
+            "async" if mode else "sync", rps, errors, args.requests, args.concurrency
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import gc
+import multiprocessing
+import os
+
+"""
+Gunicorn configuration for running the API in production.
+
+    gunicorn
+
+The app code and its imports are loaded once in the master, which then
+freezes the heap with `gc.freeze()` before forking.  Frozen objects are
+never touched by the garbage collector again, so the memory pages they live
+on stay shared copy-on-write between the workers instead of being copied
+into each of them.  Every worker then creates its own Neo4j driver in
+`post_fork`, as a driver's sockets must not be shared across processes.
+"""
+
+wsgi_app = "api.wsgi:app"
+preload_app = True
+
+bind = "0.0.0.0:" + os.getenv("PORT", "8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# Keep the collector from running in the master while the app is preloaded,
+# so that objects are not moved between generations before the heap is frozen
+gc.disable()
+
+
+def when_ready(server):
+    # Called in the master after the app has been preloaded, before any
+    # worker is forked.  The collector is enabled again once the heap is
+    # frozen, so the master and the workers forked from it collect as usual
+    gc.freeze()
+    gc.enable()
+
+
+def post_fork(server, worker):
+    from api import init_neo4j
+
+    init_neo4j(worker.app.wsgi())
@@ -1,6 +1,6 @@
 import pytest
 
-from api.neo4j import get_driver
+from api.neo4j import get_driver, get_db_name
 from api.dao.genres import GenreDAO
 
 def test_return_list_of_genres(app):
@@ -11,7 +11,7 @@ def test_return_list_of_genres(app):
         driver = get_driver()
 
         # Create DAO
-        dao = GenreDAO(driver)
+        dao = GenreDAO(driver, get_db_name())
 
         # Get all genres
         output = dao.find(name)
@@ -1,6 +1,6 @@
 import pytest
 
-from api.neo4j import get_driver
+from api.neo4j import get_driver, get_db_name
 from api.dao.people import PeopleDAO
 
 
@@ -10,7 +10,7 @@ def test_should_return_paginated_list_of_people(app):
         driver = get_driver()
 
         # Create DAO
-        dao = PeopleDAO(driver)
+        dao = PeopleDAO(driver, get_db_name())
 
         # Get List
         limit = 1
@@ -37,7 +37,7 @@ def test_apply_query_filter(app):
         driver = get_driver()
 
         # Create DAO
-        dao = PeopleDAO(driver)
+        dao = PeopleDAO(driver, get_db_name())
 
         # Get Filtered List
         q = "Ab"
@@ -61,7 +61,7 @@ def test_get_outcome(app):
         driver = get_driver()
 
         # Create DAO
-        dao = PeopleDAO(driver)
+        dao = PeopleDAO(driver, get_db_name())
 
         first = dao.all(None, "name", "ASC", 1)
 
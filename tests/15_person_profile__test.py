@@ -1,6 +1,6 @@
 import pytest
 
-from api.neo4j import get_driver
+from api.neo4j import get_driver, get_db_name
 from api.dao.people import PeopleDAO
 
 coppola = "1776"
@@ -11,7 +11,7 @@ def test_should_find_person_by_id(app):
         driver = get_driver()
 
         # Create DAO
-        dao = PeopleDAO(driver)
+        dao = PeopleDAO(driver, get_db_name())
 
         # Get Francis Ford Coppola
         output = dao.find_by_id(coppola)
@@ -28,7 +28,7 @@ def test_should_return_paginated_list_of_similar_people(app):
         driver = get_driver()
 
         # Create DAO
-        dao = PeopleDAO(driver)
+        dao = PeopleDAO(driver, get_db_name())
 
         # Get Similar People
         limit = 2
@@ -0,0 +1,71 @@
+import pytest
+
+from api import create_app
+from api.metrics import Histogram, PoolMetrics
+from api.neo4j import get_driver, get_db_name, get_pool_metrics
+
+def test_pool_config_applied():
+    """Test that pool settings from the app config reach the driver"""
+    app = create_app({
+        'TESTING': True,
+        'NEO4J_MAX_CONNECTION_POOL_SIZE': 7,
+        'NEO4J_MIN_CONNECTIONS': 2,
+        # Warm the pool before create_app returns
+        'NEO4J_BACKGROUND_WARMUP': False,
+    })
+
+    with app.app_context():
+        metrics = get_pool_metrics()
+
+        assert metrics["max_size"] == 7
+        assert metrics["in_use"] + metrics["idle"] >= 2
+
+
+def test_pool_metrics_count_acquisitions(app):
+    """Test that connection checkouts are recorded"""
+    with app.app_context():
+        before = get_pool_metrics()["acquired"]
+
+        with get_driver().session(database=get_db_name()) as session:
+            session.run("RETURN 1").consume()
+
+        after = get_pool_metrics()
+
+        assert after["acquired"] > before
+        assert after["acquisition_wait"]["count"] >= after["acquired"]
+
+
+def test_pool_status_route(client):
+    """Test that pool statistics are served by the status routes"""
+    res = client.get('/api/status/pool')
+
+    assert res.status_code == 200
+    assert "in_use" in res.json
+    assert "timeouts" in res.json
+
+
+def test_pool_metrics_without_a_pool():
+    """Test that drivers without a pool to instrument report no-op metrics"""
+    metrics = PoolMetrics()
+    driver = object()
+
+    assert metrics.instrument(driver) is driver
+
+    snapshot = metrics.snapshot()
+
+    assert snapshot["instrumented"] is False
+    assert snapshot["acquired"] == 0
+    assert snapshot["in_use"] == 0
+
+
+def test_histogram_buckets():
+    histogram = Histogram((1, 5))
+
+    histogram.observe(0.5)
+    histogram.observe(3)
+    histogram.observe(10)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot["count"] == 3
+    assert snapshot["buckets"] == { "1": 1, "5": 1, "+Inf": 1 }
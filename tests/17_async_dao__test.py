@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from api import create_app
+from api.neo4j import get_async_driver, get_db_name, run_async
+from api.dao.aio.movies import AsyncMovieDAO
+
+@pytest.fixture
+def async_app():
+    app = create_app({'TESTING': True, 'NEO4J_ASYNC': True})
+
+    return app
+
+
+def test_async_pagination(async_app):
+    """Test that the async MovieDAO pages through movies like the sync one"""
+    with async_app.app_context():
+        dao = AsyncMovieDAO(get_async_driver(), get_db_name())
+
+        async def pages():
+            return await asyncio.gather(
+                run_async(dao.all("title", "ASC", 1, 0)),
+                run_async(dao.all("title", "ASC", 1, 1)),
+            )
+
+        first, second = asyncio.run(pages())
+
+        assert len(first) == 1
+        assert len(second) == 1
+        assert first[0]["tmdbId"] != second[0]["tmdbId"]
+
+
+def test_async_routes(async_app):
+    """Test that the async blueprints are served in async mode"""
+    with async_app.test_client() as client:
+        res = client.get('/api/movies/?sort=imdbRating&order=DESC&limit=2')
+
+        assert res.status_code == 200
+        assert len(res.json) == 2
@@ -0,0 +1,39 @@
+import pytest
+
+from api import create_app
+from api.neo4j import get_driver, get_db_name, get_pool_metrics
+from api.dao.movies import MovieDAO
+
+def count(mode):
+    return sum(member[mode] for member in get_pool_metrics()["members"].values())
+
+
+def test_reads_use_read_access(app):
+    """Test that reads are checked out as read transactions by default"""
+    with app.app_context():
+        dao = MovieDAO(get_driver(), get_db_name())
+
+        before = count("read")
+
+        dao.all("title", "ASC", 1, 0)
+
+        assert count("read") == before + 1
+
+
+def test_leader_routing_mode():
+    """Test that reads are sent to the leader in `leader` mode"""
+    app = create_app({'TESTING': True, 'NEO4J_READ_ROUTING': 'leader'})
+
+    with app.app_context():
+        dao = MovieDAO(get_driver(), get_db_name())
+
+        before = count("write")
+
+        dao.all("title", "ASC", 1, 0)
+
+        assert count("write") == before + 1
+
+
+def test_unknown_routing_mode():
+    with pytest.raises(ValueError):
+        create_app({'TESTING': True, 'NEO4J_READ_ROUTING': 'somewhere'})
@@ -0,0 +1,59 @@
+import pytest
+
+from flask import g
+
+from neo4j import Bookmarks
+
+from api.bookmarks import BOOKMARK_HEADER, encode_bookmarks, decode_bookmarks, get_bookmarks, issue_bookmarks
+from api.neo4j import get_driver, get_db_name
+from api.dao.favorites import FavoriteDAO
+
+toy_story = '862'
+user_id = 'fe770c6b-4034-4e07-8e40-2f39e7a6722c'
+email = 'graphacademy.flag@neo4j.com'
+
+@pytest.fixture(autouse=True)
+def before_all(app):
+    with app.app_context():
+        with get_driver().session(database=get_db_name()) as session:
+            session.execute_write(lambda tx: tx.run("""
+                MERGE (u:User {userId: $userId})
+                SET u.email = $email
+                FOREACH (r in [ (u)-[r:HAS_FAVORITE]->() | r ] | DELETE r)
+            """, userId = user_id, email=email).consume())
+
+
+def test_token_round_trip():
+    token = encode_bookmarks(["FB:one", "FB:two"])
+
+    assert decode_bookmarks(token) == ["FB:one", "FB:two"]
+    assert decode_bookmarks("not a token") == []
+
+
+def test_write_records_bookmark(app):
+    """Test that a write stores its bookmark for the rest of the request"""
+    with app.test_request_context():
+        dao = FavoriteDAO(get_driver(), get_db_name())
+
+        dao.add(user_id, toy_story)
+
+        assert g.neo4j_bookmarks.raw_values
+
+
+def test_request_bookmark_is_used(app):
+    """Test that a bookmark sent by the client is read from the request"""
+    token = encode_bookmarks(["FB:example"])
+
+    with app.test_request_context(headers={ BOOKMARK_HEADER: token }):
+        assert get_bookmarks().raw_values == frozenset(["FB:example"])
+
+
+def test_bookmark_cookie_expires(app):
+    """Test that the bookmark cookie is only kept for BOOKMARK_COOKIE_MAX_AGE"""
+    with app.test_request_context():
+        g.neo4j_bookmarks = Bookmarks.from_raw_values(["FB:example"])
+
+        response = issue_bookmarks(app.response_class())
+
+        assert response.headers[BOOKMARK_HEADER] == encode_bookmarks(["FB:example"])
+        assert "Max-Age={0}".format(app.config["BOOKMARK_COOKIE_MAX_AGE"]) in response.headers["Set-Cookie"]
@@ -0,0 +1,27 @@
+import pytest
+
+from flask import g
+
+from api.neo4j import get_driver, get_db_name
+from api.dao.movies import MovieDAO
+from api.dao.genres import GenreDAO
+
+def test_request_shares_session(app):
+    """Test that DAOs called within a request reuse one session per driver"""
+    with app.test_request_context():
+        driver = get_driver()
+        db_name = get_db_name()
+
+        MovieDAO(driver, db_name).all("title", "ASC", 1, 0)
+        GenreDAO(driver, db_name).all()
+
+        # Genres are loaded by the aggregation workload, which has its own
+        # driver and so its own session
+        drivers = [ driver_id for driver_id, _ in g.neo4j_sessions ]
+
+        assert len(drivers) == 2
+
+        sessions = list(g.neo4j_sessions.values())
+
+    # The sessions are closed when the request is torn down
+    assert all(session.closed() for session in sessions)
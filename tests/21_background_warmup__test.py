@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from api import create_app
+from api.readiness import Readiness
+
+def test_becomes_ready_in_background():
+    """Test that the app is created before the pool is primed and becomes ready"""
+    app = create_app({'TESTING': True, 'NEO4J_BACKGROUND_WARMUP': True, 'NEO4J_MIN_CONNECTIONS': 2})
+
+    with app.test_client() as client:
+        assert client.get('/api/status/live').status_code == 200
+
+        deadline = time.monotonic() + 30
+
+        while not app.readiness.ready and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+        res = client.get('/api/status/ready')
+
+        assert res.status_code == 200
+        assert res.json["ready"] == True
+
+
+def test_ready_when_warmed_up_in_foreground():
+    app = create_app({'TESTING': True, 'NEO4J_BACKGROUND_WARMUP': False})
+
+    assert app.readiness.ready
+
+
+def test_readiness_records_failures():
+    readiness = Readiness()
+
+    readiness.failed(Exception("unreachable"))
+
+    assert readiness.snapshot()["ready"] == False
+    assert readiness.snapshot()["error"] == "unreachable"
+
+    readiness.succeeded()
+
+    assert readiness.ready
+    assert readiness.snapshot()["error"] is None
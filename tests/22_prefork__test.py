@@ -0,0 +1,19 @@
+import pytest
+
+from api import create_app, init_neo4j
+
+def test_app_created_without_driver():
+    """Test that an app created for preloading does not open a driver"""
+    app = create_app({'TESTING': True}, connect=False)
+
+    assert getattr(app, "driver", None) is None
+
+
+def test_driver_created_after_fork():
+    """Test that the driver can be created once the worker has forked"""
+    app = create_app({'TESTING': True, 'NEO4J_BACKGROUND_WARMUP': False}, connect=False)
+
+    init_neo4j(app)
+
+    assert app.driver is not None
+    assert app.readiness.ready
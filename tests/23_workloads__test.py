@@ -0,0 +1,53 @@
+import pytest
+
+from api import create_app
+from api.neo4j import get_driver, get_db_name, get_workload_metrics
+from api.dao.genres import GenreDAO
+from api.dao.movies import MovieDAO
+from api.workloads import Workload, AGGREGATION, INTERACTIVE
+
+def test_aggregation_uses_own_pool(app):
+    """Test that GenreDAO.all runs on the aggregation pool"""
+    with app.app_context():
+        before = get_workload_metrics()[AGGREGATION]["pool"]["acquired"]
+
+        GenreDAO(get_driver(), get_db_name()).all()
+
+        after = get_workload_metrics()[AGGREGATION]["pool"]["acquired"]
+
+        assert after == before + 1
+
+
+def test_interactive_uses_main_pool(app):
+    with app.app_context():
+        before = get_workload_metrics()[AGGREGATION]["pool"]["acquired"]
+
+        MovieDAO(get_driver(), get_db_name()).find_by_id("769")
+
+        assert get_workload_metrics()[AGGREGATION]["pool"]["acquired"] == before
+        assert get_workload_metrics()[INTERACTIVE]["dedicated_pool"] == False
+
+
+def test_workload_settings_from_config():
+    app = create_app({
+        'TESTING': True,
+        'NEO4J_WORKLOADS': { AGGREGATION: { "concurrency": 2, "timeout": 60 } },
+    })
+
+    with app.app_context():
+        metrics = get_workload_metrics()[AGGREGATION]
+
+        assert metrics["concurrency"] == 2
+        assert metrics["timeout"] == 60
+
+
+def test_concurrency_cap():
+    workload = Workload("test", concurrency=1, timeout=0.01)
+
+    assert workload.enter() == True
+    assert workload.enter() == False
+
+    workload.exit()
+
+    assert workload.enter() == True
+    assert workload.snapshot()["rejected"] == 1
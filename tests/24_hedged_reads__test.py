@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from api.hedging import Hedging, LatencyTracker
+from api.workloads import Workload
+
+def test_fast_read_is_not_hedged():
+    hedging = Hedging(enabled=True, delay=0.5)
+
+    output = hedging.run("fast", lambda cancelled: "first")
+
+    assert output == "first"
+    assert hedging.snapshot()["fired"] == 0
+
+
+def test_slow_read_is_hedged():
+    """Test that a second attempt is started and wins when the first is slow"""
+    hedging = Hedging(enabled=True, delay=0.05)
+    attempts = []
+    losers = []
+
+    def attempt(cancelled):
+        attempts.append(cancelled)
+
+        if len(attempts) == 1:
+            time.sleep(0.5)
+
+            if cancelled.is_set():
+                losers.append(cancelled)
+
+            return "slow"
+
+        return "fast"
+
+    assert hedging.run("slow", attempt) == "fast"
+
+    snapshot = hedging.snapshot()
+
+    assert snapshot["fired"] == 1
+    assert snapshot["won"] == 1
+
+    time.sleep(0.6)
+
+    assert len(losers) == 1
+
+
+def test_hedge_holds_a_workload_slot():
+    """Test that the hedge keeps a slot until the losing attempt finishes"""
+    hedging = Hedging(enabled=True, delay=0.05)
+    workload = Workload("aggregation", concurrency=2)
+    attempts = []
+
+    def attempt(cancelled):
+        attempts.append(cancelled)
+
+        if len(attempts) == 1:
+            time.sleep(0.3)
+
+            return "slow"
+
+        return "fast"
+
+    # The caller holds the slot of the first attempt
+    assert workload.enter()
+
+    assert hedging.run("capped", attempt, workload) == "fast"
+
+    workload.exit()
+
+    assert workload.snapshot()["active"] == 1
+
+    time.sleep(0.4)
+
+    assert workload.snapshot()["active"] == 0
+
+
+def test_hedge_is_skipped_without_a_free_slot():
+    hedging = Hedging(enabled=True, delay=0.05)
+    workload = Workload("aggregation", concurrency=1)
+
+    def attempt(cancelled):
+        time.sleep(0.1)
+
+        return "only"
+
+    assert workload.enter()
+
+    assert hedging.run("full", attempt, workload) == "only"
+
+    workload.exit()
+
+    snapshot = hedging.snapshot()
+
+    assert snapshot["fired"] == 0
+    assert snapshot["skipped"] == 1
+    assert workload.snapshot()["rejected"] == 0
+
+
+def test_percentile():
+    tracker = LatencyTracker()
+
+    for value in range(1, 101):
+        tracker.observe(value / 100)
+
+    assert tracker.percentile(95) == 0.95
+    assert tracker.percentile(50) == 0.5
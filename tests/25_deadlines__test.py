@@ -0,0 +1,57 @@
+import time
+
+import pytest
+from flask import Flask, g
+from neo4j.exceptions import ClientError
+
+from api.deadlines import bound_timeout, get_remaining, translate_timeout
+from api.exceptions.deadline import DeadlineExceededException
+from api.exceptions.unavailable import ServiceUnavailableException
+from api.metrics import ConnectionAcquisitionTimeoutError
+
+def test_remaining_time():
+    app = Flask(__name__)
+
+    with app.app_context():
+        assert get_remaining() is None
+
+        g.deadline = time.monotonic() + 5
+
+        assert 4 < get_remaining() <= 5
+
+        g.deadline = time.monotonic() - 1
+
+        with pytest.raises(DeadlineExceededException):
+            get_remaining()
+
+
+def test_timeout_is_bounded_by_deadline():
+    assert bound_timeout(None, None) is None
+    assert bound_timeout(10, None) == 10
+    assert bound_timeout(None, 2) == 2
+    assert bound_timeout(10, 2) == 2
+    assert bound_timeout(1, 2) == 1
+
+
+def test_timeouts_are_translated():
+    class TimedOut(Exception):
+        code = "Neo.ClientError.Transaction.TransactionTimedOutClientConfiguration"
+
+    assert isinstance(translate_timeout(TimedOut()), DeadlineExceededException)
+    # Older drivers raise a ClientError that did not come from the server
+    if ConnectionAcquisitionTimeoutError is not None:
+        timed_out = ConnectionAcquisitionTimeoutError("Timed out")
+    else:
+        timed_out = ClientError("Timed out")
+
+    assert isinstance(translate_timeout(timed_out), ServiceUnavailableException)
+    assert translate_timeout(Exception("Invalid input")) is None
+
+
+def test_expired_deadline_returns_504(app):
+    app.config['ROUTE_DEADLINE'] = 0.000001
+
+    with app.test_client() as client:
+        res = client.get("/api/movies/")
+
+        assert res.status_code == 504
@@ -0,0 +1,39 @@
+import pytest
+
+from api.neo4j import get_driver, get_db_name
+from api.migrations import MIGRATIONS, migrate, get_applied, get_index_progress
+
+def test_migrations_are_ordered_and_idempotent():
+    versions = [ migration.version for migration in MIGRATIONS ]
+
+    assert versions == sorted(set(versions))
+
+    for migration in MIGRATIONS:
+        for statement in migration.statements:
+            assert "IF NOT EXISTS" in statement
+
+
+def test_migrate_applies_every_migration(client):
+    with client.application.app_context():
+        driver = get_driver()
+
+        migrate(driver, get_db_name())
+
+        applied = get_applied(driver, get_db_name())
+
+        for migration in MIGRATIONS:
+            assert migration.version in applied
+
+        # Running again applies nothing
+        assert migrate(driver, get_db_name()) == []
+
+
+def test_index_progress(client):
+    with client.application.app_context():
+        migrate(get_driver(), get_db_name())
+
+        names = [ index["name"] for index in get_index_progress(get_driver(), get_db_name()) ]
+
+        assert "movie_tmdb_id" in names
+        assert "movie_title" in names
+        assert "rated_timestamp" in names
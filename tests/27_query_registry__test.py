@@ -0,0 +1,47 @@
+import pytest
+
+from api.exceptions.badrequest import BadRequestException
+from api.queries import SORTS, ORDERS, get_query, all_queries, validate_sort
+
+class Tx:
+    def run(self, cypher, parameters):
+        return cypher, parameters
+
+
+def test_sort_variants_are_prebuilt():
+    query = get_query("movies.all", "movie", "imdbRating", "desc")
+
+    assert "ORDER BY m.`imdbRating` DESC" in query.text
+    assert get_query("movies.all", "movie", "imdbRating", "DESC") is query
+
+    # One variant per sort key and order, with and without a cursor
+    variants = [ q for q in all_queries() if q.name == "movies.all" ]
+
+    assert len(variants) == len(SORTS["movie"]) * len(ORDERS) * 2
+
+
+def test_invalid_sort_is_rejected():
+    with pytest.raises(BadRequestException):
+        get_query("movies.all", "movie", "password", "ASC")
+
+    with pytest.raises(BadRequestException):
+        validate_sort("movie", "title", "ASC; MATCH (n) DETACH DELETE n")
+
+
+def test_parameters_are_checked():
+    query = get_query("favorites.add")
+
+    assert query.params == { "userId", "movieId" }
+
+    with pytest.raises(ValueError):
+        query.run(Tx(), userId="1")
+
+    cypher, params = query.run(Tx(), userId="1", movieId="769")
+
+    assert params == { "userId": "1", "movieId": "769" }
+
+
+def test_invalid_sort_returns_400(client):
+    res = client.get("/api/movies/?sort=password")
+
+    assert res.status_code == 400
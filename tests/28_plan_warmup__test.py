@@ -0,0 +1,18 @@
+import pytest
+
+from api.neo4j import get_driver, get_db_name
+from api.plans import warm_plans, get_sample_parameters
+from api.queries import get_query
+
+def test_sample_parameters():
+    query = get_query("movies.all", "movie", "title", "ASC")
+
+    assert get_sample_parameters(query) == { "skip": 0, "limit": 6, "fields": None }
+
+
+def test_every_query_plans(client):
+    with client.application.app_context():
+        elapsed, failed = warm_plans(get_driver(), get_db_name())
+
+        assert failed == {}
+        assert elapsed > 0
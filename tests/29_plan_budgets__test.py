@@ -0,0 +1,72 @@
+import pytest
+
+from api.neo4j import get_driver, get_db_name
+from api.plans import summarise_plan, check_plan, check_budgets, load_budgets, profile_all, get_profile_parameters
+from api.queries import all_queries, get_query
+
+plan = {
+    "operatorType": "ProduceResults@neo4j",
+    "dbHits": 0,
+    "args": { "EstimatedRows": 1.0 },
+    "children": [
+        {
+            "operatorType": "NodeUniqueIndexSeek@neo4j",
+            "dbHits": 2,
+            "args": { "EstimatedRows": 1.0 },
+        },
+    ],
+}
+
+def test_summarise_plan():
+    assert summarise_plan(plan) == {
+        "operators": ["NodeUniqueIndexSeek", "ProduceResults"],
+        "db_hits": 2,
+        "estimated_rows": 1.0,
+    }
+
+
+def test_regressions_are_detected():
+    budget = summarise_plan(plan)
+
+    assert check_plan(budget, budget) == []
+
+    # Within tolerance
+    assert check_plan(dict(budget, db_hits=2.2), budget) == []
+
+    worse = {
+        "operators": ["AllNodesScan", "Filter", "ProduceResults"],
+        "db_hits": 100000,
+        "estimated_rows": 1.0,
+    }
+    problems = check_plan(worse, budget)
+
+    assert "plan contains AllNodesScan" in problems
+    assert len(problems) == 3
+
+    # Queries without a budget are still checked for regression operators
+    assert check_plan(worse, None) == ["plan contains AllNodesScan"]
+
+
+def test_every_query_has_a_budget():
+    budgets = load_budgets()
+
+    assert set(query.label for query in all_queries()) <= set(budgets["queries"])
+
+
+def test_writes_are_profiled_with_a_new_email():
+    overrides = load_budgets()["parameters"]
+    register = get_profile_parameters(get_query("auth.register"), overrides)
+
+    assert register["email"] != overrides["email"]
+    assert register["email"] != get_profile_parameters(get_query("auth.register"), overrides)["email"]
+
+    # Reads still look up the user in the budget file
+    assert get_profile_parameters(get_query("auth.get_user"), overrides)["email"] == overrides["email"]
+
+
+def test_plans_are_within_budget(client):
+    with client.application.app_context():
+        budgets = load_budgets()
+        profiles = profile_all(get_driver(), get_db_name(), budgets)
+
+        assert check_budgets(profiles, budgets) == {}
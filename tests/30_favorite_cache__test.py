@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from api.favorite_cache import FavoriteCache, flag_favorites
+
+def test_cached_favorites_are_updated():
+    cache = FavoriteCache()
+
+    assert cache.get("user") is None
+
+    cache.set("user", ["769"])
+    cache.add("user", "862")
+    cache.remove("user", "769")
+
+    assert cache.get("user") == { "862" }
+    assert "user" in cache
+
+    # Users that are not cached are left alone
+    cache.add("other", "862")
+
+    assert cache.get("other") is None
+
+
+def test_cached_favorites_follow_user_versions():
+    cache = FavoriteCache()
+
+    cache.set("user", ["769"], 1)
+    cache.add("user", "862", 2)
+
+    assert cache.get("user", 2) == { "769", "862" }
+
+    # Adding a favorite again does not change the version
+    cache.add("user", "862", 2)
+
+    assert cache.get("user", 2) == { "769", "862" }
+    assert cache.get("user", 3) is None
+
+    # A write made elsewhere in between drops the set
+    cache.set("user", ["769"], 1)
+    cache.remove("user", "769", 3)
+
+    assert cache.get("user") is None
+
+
+def test_entries_expire_and_are_evicted():
+    cache = FavoriteCache(max_users=2, ttl=0.05)
+
+    cache.set("a", [])
+    cache.set("b", [])
+    cache.set("c", [])
+
+    assert cache.get("a") is None
+    assert cache.get("c") == set()
+
+    time.sleep(0.1)
+
+    assert cache.get("c") is None
+
+
+def test_flag_favorites():
+    movies = [ { "tmdbId": "769" }, { "tmdbId": "862" } ]
+
+    flag_favorites(movies, { "862" })
+
+    assert [ movie["favorite"] for movie in movies ] == [ False, True ]
@@ -0,0 +1,62 @@
+import pytest
+
+from neo4j.time import Date
+
+from api.exceptions.badrequest import BadRequestException
+from api.neo4j import get_driver, get_db_name
+from api.dao.movies import MovieDAO
+from api.pagination import encode_cursor, decode_cursor, get_page_parameters
+from api.queries import get_query
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("imdbRating", "desc", 8.1, "769")
+
+    assert decode_cursor(cursor, "imdbRating", "DESC") == (8.1, "769")
+
+    born = encode_cursor("born", "ASC", Date(1940, 4, 25), "1158")
+
+    assert decode_cursor(born, "born", "ASC") == (Date(1940, 4, 25), "1158")
+
+
+def test_invalid_cursor_is_rejected():
+    cursor = encode_cursor("title", "ASC", "Goodfellas", "769")
+
+    with pytest.raises(BadRequestException):
+        decode_cursor(cursor, "title", "DESC")
+
+    with pytest.raises(BadRequestException):
+        decode_cursor("not-a-cursor", "title", "ASC")
+
+
+def test_seek_variant():
+    query = get_query("movies.all", "movie", "title", "ASC", True)
+
+    assert "m.`title` >= $after" in query.text
+    assert "SKIP" not in query.text
+    assert get_page_parameters(6, 12, ("Goodfellas", "769")) == { "limit": 6, "after": "Goodfellas", "afterId": "769" }
+    assert get_page_parameters(6, 12, None) == { "limit": 6, "skip": 12 }
+
+
+def test_cursor_pages_match_skip_pages(app):
+    with app.app_context():
+        dao = MovieDAO(get_driver(), get_db_name())
+
+        first = dao.all("imdbRating", "DESC", 5, 0)
+        second = dao.all("imdbRating", "DESC", 5, 5)
+
+        last = first[-1]
+        after = dao.all("imdbRating", "DESC", 5, after=(last["imdbRating"], last["tmdbId"]))
+
+        assert [ m["tmdbId"] for m in after ] == [ m["tmdbId"] for m in second ]
+
+
+def test_list_issues_next_cursor(client):
+    res = client.get("/api/movies/?sort=title&limit=2")
+    cursor = res.headers.get("X-Next-Cursor")
+
+    assert cursor is not None
+
+    next_page = client.get("/api/movies/?sort=title&limit=2&cursor=" + cursor)
+
+    assert next_page.status_code == 200
+    assert next_page.json[0]["tmdbId"] not in [ m["tmdbId"] for m in res.json ]
@@ -0,0 +1,42 @@
+import pytest
+
+@pytest.fixture
+def guarded(client, app):
+    app.config.update(MAX_LIMIT=10, MAX_SKIP=100)
+
+    return client
+
+
+def test_limit_is_clamped(guarded, app):
+    res = guarded.get("/api/movies/?limit=1000")
+
+    assert res.status_code == 200
+    assert len(res.json) == 10
+    assert app.guard_metrics.snapshot()["clamped"]["limit"] == 1
+
+
+def test_invalid_pagination_is_rejected(guarded, app):
+    assert guarded.get("/api/movies/?limit=-1").status_code == 400
+    assert guarded.get("/api/movies/?limit=lots").status_code == 400
+    assert guarded.get("/api/movies/?skip=1000").status_code == 400
+
+    rejected = app.guard_metrics.snapshot()["rejected"]
+
+    assert rejected["limit"] == 2
+    assert rejected["skip"] == 1
+
+
+def test_unknown_sort_is_rejected(guarded, app):
+    res = guarded.get("/api/genres/Action/movies?sort=password")
+
+    assert res.status_code == 400
+    assert app.guard_metrics.snapshot()["rejected"]["sort"] == 1
+
+
+def test_expensive_request_is_rejected(guarded, app):
+    app.config.update(QUERY_COST_LIMIT=1)
+
+    res = guarded.get("/api/movies/?limit=5")
+
+    assert res.status_code == 400
+    assert app.guard_metrics.snapshot()["rejected"]["cost"] == 1
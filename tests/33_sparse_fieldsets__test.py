@@ -0,0 +1,45 @@
+import pytest
+
+from api.neo4j import get_driver, get_db_name
+from api.dao.movies import MovieDAO
+from api.fields import to_map
+
+def test_to_map():
+    assert to_map([ "769", "Goodfellas" ], [ "tmdbId", "title" ]) == { "tmdbId": "769", "title": "Goodfellas" }
+    assert to_map({ "title": "Goodfellas" }, None) == { "title": "Goodfellas" }
+
+
+def test_list_returns_requested_fields(app):
+    with app.app_context():
+        dao = MovieDAO(get_driver(), get_db_name())
+
+        output = dao.all("title", "ASC", 3, 0, fields=[ "tmdbId", "title", "poster" ])
+
+        assert len(output) == 3
+
+        for movie in output:
+            assert set(movie.keys()) == { "tmdbId", "title", "poster", "favorite" }
+
+
+def test_details_limit_actors_and_directors(app):
+    goodfellas = "769"
+
+    with app.app_context():
+        dao = MovieDAO(get_driver(), get_db_name())
+
+        output = dao.find_by_id(goodfellas, fields=[ "tmdbId", "title" ], actors_limit=1, directors_limit=0)
+
+        assert output["title"] == "Goodfellas"
+        assert "plot" not in output
+        assert len(output["actors"]) == 1
+        assert output["directors"] == []
+        assert len(output["genres"]) > 0
+
+
+def test_fields_param(client):
+    res = client.get("/api/movies/?fields=title,poster&limit=2")
+
+    assert res.status_code == 200
+    assert set(res.json[0].keys()) == { "tmdbId", "title", "poster", "favorite" }
+
+    assert client.get("/api/movies/?fields=password").status_code == 400
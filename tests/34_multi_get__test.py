@@ -0,0 +1,38 @@
+import pytest
+
+from api.neo4j import get_driver, get_db_name
+from api.dao.movies import MovieDAO
+
+goodfellas = "769"
+toy_story = "862"
+
+def test_get_by_ids_keeps_request_order(app):
+    with app.app_context():
+        dao = MovieDAO(get_driver(), get_db_name())
+
+        output = dao.get_by_ids([ toy_story, "missing", goodfellas ])
+
+        assert [ movie["tmdbId"] for movie in output ] == [ toy_story, goodfellas ]
+        assert output[0]["favorite"] == False
+
+
+def test_ids_param(client):
+    res = client.get("/api/movies/?ids={0},{1}&fields=title".format(goodfellas, toy_story))
+
+    assert res.status_code == 200
+    assert [ movie["title"] for movie in res.json ] == [ "Goodfellas", "Toy Story" ]
+
+
+def test_ids_body(client):
+    res = client.post("/api/movies/", json={ "ids": [ toy_story ] })
+
+    assert res.status_code == 200
+    assert res.json[0]["tmdbId"] == toy_story
+
+
+def test_batch_size_is_limited(client):
+    client.application.config.update(MAX_BATCH_SIZE=1)
+
+    res = client.get("/api/movies/?ids={0},{1}".format(goodfellas, toy_story))
+
+    assert res.status_code == 400
@@ -0,0 +1,50 @@
+import pytest
+
+from api.batch import get_path, get_environ
+from api.exceptions.badrequest import BadRequestException
+
+goodfellas = "769"
+
+def test_only_api_gets_are_batched():
+    assert get_path("/api/genres") == "/api/genres"
+    assert get_path({ "path": "/api/genres", "method": "get" }) == "/api/genres"
+
+    for request in ( "http://example.com/api/genres", { "path": "/api/account/favorites/1", "method": "POST" }, "/api/batch/" ):
+        with pytest.raises(BadRequestException):
+            get_path(request)
+
+
+def test_environ_keeps_headers():
+    environ = get_environ({ "REQUEST_METHOD": "POST", "HTTP_AUTHORIZATION": "Bearer token" }, "/api/movies/?limit=2")
+
+    assert environ["REQUEST_METHOD"] == "GET"
+    assert environ["PATH_INFO"] == "/api/movies/"
+    assert environ["QUERY_STRING"] == "limit=2"
+    assert environ["HTTP_AUTHORIZATION"] == "Bearer token"
+
+
+def test_batch(client):
+    res = client.post("/api/batch/", json={ "requests": [
+        "/api/movies/{0}".format(goodfellas),
+        "/api/movies/{0}/ratings?limit=2".format(goodfellas),
+        "/api/movies/?limit=-1",
+    ] })
+
+    assert res.status_code == 200
+
+    movie, ratings, invalid = res.json["responses"]
+
+    assert movie["status"] == 200
+    assert movie["body"]["title"] == "Goodfellas"
+    assert ratings["status"] == 200
+    assert len(ratings["body"]) == 2
+    assert "X-Next-Cursor" in ratings["headers"]
+    assert invalid["status"] == 400
+
+
+def test_batch_size_is_limited(client):
+    client.application.batch.max_requests = 1
+
+    res = client.post("/api/batch/", json={ "requests": [ "/api/genres", "/api/genres" ] })
+
+    assert res.status_code == 400
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from api.neo4j import get_driver, get_db_name
+from api.dao.genres import GenreDAO
+from api.exceptions.notfound import NotFoundException
+from api.genre_summaries import GenreSummaryCache, refresh_summaries
+
+def test_cached_summaries_expire():
+    cache = GenreSummaryCache(ttl=0.05)
+
+    cache.set("neo4j", { "Action": { "name": "Action" } })
+
+    assert cache.get("neo4j") == { "Action": { "name": "Action" } }
+
+    time.sleep(0.1)
+
+    assert cache.get("neo4j") is None
+
+
+def test_summaries_match_live_genres(app):
+    with app.app_context():
+        dao = GenreDAO(get_driver(), get_db_name())
+
+        refresh_summaries(get_driver(), get_db_name())
+
+        genres = dao.all()
+
+        assert len(genres) == 19
+        assert genres[0]["name"] == "Action"
+        assert genres[0]["movies"] > 0
+        assert genres[0]["poster"] is not None
+
+
+def test_find_genre(app):
+    with app.app_context():
+        dao = GenreDAO(get_driver(), get_db_name())
+
+        assert dao.find("Action")["name"] == "Action"
+
+        with pytest.raises(NotFoundException):
+            dao.find("Not a genre")
+
+
+def test_genres_that_were_not_refreshed_are_summarised(app):
+    with app.app_context():
+        driver = get_driver()
+
+        with driver.session(database=get_db_name()) as session:
+            session.run("MATCH (g:Genre {name: 'Comedy'}) REMOVE g.movieCount, g.poster").consume()
+
+        try:
+            genres = { genre["name"]: genre for genre in GenreDAO(driver, get_db_name()).load_summaries() }
+
+            assert len(genres) == 19
+            assert genres["Comedy"]["movies"] > 0
+            assert genres["Comedy"]["poster"] is not None
+        finally:
+            refresh_summaries(driver, get_db_name(), ["Comedy"])
+
+
+def test_refresh_purges_cached_genre_lists(app):
+    with app.app_context():
+        app.response_cache.set("/api/genres/Comedy/movies?", (b"[]", "application/json", None), { "genre:Comedy" })
+        app.response_cache.set("/api/genres/Action/movies?", (b"[]", "application/json", None), { "genre:Action" })
+
+        refresh_summaries(get_driver(), get_db_name(), ["Comedy"])
+
+        assert app.response_cache.get("/api/genres/Comedy/movies?") is None
+        assert app.response_cache.get("/api/genres/Action/movies?") is not None
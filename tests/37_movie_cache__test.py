@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from api.neo4j import get_driver, get_db_name
+from api.dao.movies import MovieDAO
+from api.dao.ratings import RatingDAO
+from api.movie_cache import MovieCache, shape_movie
+
+goodfellas = "769"
+user = "1185150b-9e81-46a2-a1d3-eb649544b9c4"
+
+def test_entries_are_evicted_and_invalidated():
+    cache = MovieCache(max_entries=2, ttl=0.05)
+
+    cache.set("1", {})
+    cache.set("2", {})
+    cache.set("3", {})
+
+    assert cache.get("1") is None
+    assert cache.get("3") == {}
+
+    cache.invalidate("3")
+
+    assert cache.get("3") is None
+
+    cache.set("2", {})
+    time.sleep(0.1)
+
+    assert cache.get("2") is None
+    assert cache.snapshot()["evictions"] == 1
+
+
+def test_shape_movie():
+    movie = { "tmdbId": "1", "title": "Title", "plot": "Plot", "actors": [ 1, 2, 3 ], "directors": [ 1 ], "genres": [] }
+
+    output = shape_movie(movie, [ "tmdbId", "title", "poster" ], actors_limit=2)
+
+    assert output == { "tmdbId": "1", "title": "Title", "poster": None, "actors": [ 1, 2 ], "directors": [ 1 ], "genres": [] }
+    assert movie["actors"] == [ 1, 2, 3 ]
+
+
+def test_details_are_served_from_cache(app):
+    with app.app_context():
+        dao = MovieDAO(get_driver(), get_db_name())
+
+        first = dao.find_by_id(goodfellas)
+        second = dao.find_by_id(goodfellas, fields=[ "tmdbId", "title" ])
+
+        assert second["title"] == first["title"]
+        assert "plot" not in second
+        assert app.movie_cache.snapshot()["hits"] == 1
+
+
+def test_rating_invalidates_movie(app):
+    with app.app_context():
+        MovieDAO(get_driver(), get_db_name()).find_by_id(goodfellas)
+
+        assert app.movie_cache.snapshot()["movies"] == 1
+
+        RatingDAO(get_driver(), get_db_name()).add(user, goodfellas, 5)
+
+        assert app.movie_cache.snapshot()["movies"] == 0
+        assert app.movie_cache.snapshot()["invalidations"] == 1
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from api.http_cache import ETagRegistry
+
+def test_registry_forgets_etags():
+    registry = ETagRegistry(ttl=0.05)
+
+    registry.set("/api/genres/?", "a")
+    registry.set("/api/movies/769?", "b")
+    registry.invalidate("/api/genres")
+
+    assert registry.get("/api/genres/?") is None
+    assert registry.get("/api/movies/769?") == "b"
+
+    time.sleep(0.1)
+
+    assert registry.get("/api/movies/769?") is None
+
+
+def test_catalog_responses_are_cacheable(client):
+    res = client.get("/api/genres/")
+
+    assert res.status_code == 200
+    assert res.headers["ETag"]
+    assert "stale-while-revalidate" in res.headers["Cache-Control"]
+    assert "Authorization" in res.headers["Vary"]
+
+
+def test_known_etag_is_not_modified(client):
+    etag = client.get("/api/movies/769").headers["ETag"]
+
+    res = client.get("/api/movies/769", headers={ "If-None-Match": etag })
+
+    assert res.status_code == 304
+    assert res.data == b""
+    assert client.application.etags.snapshot()["hits"] == 1
+
+
+def test_lists_are_not_cacheable(client):
+    res = client.get("/api/movies/")
+
+    assert "ETag" not in res.headers
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from api.user_versions import UserVersions
+
+def test_versions_only_move_forward():
+    versions = UserVersions()
+
+    assert versions.get("user") is None
+
+    versions.set("user", 2)
+    versions.set("user", 1)
+
+    assert versions.get("user") == 2
+
+    versions.set("user", 3)
+
+    assert versions.get("user") == 3
+
+
+def test_versions_expire_and_are_evicted():
+    versions = UserVersions(max_users=2, ttl=0.05)
+
+    versions.set("a", 1)
+    versions.set("b", 1)
+    versions.set("c", 1)
+
+    assert versions.get("a") is None
+    assert versions.get("c") == 1
+
+    time.sleep(0.1)
+
+    assert versions.get("c") is None
+
+
+def test_favorites_can_be_revalidated(client):
+    email = "graphacademy.versions@neo4j.com"
+
+    client.post("/api/auth/register", json={ "email": email, "password": "letmein", "name": "Versions" })
+    token = client.post("/api/auth/login", json={ "email": email, "password": "letmein" }).json["token"]
+    headers = { "Authorization": "Bearer " + token }
+
+    res = client.get("/api/account/favorites", headers=headers)
+    etag = res.headers["ETag"]
+
+    assert res.headers["Cache-Control"] == "private, no-cache"
+
+    res = client.get("/api/account/favorites", headers={ **headers, "If-None-Match": etag })
+
+    assert res.status_code == 304
+
+    client.post("/api/account/favorites/769", headers=headers)
+
+    res = client.get("/api/account/favorites", headers={ **headers, "If-None-Match": etag })
+
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+    client.delete("/api/account/favorites/769", headers=headers)
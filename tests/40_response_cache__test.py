@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from api.response_cache import ResponseCache, get_surrogate_keys
+
+def test_purge_drops_tagged_responses():
+    cache = ResponseCache()
+
+    cache.set("/api/movies/?", (b"[]", "application/json", None), { "movie", "movie:769" })
+    cache.set("/api/people/?", (b"[]", "application/json", None), { "person", "person:1" })
+
+    assert cache.purge("movie:769") == 1
+    assert cache.get("/api/movies/?") is None
+    assert cache.get("/api/people/?") is not None
+
+    assert cache.purge() == 1
+    assert cache.snapshot()["bytes"] == 0
+
+
+def test_responses_expire_and_are_evicted():
+    cache = ResponseCache(max_entries=2, ttl=0.05)
+
+    for url in ("a", "b", "c"):
+        cache.set(url, (b"[]", "application/json", None), set())
+
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.snapshot()["evictions"] == 1
+
+    time.sleep(0.1)
+
+    assert cache.get("c") is None
+
+
+def test_published_purges_are_applied():
+    cache = ResponseCache(purge_interval=60)
+
+    cache.set("/api/movies/?", (b"[]", "application/json", None), { "movie", "movie:769" })
+    cache.set("/api/people/?", (b"[]", "application/json", None), { "person", "person:1" })
+
+    # Only one check per interval
+    assert cache.claim_poll()
+    assert not cache.claim_poll()
+
+    # The first check only records the generation
+    assert cache.apply_purges(3, []) == 0
+    assert cache.snapshot()["generation"] == 3
+
+    assert cache.apply_purges(4, [ ["movie:769"] ]) == 1
+    assert cache.get("/api/people/?") is not None
+
+    # Purges that were deleted before they were read drop everything
+    assert cache.apply_purges(2000, [ ["movie:1"] ]) == 1
+    assert cache.get("/api/people/?") is None
+
+
+def test_surrogate_keys():
+    movies = [ { "tmdbId": "769" }, { "tmdbId": "862" } ]
+
+    assert get_surrogate_keys("genre.get_genre_movies", { "name": "Action" }, movies) == {
+        "genre:Action", "movie", "movie:769", "movie:862"
+    }
+    assert get_surrogate_keys("movies.get_movie_ratings", { "movie_id": "769" }, []) == { "movie:769" }
+
+
+def test_anonymous_lists_are_cached(client):
+    cache = client.application.response_cache
+
+    first = client.get("/api/movies/?limit=2&sort=title")
+    hits = cache.snapshot()["hits"]
+    second = client.get("/api/movies/?sort=title&limit=2")
+
+    assert second.json == first.json
+    assert cache.snapshot()["hits"] == hits + 1